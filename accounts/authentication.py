@@ -0,0 +1,79 @@
+# accounts/authentication.py
+"""
+JWT authentication without a per-request user query.
+
+The token signature and expiry are verified locally exactly as simplejwt
+does; the user it names is then rebuilt from a small cached record (id,
+email, username, phone, full_name, is_active, is_staff, is_superuser and a
+digest of the password hash for token revocation) kept AUTH_USER_CACHE_TTL
+seconds, and only fetched from the database on a miss. Other fields load
+lazily from the database if a view touches them.
+
+Saving or deleting a user drops its entry (see accounts.signals) from the
+cache of the process that saved it. Whether other workers see that
+immediately depends on the cache backend: with a shared cache
+(CACHE_REDIS_URL) they do; with the per-process LocMem fallback they keep
+serving their own copy until it expires, so a deactivated, demoted or
+re-passworded user stays authenticated elsewhere for up to
+AUTH_USER_CACHE_TTL seconds (system check accounts.W001 flags this when
+DEBUG is off).
+Bulk ``QuerySet.update()`` calls send no signals; call invalidate_user()
+after them, or wait out the TTL.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+USER_CACHE_PREFIX = "auth-user:v2:"   # v2: narrow record, not a pickled User
+
+
+def _cache_key(user_id):
+    return f"{USER_CACHE_PREFIX}{user_id}"
+
+
+def invalidate_user(user_id):
+    cache.delete(_cache_key(user_id))
+
+
+CACHED_FIELDS = ("id", "email", "username", "phone", "full_name", "is_active", "is_staff", "is_superuser")
+
+
+def _record(user):
+    record = {name: getattr(user, name) for name in CACHED_FIELDS}
+    record["password_md5"] = get_md5_hash_password(user.password)
+    return record
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken("Token contained no recognizable user identification")
+
+        key = _cache_key(user_id)
+        record = cache.get(key)
+        if record is None:
+            try:
+                user = self.user_model.objects.get(**{api_settings.USER_ID_FIELD: user_id})
+            except self.user_model.DoesNotExist:
+                raise AuthenticationFailed("User not found", code="user_not_found")
+            record = _record(user)
+            cache.set(key, record, getattr(settings, "AUTH_USER_CACHE_TTL", 10))
+        else:
+            # from_db() takes the loaded fields in model field order
+            names = [f.attname for f in self.user_model._meta.concrete_fields if f.attname in record]
+            user = self.user_model.from_db(None, names, [record[name] for name in names])
+
+        # Same checks as simplejwt, against the cached record
+        if api_settings.CHECK_USER_IS_ACTIVE and not record["is_active"]:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+        if api_settings.CHECK_REVOKE_TOKEN and (
+            validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != record["password_md5"]
+        ):
+            raise AuthenticationFailed("The user's password has been changed.", code="password_changed")
+        return user
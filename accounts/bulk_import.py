@@ -0,0 +1,165 @@
+# accounts/bulk_import.py
+"""
+Bulk patient onboarding.
+
+Rows ({"email", "username", "phone", "full_name", "password"}) are
+validated in Python, checked for uniqueness against the database with one
+set-based query (plus duplicates within the batch), their passwords hashed
+on a process pool, and the valid users inserted with bulk_create in chunks.
+Invalid rows are reported with their errors and never abort the batch; a
+chunk that hits a constraint anyway (a concurrent registration) is retried
+row by row so only the offending rows fail.
+
+Rows without a password get an unusable one (set it later via a reset).
+"""
+
+import csv
+import io
+import logging
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.password_validation import validate_password
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+
+from . import hashing
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ("email", "username", "phone", "full_name", "password")
+UNIQUE_FIELDS = ("email", "username", "phone")
+CHUNK_SIZE = 1000
+
+
+def read_csv(text_or_file):
+    """
+    Rows from CSV text or a text file with a header line (FIELDS, any order).
+    """
+    f = io.StringIO(text_or_file) if isinstance(text_or_file, str) else text_or_file
+    return [
+        {k.strip().lower(): (v or "").strip() for k, v in row.items() if k is not None}   # None: surplus cells
+        for row in csv.DictReader(f)
+    ]
+
+
+# ===============================
+# VALIDATION
+# ===============================
+def _clean(row, User):
+    data = {name: str(row.get(name) or "").strip() for name in FIELDS}
+    errors = {}
+    if data["email"]:
+        data["email"] = User.objects.normalize_email(data["email"])
+        try:
+            validate_email(data["email"])
+        except ValidationError as e:
+            errors["email"] = list(e.messages)
+    for name in UNIQUE_FIELDS:
+        if not data[name]:
+            errors[name] = ["This field is required."]
+        elif len(data[name]) > User._meta.get_field(name).max_length:
+            errors[name] = [f"At most {User._meta.get_field(name).max_length} characters."]
+    if len(data["full_name"]) > User._meta.get_field("full_name").max_length:
+        errors["full_name"] = ["Too long."]
+    if data["password"] and not errors:
+        try:
+            validate_password(data["password"], user=User(email=data["email"], username=data["username"]))
+        except ValidationError as e:
+            errors["password"] = list(e.messages)
+    return data, errors
+
+
+def _check_unique(cleaned, errors, User):
+    """
+    Flag values already taken in the database (one query) or earlier in the
+    batch. Emails are already normalized (_clean), as stored by every write.
+    """
+    candidates = [i for i in range(len(cleaned)) if i not in errors]
+    if not candidates:
+        return
+
+    values = {name: {cleaned[i][name] for i in candidates} for name in UNIQUE_FIELDS}
+    taken = {name: set() for name in UNIQUE_FIELDS}
+    query = Q(email__in=values["email"]) | Q(username__in=values["username"]) | Q(phone__in=values["phone"])
+    for row in User.objects.filter(query).values_list(*UNIQUE_FIELDS):
+        for name, value in zip(UNIQUE_FIELDS, row):
+            taken[name].add(value)
+
+    for i in candidates:
+        row_errors = {}
+        for name in UNIQUE_FIELDS:
+            if cleaned[i][name] in taken[name]:
+                row_errors[name] = [f"A user with this {name} already exists."]
+        if row_errors:
+            errors[i] = row_errors
+        else:
+            for name in UNIQUE_FIELDS:
+                taken[name].add(cleaned[i][name])   # later duplicates in the batch fail
+
+
+# ===============================
+# IMPORT
+# ===============================
+def _insert(users, rows, errors, chunk_size, User):
+    created = 0
+    for start in range(0, len(users), chunk_size):
+        chunk = users[start:start + chunk_size]
+        try:
+            with transaction.atomic():
+                User.objects.bulk_create(chunk)
+            created += len(chunk)
+            continue
+        except IntegrityError:
+            pass
+        for user, i in zip(chunk, rows[start:start + chunk_size]):
+            user.pk = None   # may have been assigned by the rolled-back bulk insert
+            try:
+                with transaction.atomic():
+                    user.save(force_insert=True)
+                created += 1
+            except IntegrityError as e:
+                errors[i] = {"non_field_errors": [str(e)]}
+    return created
+
+
+def import_users(rows, workers=None, chunk_size=CHUNK_SIZE, progress=None, pool=None):
+    """
+    Create users from ``rows``; returns {"rows", "created", "errors": [{"row",
+    "email", "errors"}]} with ``row`` counting from 1. Passwords are hashed on
+    ``pool`` if given, else on ``workers`` processes started for this call.
+    """
+    User = get_user_model()
+    cleaned, errors = [], {}
+    for i, row in enumerate(rows):
+        data, row_errors = _clean(row, User)
+        cleaned.append(data)
+        if row_errors:
+            errors[i] = row_errors
+    _check_unique(cleaned, errors, User)
+
+    valid = [i for i in range(len(cleaned)) if i not in errors]
+    with_password = [i for i in valid if cleaned[i]["password"]]
+    if progress:
+        progress(f"{len(valid)}/{len(cleaned)} rows valid; hashing {len(with_password)} passwords")
+    hashed = dict(zip(with_password, hashing.hash_in_processes([cleaned[i]["password"] for i in with_password],
+                                                               workers=workers, pool=pool)))
+
+    users = []
+    for i in valid:
+        data = cleaned[i]
+        user = User(email=data["email"], username=data["username"], phone=data["phone"],
+                    full_name=data["full_name"] or None)
+        if i in hashed:
+            user.password = hashed[i]
+        else:
+            user.set_unusable_password()
+        users.append(user)
+    created = _insert(users, valid, errors, chunk_size, User)
+    logger.info(f"👥 Bulk import: {created} users created, {len(errors)} rows rejected")
+    return {
+        "rows": len(cleaned),
+        "created": created,
+        "errors": [{"row": i + 1, "email": cleaned[i]["email"], "errors": errors[i]} for i in sorted(errors)],
+    }
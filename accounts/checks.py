@@ -0,0 +1,26 @@
+# accounts/checks.py
+from django.conf import settings
+from django.core.checks import Warning, register
+
+LOCAL_CACHE_BACKENDS = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+@register()
+def auth_cache_is_shared(app_configs, **kwargs):
+    """
+    The JWT user cache only invalidates across workers on a shared cache.
+    Development servers (DEBUG) run one process, so only production warns.
+    """
+    backend = settings.CACHES.get("default", {}).get("BACKEND", "")
+    ttl = getattr(settings, "AUTH_USER_CACHE_TTL", 10)
+    if not settings.DEBUG and backend in LOCAL_CACHE_BACKENDS and ttl > 0:
+        return [Warning(
+            "The default cache is per process, so a deactivated or demoted user stays "
+            f"authenticated in other workers for up to AUTH_USER_CACHE_TTL ({ttl}s).",
+            hint="Set CACHE_REDIS_URL to share the cache, or lower AUTH_USER_CACHE_TTL.",
+            id="accounts.W001",
+        )]
+    return []
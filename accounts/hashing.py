@@ -0,0 +1,139 @@
+# accounts/hashing.py
+"""
+Password verification on a small bounded thread pool.
+
+PBKDF2 runs in OpenSSL with the GIL released, so LOGIN_HASH_WORKERS threads
+cap how many cores login traffic can occupy in a worker process, whatever the
+request concurrency; once LOGIN_HASH_MAX_PENDING checks are queued, further
+logins are refused (HashingBusy) instead of piling up behind them. Both
+bounds are per worker process by design (they protect that process's
+CPU); a server with N workers runs up to N x LOGIN_HASH_WORKERS hashes.
+With LOGIN_HASH_WORKERS = 0 hashes run inline on the request thread.
+
+Only the pure hash comparison runs in the pool; rehashing a password to a
+newer hasher (a DB write) stays on the request thread.
+
+Bulk imports hash new passwords on a process pool instead (hash_in_processes):
+manage.py import_users starts one for its run, the web endpoint shares one
+per worker process (web_pool).
+"""
+
+import os
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, get_hasher, identify_hasher, make_password
+
+_executor = None
+_executor_lock = threading.Lock()
+_pending = 0
+_dummy_hash = None
+_web_pool = None
+
+
+class HashingBusy(Exception):
+    pass
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, "LOGIN_HASH_WORKERS", 2),
+                    thread_name_prefix="login-hash",
+                )
+    return _executor
+
+
+def _dummy():
+    # Unknown accounts are hashed against this so they cost (and take) the
+    # same as a wrong password for a real one
+    global _dummy_hash
+    if _dummy_hash is None:
+        _dummy_hash = make_password("dummy-password-for-timing")
+    return _dummy_hash
+
+
+def _run(fn):
+    global _pending
+    if not getattr(settings, "LOGIN_HASH_WORKERS", 2):
+        return fn()
+    with _executor_lock:
+        if _pending >= getattr(settings, "LOGIN_HASH_MAX_PENDING", 16):
+            raise HashingBusy()
+        _pending += 1
+    try:
+        return _get_executor().submit(fn).result()
+    finally:
+        with _executor_lock:
+            _pending -= 1
+
+
+def verify(user, password):
+    """
+    True if ``password`` is ``user``'s (None: an unknown account; one dummy
+    hash is still computed). Exactly one hash either way.
+    """
+    if user is None:
+        _run(lambda: check_password(password, _dummy()))
+        return False
+    encoded = user.password
+    if not _run(lambda: check_password(password, encoded)):
+        return False
+    preferred = get_hasher("default")
+    if identify_hasher(encoded).algorithm != preferred.algorithm or preferred.must_update(encoded):
+        user.set_password(password)
+        user.save(update_fields=["password"])
+    return True
+
+
+# ===============================
+# BULK HASHING (process pool)
+# ===============================
+def hash_many(passwords):
+    """
+    make_password() over a list; runs in spawned worker processes for bulk
+    imports (needs only DJANGO_SETTINGS_MODULE, no app registry).
+    """
+    return [make_password(p) for p in passwords]
+
+
+def web_pool():
+    """
+    BULK_IMPORT_WEB_WORKERS spawned processes, created on first use and kept
+    for the life of the worker process, so requests do not pay a pool start.
+    """
+    global _web_pool
+    if _web_pool is None:
+        with _executor_lock:
+            if _web_pool is None:
+                _web_pool = ProcessPoolExecutor(
+                    max_workers=getattr(settings, "BULK_IMPORT_WEB_WORKERS", 2),
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+    return _web_pool
+
+
+def hash_in_processes(passwords, workers=None, chunk_size=64, pool=None):
+    """
+    Hashes for ``passwords`` (same order), computed on ``pool`` or else on a
+    pool of ``workers`` processes started for this call (default:
+    BULK_IMPORT_HASH_WORKERS, else one per CPU).
+    """
+    if not passwords:
+        return []
+    chunks = [passwords[i:i + chunk_size] for i in range(0, len(passwords), chunk_size)]
+    if len(chunks) == 1:
+        return hash_many(passwords)
+    if pool is not None:
+        return [h for hashed in pool.map(hash_many, chunks) for h in hashed]
+    workers = workers or getattr(settings, "BULK_IMPORT_HASH_WORKERS", None) or os.cpu_count() or 1
+    if workers == 1:
+        return hash_many(passwords)
+    with ProcessPoolExecutor(max_workers=min(workers, len(chunks)),
+                             mp_context=multiprocessing.get_context("spawn")) as own_pool:
+        return [h for hashed in own_pool.map(hash_many, chunks) for h in hashed]
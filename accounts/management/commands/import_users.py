@@ -0,0 +1,41 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts import bulk_import
+
+
+class Command(BaseCommand):
+    help = "Create users in bulk from a CSV file (columns: email, username, phone, full_name, password)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("csv_path")
+        parser.add_argument("--workers", type=int, default=None, help="Password hashing processes (default: CPUs)")
+        parser.add_argument("--chunk-size", type=int, default=bulk_import.CHUNK_SIZE, help="Rows per bulk insert")
+        parser.add_argument("--errors-out", default=None, help="Write rejected rows (row, email, field, message) here")
+
+    def handle(self, *args, **options):
+        try:
+            with open(options["csv_path"], newline="", encoding="utf-8-sig") as f:
+                rows = bulk_import.read_csv(f)
+        except OSError as e:
+            raise CommandError(str(e))
+
+        report = bulk_import.import_users(rows, workers=options["workers"], chunk_size=options["chunk_size"],
+                                          progress=self.stdout.write)
+
+        for entry in report["errors"][:20]:
+            self.stderr.write(f"⚠️ row {entry['row']} ({entry['email'] or '-'}): {entry['errors']}")
+        if len(report["errors"]) > 20:
+            self.stderr.write(f"⚠️ ... {len(report['errors']) - 20} more rejected rows")
+        if options["errors_out"]:
+            with open(options["errors_out"], "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["row", "email", "field", "message"])
+                for entry in report["errors"]:
+                    for field, messages in entry["errors"].items():
+                        for message in messages:
+                            writer.writerow([entry["row"], entry["email"], field, message])
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Created {report['created']} of {report['rows']} users ({len(report['errors'])} rejected)"
+        ))
@@ -1,7 +1,17 @@
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin, BaseUserManager
 from django.db import models
+from django.db.models.functions import Lower
 
 class UserManager(BaseUserManager):
+    @classmethod
+    def normalize_email(cls, email):
+        # The whole address lowercased (Django's only lowercases the domain):
+        # every write stores this form, so lookups match it exactly
+        return (email or "").strip().lower()
+
+    def get_by_natural_key(self, email):
+        return self.get(email=self.normalize_email(email))
+
     def create_user(self, email, username, phone, password=None):
         if not email:
             raise ValueError("Users must have an email address")
@@ -38,5 +48,15 @@ class User(AbstractBaseUser, PermissionsMixin):
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = ["username", "phone"]
 
+    class Meta:
+        constraints = [
+            # Backstop for writes that skip normalization (bulk updates, raw SQL)
+            models.UniqueConstraint(Lower("email"), name="accounts_user_email_lower_uniq"),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.email = UserManager.normalize_email(self.email)
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return self.email
@@ -6,8 +6,15 @@ from rest_framework.validators import UniqueValidator
 
 User = get_user_model()
 
+class NormalizedEmailField(serializers.EmailField):
+    # Normalized before validators run, so the uniqueness check compares the
+    # stored form (same rule as UserManager and bulk imports)
+    def to_internal_value(self, data):
+        return User.objects.normalize_email(super().to_internal_value(data))
+
+
 class RegisterSerializer(serializers.ModelSerializer):
-    email = serializers.EmailField(
+    email = NormalizedEmailField(
         required=True,
         validators=[UniqueValidator(queryset=User.objects.all())]
     )
@@ -36,18 +43,13 @@ class RegisterSerializer(serializers.ModelSerializer):
         full_name = validated_data.pop('full_name', '')
         phone = validated_data.pop('phone', '')
 
-        # Create user instance
-        user = User.objects.create(
+        # Build the instance fully, then write it once
+        user = User(
             username=validated_data.get('username'),
             email=validated_data.get('email'),
+            full_name=full_name,
+            phone=phone,
         )
-
-        # Add optional fields if exist in model
-        if hasattr(user, 'full_name'):
-            user.full_name = full_name
-        if hasattr(user, 'phone'):
-            user.phone = phone
-
         user.set_password(password)
         user.save()
         return user
@@ -1,3 +1,286 @@
-from django.test import TestCase
+import os
+import runpy
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password
+from django.core.cache import cache
+from django.db import IntegrityError, connection, transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import AccessToken
+
+from . import bulk_import, hashing
+from .authentication import USER_CACHE_PREFIX, CachedJWTAuthentication
+from .checks import auth_cache_is_shared
+from .models import User
+from .throttling import LoginAccountThrottle
+
+PASSWORD = "Correct-Horse-42"
+
+
+class LoginTests(TestCase):
+    def setUp(self):
+        cache.clear()   # login throttles count in the cache
+        self.client = APIClient()
+        self.user = User(email="alice@Gmail.com", username="alice", phone="100")
+        self.user.set_password(PASSWORD)
+        self.user.save()
+
+    def login(self, email, password=PASSWORD):
+        return self.client.post("/api/auth/login/", {"email": email, "password": password}, format="json")
+
+    def test_valid_credentials_return_tokens(self):
+        response = self.login("alice@Gmail.com")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("access", response.data)
+        self.assertEqual(response.data["user"]["id"], self.user.id)
+
+    def test_wrong_password(self):
+        response = self.login("alice@Gmail.com", "not-the-password")
+        self.assertEqual(response.status_code, 400)
+        self.assertNotIn("access", response.data)
+
+    def test_unknown_account(self):
+        response = self.login("nobody@example.com")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {"error": "Invalid credentials"})
+
+    def test_inactive_account(self):
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.login("alice@Gmail.com").status_code, 400)
+
+    def test_email_casing_is_ignored(self):
+        self.assertEqual(User.objects.get(pk=self.user.pk).email, "alice@gmail.com")   # stored normalized
+        for email in ("alice@gmail.com", "ALICE@GMAIL.COM", " alice@gmail.com "):
+            cache.clear()
+            with self.subTest(email=email):
+                self.assertEqual(self.login(email).status_code, 200)
+
+    def test_lookup_is_an_exact_match(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.login("Alice@GMAIL.com").status_code, 200)
+        lookups = [q["sql"] for q in queries if '"email"' in q["sql"]]
+        self.assertEqual(len(lookups), 1)
+        self.assertNotIn("LIKE", lookups[0].upper())   # no iexact scan, the unique index serves it
+        self.assertEqual(User.objects.get_by_natural_key("ALICE@gmail.com"), self.user)
+
+    def test_missing_fields(self):
+        response = self.client.post("/api/auth/login/", {"email": "alice@Gmail.com"}, format="json")
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post("/api/auth/login/", {"email": ["alice@Gmail.com"], "password": PASSWORD},
+                                    format="json")
+        self.assertEqual(response.status_code, 400)
+
+    def test_attempts_per_account_are_throttled_across_ips(self):
+        rates = {**LoginAccountThrottle.THROTTLE_RATES, "login_account": "2/min"}
+        with mock.patch.object(LoginAccountThrottle, "THROTTLE_RATES", rates):
+            for ip in ("10.0.0.1", "10.0.0.2"):
+                self.client.post("/api/auth/login/", {"email": "alice@Gmail.com", "password": "x"},
+                                 format="json", REMOTE_ADDR=ip)
+            response = self.client.post("/api/auth/login/", {"email": "alice@Gmail.com", "password": PASSWORD},
+                                        format="json", REMOTE_ADDR="10.0.0.3")
+        self.assertEqual(response.status_code, 429)
+
+
+class BulkImportTests(TestCase):
+    def setUp(self):
+        User.objects.create(email="Bob@Example.com", username="bob", phone="200")
+
+    def row(self, n, **overrides):
+        return {"email": f"user{n}@example.com", "username": f"user{n}", "phone": f"30{n}",
+                "full_name": f"User {n}", "password": "", **overrides}
+
+    def test_valid_rows_are_created(self):
+        result = bulk_import.import_users([self.row(1), self.row(2, password=PASSWORD)], workers=1)
+        self.assertEqual(result["created"], 2)
+        self.assertEqual(result["errors"], [])
+        self.assertFalse(User.objects.get(username="user1").has_usable_password())
+        self.assertTrue(User.objects.get(username="user2").check_password(PASSWORD))
+
+    def test_invalid_rows_are_reported_per_row(self):
+        rows = [self.row(1), self.row(2, email="not-an-email"), self.row(3, phone=""),
+                self.row(4, username="bob"), self.row(5)]
+        result = bulk_import.import_users(rows, workers=1)
+        self.assertEqual(result["created"], 2)
+        self.assertEqual([e["row"] for e in result["errors"]], [2, 3, 4])
+        self.assertIn("email", result["errors"][0]["errors"])
+        self.assertIn("phone", result["errors"][1]["errors"])
+        self.assertIn("username", result["errors"][2]["errors"])
+
+    def test_duplicates_within_the_batch(self):
+        rows = [self.row(1), self.row(2, email="USER1@example.com"), self.row(3, phone="301")]
+        result = bulk_import.import_users(rows, workers=1)
+        self.assertEqual(result["created"], 1)
+        self.assertEqual([e["row"] for e in result["errors"]], [2, 3])
+
+    def test_existing_email_in_another_case(self):
+        result = bulk_import.import_users([self.row(1, email="bob@example.com")], workers=1)
+        self.assertEqual(result["created"], 0)
+        self.assertIn("email", result["errors"][0]["errors"])
+
+    def test_case_variants_are_rejected_by_the_database(self):
+        User.objects.create(email="carol@example.com", username="carol", phone="201")
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            User.objects.filter(username="carol").update(email="Bob@example.com")   # skips save()
+
+    def test_csv_reader(self):
+        rows = bulk_import.read_csv("Email,username,phone\n a@x.com ,a,1,surplus\n")
+        self.assertEqual(rows, [{"email": "a@x.com", "username": "a", "phone": "1"}])
+
+    @override_settings(BULK_IMPORT_MAX_ROWS=2)
+    def test_endpoint_is_staff_only_and_capped(self):
+        client = APIClient()
+        patient = User.objects.create(email="p@example.com", username="p", phone="400")
+        client.force_authenticate(patient)
+        response = client.post("/api/auth/users/bulk-import/", {"users": [self.row(1)]}, format="json")
+        self.assertEqual(response.status_code, 403)
+
+        admin = User.objects.create(email="admin@example.com", username="admin", phone="401", is_staff=True)
+        client.force_authenticate(admin)
+        response = client.post("/api/auth/users/bulk-import/", {"users": [self.row(n) for n in range(3)]},
+                               format="json")
+        self.assertEqual(response.status_code, 400)
+        response = client.post("/api/auth/users/bulk-import/", {"users": [self.row(1)]}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["created"], 1)
+
+
+class BulkHashingPoolTests(SimpleTestCase):
+    def setUp(self):
+        patcher = mock.patch.object(hashing, "_web_pool", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_web_imports_share_one_pool(self):
+        started = []
+
+        def thread_pool(max_workers, mp_context):
+            started.append(max_workers)
+            pool = ThreadPoolExecutor(max_workers)
+            self.addCleanup(pool.shutdown)
+            return pool
+
+        with mock.patch.object(hashing, "ProcessPoolExecutor", thread_pool), \
+                override_settings(BULK_IMPORT_WEB_WORKERS=3):
+            for _ in range(2):
+                hashed = hashing.hash_in_processes(["a", "b", "c"], chunk_size=1, pool=hashing.web_pool())
+                self.assertEqual(len(hashed), 3)
+                self.assertTrue(check_password("b", hashed[1]))
+        self.assertEqual(started, [3])
+
+
+class RegisterTests(TestCase):
+    def test_email_is_normalized_and_unique_across_case(self):
+        client = APIClient()
+        data = {"username": "carol", "email": "carol@Example.com", "phone": "500",
+                "password": PASSWORD, "password2": PASSWORD}
+        response = client.post("/api/auth/register/", data, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(User.objects.get(username="carol").email, "carol@example.com")
+
+        data.update(username="carol2", phone="501", email="carol@EXAMPLE.com")
+        response = client.post("/api/auth/register/", data, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("email", response.data)
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(email="dave@example.com", username="dave", phone="600", full_name="Dave")
+        self.user.set_password(PASSWORD)
+        self.user.save()
+
+    def get_user(self, token=None):
+        return CachedJWTAuthentication().get_user(token or AccessToken.for_user(self.user))
+
+    def test_cached_user_needs_no_query(self):
+        self.get_user()
+        with self.assertNumQueries(0):
+            user = self.get_user()
+        self.assertEqual((user.pk, user.email, user.full_name, user.is_staff),
+                         (self.user.pk, "dave@example.com", "Dave", False))
+
+    def test_cache_holds_a_narrow_record(self):
+        self.get_user()
+        record = cache.get(f"{USER_CACHE_PREFIX}{self.user.pk}")
+        self.assertIsInstance(record, dict)
+        self.assertNotIn("password", record)
+        self.assertEqual(record["email"], "dave@example.com")
+        user = self.get_user()
+        with self.assertNumQueries(1):   # fields outside the record load lazily
+            self.assertIsNone(user.last_login)
+
+    def test_save_invalidates_the_cached_record(self):
+        self.get_user()
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.get_user()
+
+    def test_deleted_user_is_rejected(self):
+        token = AccessToken.for_user(self.user)
+        self.get_user(token)
+        self.user.delete()
+        with self.assertRaises(AuthenticationFailed):
+            self.get_user(token)
+
+
+class DatabaseSettingsTests(SimpleTestCase):
+    def database(self, **env):
+        with mock.patch.dict(os.environ, env):
+            return runpy.run_path(os.path.join(settings.BASE_DIR, "parkinson_site", "settings.py"))["DATABASES"]["default"]
+
+    def test_persistent_connections_by_default(self):
+        database = self.database(DB_POOL_SIZE="0", DB_CONN_MAX_AGE="30")
+        self.assertEqual(database["CONN_MAX_AGE"], 30)
+        self.assertTrue(database["CONN_HEALTH_CHECKS"])
+        self.assertNotIn("pool", database["OPTIONS"])
+
+    def test_pool_requires_non_persistent_connections(self):
+        database = self.database(DB_POOL_SIZE="8", DB_CONN_MAX_AGE="30")
+        self.assertEqual(database["CONN_MAX_AGE"], 0)
+        self.assertEqual((database["OPTIONS"]["pool"]["min_size"], database["OPTIONS"]["pool"]["max_size"]), (2, 8))
+
+
+class CacheSettingsTests(SimpleTestCase):
+    def cache_backend(self, **env):
+        with mock.patch.dict(os.environ, env):
+            settings_path = os.path.join(settings.BASE_DIR, "parkinson_site", "settings.py")
+            return runpy.run_path(settings_path)["CACHES"]["default"]
+
+    def test_redis_when_configured(self):
+        backend = self.cache_backend(CACHE_REDIS_URL="redis://cache:6379/1")
+        self.assertEqual(backend["BACKEND"], "django.core.cache.backends.redis.RedisCache")
+        self.assertEqual(backend["LOCATION"], "redis://cache:6379/1")
+
+    def test_per_worker_locmem_fallback(self):
+        with mock.patch.dict(os.environ):
+            os.environ.pop("CACHE_REDIS_URL", None)
+            backend = self.cache_backend()
+        self.assertEqual(backend["BACKEND"], "django.core.cache.backends.locmem.LocMemCache")
+
+
+class AuthCacheCheckTests(SimpleTestCase):
+    @override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+                       AUTH_USER_CACHE_TTL=10, DEBUG=False)
+    def test_warns_on_a_per_process_cache(self):
+        self.assertEqual([w.id for w in auth_cache_is_shared(None)], ["accounts.W001"])
+        with override_settings(AUTH_USER_CACHE_TTL=0):
+            self.assertEqual(auth_cache_is_shared(None), [])
+
+    @override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+                       AUTH_USER_CACHE_TTL=10, DEBUG=True)
+    def test_silent_in_development(self):
+        self.assertEqual(auth_cache_is_shared(None), [])
+
+    @override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.redis.RedisCache",
+                                           "LOCATION": "redis://cache:6379/1"}})
+    def test_silent_on_a_shared_cache(self):
+        self.assertEqual(auth_cache_is_shared(None), [])
 
-# Create your tests here.
@@ -0,0 +1,36 @@
+# accounts/throttling.py
+"""
+Login throttles. Attempts are counted in the default cache, so the limits
+hold across workers only when it is shared (CACHE_REDIS_URL); with the
+LocMem fallback each worker process counts separately, and the effective
+limit is workers x the configured rate.
+"""
+
+import hashlib
+
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class LoginIPThrottle(SimpleRateThrottle):
+    """
+    Login attempts per client IP, whether or not the request carries a token.
+    """
+    scope = "login_ip"
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {"scope": self.scope, "ident": self.get_ident(request)}
+
+
+class LoginAccountThrottle(SimpleRateThrottle):
+    """
+    Login attempts per target account, from any number of IPs (credential
+    stuffing). Keyed by a hash so addresses never appear in cache keys.
+    """
+    scope = "login_account"
+
+    def get_cache_key(self, request, view):
+        email = request.data.get("email") if hasattr(request.data, "get") else None
+        if not email or not isinstance(email, str):
+            return None
+        ident = hashlib.sha256(email.strip().lower().encode()).hexdigest()
+        return self.cache_format % {"scope": self.scope, "ident": ident}
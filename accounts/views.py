@@ -1,10 +1,14 @@
 # accounts/views.py
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
+from rest_framework.parsers import JSONParser, MultiPartParser
 from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import RefreshToken
-from django.contrib.auth import authenticate, get_user_model
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from . import bulk_import, hashing
 from .serializers import RegisterSerializer, UserSerializer
+from .throttling import LoginAccountThrottle, LoginIPThrottle
 
 User = get_user_model()
 
@@ -33,24 +37,26 @@ class RegisterView(generics.CreateAPIView):
 # ---------------------------- 
 class LoginView(APIView):
     permission_classes = [permissions.AllowAny]
+    # Per-IP and per-account attempt limits (REST_FRAMEWORK throttle rates)
+    throttle_classes = [LoginIPThrottle, LoginAccountThrottle]
 
     def post(self, request):
         email = request.data.get("email")
         password = request.data.get("password")
 
-        if not email or not password:
+        if not email or not password or not isinstance(email, str) or not isinstance(password, str):
             return Response({"error": "Email and password are required."}, status=400)
 
-        user = authenticate(request, email=email, password=password)
-
-        if user is None:
-            try:
-                user_obj = User.objects.get(email=email)
-                if not user_obj.check_password(password):
-                    return Response({"error": "Invalid credentials"}, status=400)
-                user = user_obj
-            except User.DoesNotExist:
-                return Response({"error": "Invalid credentials"}, status=400)
+        # One indexed query and exactly one password hash, found or not.
+        # Emails are stored lowercased, so the typed one is normalized the same way
+        user = User.objects.filter(email=User.objects.normalize_email(email)).first()
+        try:
+            valid = hashing.verify(user, password)
+        except hashing.HashingBusy:
+            return Response({"error": "Too many login attempts in progress; retry shortly."},
+                            status=status.HTTP_503_SERVICE_UNAVAILABLE, headers={"Retry-After": "1"})
+        if not valid or not user.is_active:
+            return Response({"error": "Invalid credentials"}, status=400)
 
         refresh = RefreshToken.for_user(user)
         return Response({
@@ -70,3 +76,37 @@ class ProfileView(generics.RetrieveAPIView):
 
     def get_object(self):
         return self.request.user
+
+
+# ----------------------------
+# Bulk Import View (admin onboarding of many patients at once)
+# ----------------------------
+class BulkImportView(APIView):
+    """
+    CSV upload ("file") or JSON {"users": [{...}, ...]}; invalid rows are
+    reported per row and do not stop the rest of the batch. Passwords are
+    hashed inside the request, so batches are capped at BULK_IMPORT_MAX_ROWS,
+    on the worker's shared pool of BULK_IMPORT_WEB_WORKERS processes
+    (hashing.web_pool); larger imports go through
+    ``manage.py import_users``.
+    """
+    permission_classes = [permissions.IsAdminUser]
+    parser_classes = (MultiPartParser, JSONParser)
+
+    def post(self, request):
+        upload = request.FILES.get("file")
+        if upload is not None:
+            try:
+                rows = bulk_import.read_csv(upload.read().decode("utf-8-sig"))
+            except UnicodeDecodeError:
+                return Response({"error": "CSV must be UTF-8"}, status=400)
+        else:
+            rows = request.data.get("users")
+            if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+                return Response({"error": "Send a CSV as 'file' or a JSON list as 'users'."}, status=400)
+
+        max_rows = getattr(settings, "BULK_IMPORT_MAX_ROWS", 200)
+        if len(rows) > max_rows:
+            return Response({"error": f"At most {max_rows} rows per request; use manage.py import_users"},
+                            status=400)
+        return Response(bulk_import.import_users(rows, pool=hashing.web_pool()), status=status.HTTP_200_OK)
@@ -0,0 +1,126 @@
+"""
+bench_db_connections.py
+-----------------------
+Per-request database cost with a new connection per request (Django's
+default, CONN_MAX_AGE=0) vs persistent health-checked connections vs a
+psycopg pool. Each simulated request runs Django's request_started and
+request_finished hooks (which decide whether to close the connection)
+around one small query, on --threads concurrent threads.
+
+SQLite stand-in (no server needed; connection setup is far cheaper than
+PostgreSQL's TCP + auth handshake, so this understates the gain):
+    python benchmarks/bench_db_connections.py --requests 2000 --threads 4
+
+Local PostgreSQL, using the same DB_* environment variables as settings.py
+(the pooled mode needs `pip install "psycopg[pool]"`):
+    python benchmarks/bench_db_connections.py --postgres --pool-size 4
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import django  # noqa: E402
+from django.conf import settings  # noqa: E402
+
+
+def database_settings(postgres, pool_size, sqlite_path):
+    if postgres:
+        base = {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": os.environ.get("DB_NAME", "parkinson_db"),
+            "USER": os.environ.get("DB_USER", "parkinson_user"),
+            "PASSWORD": os.environ.get("DB_PASSWORD", "yourpassword"),
+            "HOST": os.environ.get("DB_HOST", "localhost"),
+            "PORT": os.environ.get("DB_PORT", "5432"),
+        }
+    else:
+        base = {"ENGINE": "django.db.backends.sqlite3", "NAME": sqlite_path}
+    modes = {
+        "per_request": {**base, "CONN_MAX_AGE": 0},
+        "persistent": {**base, "CONN_MAX_AGE": 600, "CONN_HEALTH_CHECKS": True},
+    }
+    if postgres and pool_size:
+        modes["pooled"] = {**base, "CONN_MAX_AGE": 0,
+                           "OPTIONS": {"pool": {"min_size": pool_size, "max_size": pool_size}}}
+    return {"default": modes["per_request"], **modes}
+
+
+def run(alias, requests, threads):
+    from django.core.signals import request_finished, request_started
+    from django.db import connections
+
+    latencies = []
+    lock = threading.Lock()
+    per_thread = requests // threads
+
+    def worker():
+        local = []
+        for _ in range(per_thread):
+            t0 = time.perf_counter()
+            request_started.send(sender=None)
+            with connections[alias].cursor() as cursor:
+                cursor.execute("SELECT 1")
+                cursor.fetchone()
+            request_finished.send(sender=None)
+            local.append(time.perf_counter() - t0)
+        connections.close_all()
+        with lock:
+            latencies.extend(local)
+
+    worker()   # warm-up (imports, pool fill)
+    latencies.clear()
+    t0 = time.perf_counter()
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    wall = time.perf_counter() - t0
+    ms = np.asarray(latencies) * 1000.0
+    return {
+        "requests": int(ms.size),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+        "requests_per_sec": round(ms.size / wall, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--postgres", action="store_true", help="Use PostgreSQL from the DB_* env vars")
+    parser.add_argument("--pool-size", type=int, default=4, help="Pool size for the pooled mode (PostgreSQL)")
+    args = parser.parse_args()
+
+    sqlite_path = os.path.join(tempfile.mkdtemp(), "bench.sqlite3")
+    settings.configure(
+        DATABASES=database_settings(args.postgres, args.pool_size, sqlite_path),
+        INSTALLED_APPS=[],
+        USE_TZ=True,
+    )
+    django.setup()
+
+    results = {"backend": "postgresql" if args.postgres else "sqlite", "threads": args.threads}
+    for alias in settings.DATABASES:
+        if alias != "default":
+            results[alias] = run(alias, args.requests, args.threads)
+    base = results["per_request"]["p50_ms"]
+    for alias in ("persistent", "pooled"):
+        if alias in results:
+            results[alias]["p50_speedup"] = round(base / max(results[alias]["p50_ms"], 1e-6), 2)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""
+bench_inference.py
+------------------
+Latency/throughput of the prediction pipeline, per stage and end to end,
+on synthetic inputs (a vibrato tone like test_tone.wav and a noise slice
+like generate_image_dataset.py). Reports p50/p95/p99 and throughput as JSON
+so runs can be diffed for regressions.
+
+Stages: decode, praat, scaler, audio_model, image_preprocess, cnn_forward,
+fusion, spectrogram, pdf. "end_to_end" is the /predict/ work for an
+audio+image upload with a report: _run_inference + spectrogram + PDF.
+
+    python benchmarks/bench_inference.py --iterations 50 --concurrency 1 2 4 8 --out bench_inference.json
+
+Missing model files (e.g. image_model.h5) are replaced by untrained models
+of the training scripts' architecture and flagged "stand_in" in the output.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "parkinson_site.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from predictor import features, report_engine, utils  # noqa: E402
+from predictor.views import _run_inference  # noqa: E402
+
+PREDICTION = {"final_label": 1, "final_confidence": 0.8731}
+USER_INFO = {"name": "Bench Patient", "email": "bench@example.com", "phone": "9000000000", "test_date": "2025-01-01 09:00:00"}
+
+
+# ===============================
+# SYNTHETIC INPUTS
+# ===============================
+def synthetic_wav(path, seconds=3.0, sr=22050, seed=0):
+    import soundfile as sf
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * sr)) / sr
+    f0 = 140 + 6 * np.sin(2 * np.pi * 5 * t)             # voiced tone with vibrato
+    y = 0.4 * np.sin(2 * np.pi * np.cumsum(f0) / sr) + 0.01 * rng.standard_normal(t.size)
+    sf.write(path, y.astype(np.float32), sr)
+    return path
+
+
+def synthetic_png(path, size=512, seed=0):
+    rng = np.random.default_rng(seed)
+    Image.fromarray(rng.integers(0, 255, (size, size), dtype=np.uint8)).save(path)
+    return path
+
+
+def ensure_models():
+    """
+    Load real artifacts; build untrained stand-ins where they are missing.
+    """
+    stand_ins = []
+    if utils.load_image_model() is None:
+        from tensorflow.keras.layers import BatchNormalization, Conv2D, Dense, Dropout, Flatten, MaxPooling2D
+        from tensorflow.keras.models import Sequential
+        utils.current_models().put("image_model", Sequential([
+            Conv2D(32, (3, 3), activation="relu", input_shape=(224, 224, 3)), BatchNormalization(), MaxPooling2D(2, 2),
+            Conv2D(64, (3, 3), activation="relu"), BatchNormalization(), MaxPooling2D(2, 2),
+            Conv2D(128, (3, 3), activation="relu"), BatchNormalization(), MaxPooling2D(2, 2),
+            Flatten(), Dense(256, activation="relu"), Dropout(0.5), Dense(1, activation="sigmoid"),
+        ]))
+        stand_ins.append("image_model.h5")
+    if utils.load_audio_model() is None or utils.load_scaler() is None:
+        raise SystemExit("parkinsons_model.pkl and scaler.pkl are required")
+    return stand_ins
+
+
+# ===============================
+# MEASUREMENT
+# ===============================
+def summarize(latencies, wall):
+    ms = np.asarray(latencies) * 1000.0
+    return {
+        "n": int(ms.size),
+        "mean_ms": round(float(ms.mean()), 3),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+        "throughput_per_s": round(ms.size / wall, 2),
+    }
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    fn()
+    return time.perf_counter() - t0
+
+
+def run_single(fn, iterations, warmup):
+    for _ in range(warmup):
+        fn()
+    t0 = time.perf_counter()
+    latencies = [timed(fn) for _ in range(iterations)]
+    return summarize(latencies, time.perf_counter() - t0)
+
+
+def run_concurrent(fn, requests, workers):
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(lambda _: fn(), range(workers)))   # warm every thread
+        t0 = time.perf_counter()
+        latencies = list(pool.map(lambda _: timed(fn), range(requests)))
+        return summarize(latencies, time.perf_counter() - t0)
+
+
+# ===============================
+# STAGES
+# ===============================
+def build_stages(wav_path, png_path):
+    import librosa
+    import parselmouth
+
+    y, sr = librosa.load(wav_path, sr=22050, mono=True)
+    raw = features.extract_raw_audio_features(wav_path)
+    scaled = utils.scale_audio_features(raw)
+    audio_model = utils.load_audio_model()
+    image_model = utils.load_image_model()
+    image_batch = features.load_image_array(png_path).astype(np.float32)[None]
+    spectrogram = utils.audio_spectrogram_bytes(wav_path)
+
+    def praat():
+        sound = parselmouth.Sound(y, sampling_frequency=sr)
+        features.compute_pitch_stats(sound)
+        features.extract_parselmouth_measures(sound)
+
+    def image_preprocess():
+        with Image.open(png_path) as img:
+            features.image_to_array(img)
+
+    stages = {
+        "decode": lambda: librosa.load(wav_path, sr=22050, mono=True),
+        "praat": praat,
+        "scaler": lambda: utils.scale_audio_features(raw),
+        "audio_model": lambda: audio_model.predict_proba(scaled),
+        "image_preprocess": image_preprocess,
+        "cnn_forward": lambda: image_model.predict(image_batch, verbose=0),
+        "fusion": lambda: utils.predict_fused(wav_path, png_path),
+        "spectrogram": lambda: utils.audio_spectrogram_bytes(wav_path),
+        "pdf": lambda: report_engine.render_report(PREDICTION, spectrogram, None, USER_INFO),
+    }
+
+    def end_to_end():
+        result = _run_inference(True, True, wav_path, png_path)
+        report_engine.render_report(result, utils.audio_spectrogram_bytes(wav_path), None, USER_INFO)
+
+    return stages, end_to_end
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=30, help="Timed calls per stage")
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--requests", type=int, default=40, help="End-to-end requests per concurrency level")
+    parser.add_argument("--stages", nargs="+", default=None, help="Subset of stages to run")
+    parser.add_argument("--out", default=None, help="Also write the JSON here")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_inference_")
+    wav_path = synthetic_wav(os.path.join(workdir, "tone.wav"))
+    png_path = synthetic_png(os.path.join(workdir, "slice.png"))
+    stand_ins = ensure_models()
+    stages, end_to_end = build_stages(wav_path, png_path)
+
+    results = {
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "stand_in": stand_ins,
+        "single": {},
+        "concurrent": {},
+    }
+    for name, fn in stages.items():
+        if args.stages and name not in args.stages:
+            continue
+        results["single"][name] = run_single(fn, args.iterations, args.warmup)
+    results["single"]["end_to_end"] = run_single(end_to_end, args.iterations, args.warmup)
+    for workers in args.concurrency:
+        results["concurrent"][str(workers)] = run_concurrent(end_to_end, args.requests, workers)
+
+    out = json.dumps(results, indent=2)
+    print(out)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(out + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+bench_prediction_history.py
+---------------------------
+Seeds ParkinsonPrediction with millions of rows and compares
+offset vs keyset history pages and Python-side vs database-side vs
+materialized daily statistics.
+
+Run from the repo root against a scratch database:
+    python benchmarks/bench_prediction_history.py --rows 3000000 --users 5000
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "parkinson_site.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.db import transaction  # noqa: E402
+from django.db.models import Count, Max  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from predictor import stats  # noqa: E402
+from predictor.models import ParkinsonPrediction, DailyPredictionRollup  # noqa: E402
+
+User = get_user_model()
+TYPES = ("audio", "image", "fused")
+
+
+def seed(rows, users, days, chunk=50_000):
+    rng = random.Random(42)
+    existing = User.objects.filter(username__startswith="bench_user_").count()
+    User.objects.bulk_create(
+        [
+            User(username=f"bench_user_{i}", email=f"bench_user_{i}@example.com", phone=f"9{i:09d}")
+            for i in range(existing, users)
+        ],
+        batch_size=5_000,
+    )
+    user_ids = list(User.objects.filter(username__startswith="bench_user_").values_list("id", flat=True))
+
+    per_day = max(rows // days, 1)
+    start_day = timezone.now() - timedelta(days=days)
+    created = 0
+    t0 = time.perf_counter()
+    while created < rows:
+        day = start_day + timedelta(days=created // per_day)
+        n = min(chunk, rows - created, per_day - created % per_day)
+        with transaction.atomic():
+            last_id = ParkinsonPrediction.objects.aggregate(m=Max("id"))["m"] or 0
+            ParkinsonPrediction.objects.bulk_create(
+                [
+                    ParkinsonPrediction(
+                        user_id=rng.choice(user_ids),
+                        prediction_type=rng.choice(TYPES),
+                        result=stats.POSITIVE if rng.random() < 0.3 else stats.NEGATIVE,
+                        probability=rng.random(),
+                    )
+                    for _ in range(n)
+                ],
+                batch_size=10_000,
+            )
+            # auto_now_add ignores explicit values on insert, so backdate afterwards
+            ParkinsonPrediction.objects.filter(id__gt=last_id).update(uploaded_at=day)
+        created += n
+    return time.perf_counter() - t0
+
+
+def timed(fn, repeat=5):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return min(samples) * 1000.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=3_000_000)
+    parser.add_argument("--users", type=int, default=5_000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--page", type=int, default=500, help="Page depth used for offset vs keyset")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--skip-seed", action="store_true")
+    args = parser.parse_args()
+
+    results = {"rows": args.rows}
+    if not args.skip_seed:
+        results["seed_seconds"] = round(seed(args.rows, args.users, args.days), 2)
+
+    # Busiest user gives the deepest history
+    user_id = (
+        ParkinsonPrediction.objects.values("user_id").order_by().annotate(n=Count("id")).order_by("-n")
+        .values_list("user_id", flat=True).first()
+    )
+    base = (
+        ParkinsonPrediction.objects.filter(user_id=user_id)
+        .select_related("user")
+        .only("id", "uploaded_at", "prediction_type", "result", "probability", "user__email")
+    )
+    offset = args.page * args.limit
+    deep_rows = list(base.order_by("-id").values_list("id", flat=True)[offset - 1: offset])
+    cursor = stats.encode_cursor(deep_rows[0]) if deep_rows else None
+
+    results["history_offset_ms"] = timed(lambda: list(base.order_by("-id")[offset: offset + args.limit]))
+    results["history_keyset_ms"] = timed(lambda: stats.history_page(base, cursor, args.limit))
+
+    start_day = timezone.localdate() - timedelta(days=30)
+
+    def python_side():
+        per_day = {}
+        window = ParkinsonPrediction.objects.filter(uploaded_at__date__gte=start_day)
+        for uploaded_at, result in window.values_list("uploaded_at", "result").iterator(chunk_size=20_000):
+            total, pos = per_day.get(uploaded_at.date(), (0, 0))
+            per_day[uploaded_at.date()] = (total + 1, pos + (result == stats.POSITIVE))
+        return per_day
+
+    results["stats_python_ms"] = timed(python_side, repeat=1)
+    results["stats_db_aggregate_ms"] = timed(lambda: list(stats.aggregate_days(start_day)), repeat=3)
+
+    DailyPredictionRollup.objects.all().delete()
+    t0 = time.perf_counter()
+    stats.refresh_daily_rollups(days=args.days + 1)
+    results["rollup_refresh_full_ms"] = (time.perf_counter() - t0) * 1000.0
+    results["stats_rollup_ms"] = timed(lambda: stats.daily_stats(30))
+
+    print(json.dumps({k: round(v, 2) if isinstance(v, float) else v for k, v in results.items()}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
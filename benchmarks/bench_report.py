@@ -0,0 +1,129 @@
+"""
+bench_report.py
+---------------
+Reports/sec of the original (uncached) PDF renderer vs the template engine,
+using synthetic spectrogram and heatmap PNGs.
+
+    python benchmarks/bench_report.py --reports 200
+"""
+
+import argparse
+import io
+import json
+import os
+import sys
+import time
+
+import numpy as np
+from PIL import Image
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfgen import canvas
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from predictor import report_engine  # noqa: E402
+
+PREDICTION = {"final_label": 1, "final_confidence": 0.8731}
+USER_INFO = {"name": "Bench Patient", "email": "bench@example.com", "phone": "9000000000", "test_date": "2025-01-01 09:00:00"}
+
+
+def synthetic_png(width, height, seed):
+    rng = np.random.default_rng(seed)
+    arr = rng.integers(0, 255, (height, width, 3), dtype=np.uint8)
+    buf = io.BytesIO()
+    Image.fromarray(arr).save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def render_uncached(prediction, spectrogram_bytes=None, heatmap_bytes=None, user_info=None):
+    """
+    The original per-request renderer (every element drawn and every image
+    decoded and embedded on each call), kept here as the baseline.
+    """
+    buffer = io.BytesIO()
+    p = canvas.Canvas(buffer, pagesize=A4)
+    width, height = A4
+
+    p.setFont("Helvetica-Bold", 18)
+    p.drawString(50, height - 60, report_engine.TITLE)
+
+    p.setFont("Helvetica", 12)
+    y = height - 100
+    if user_info:
+        p.drawString(50, y, f"Name: {user_info.get('name', 'Unknown')}")
+        y -= 20
+        p.drawString(50, y, f"Email: {user_info.get('email', 'N/A')}")
+        y -= 20
+        p.drawString(50, y, f"Phone: {user_info.get('phone', 'N/A')}")
+        y -= 20
+        p.drawString(50, y, f"Test Date: {user_info.get('test_date', 'N/A')}")
+        y -= 40
+
+    p.line(50, y, width - 50, y)
+    y -= 20
+
+    p.setFont("Helvetica-Bold", 14)
+    p.drawString(50, y, f"Prediction Result: {report_engine._result_text(prediction)}")
+    y -= 25
+
+    p.setFont("Helvetica", 12)
+    confidence = prediction.get("final_confidence")
+    if confidence is not None:
+        p.drawString(50, y, f"Confidence: {(confidence * 100):.2f}%")
+    else:
+        p.drawString(50, y, "Confidence: N/A")
+    y -= 40
+
+    for image_bytes, (caption, x, w, h), what in (
+        (spectrogram_bytes, report_engine.SPECTROGRAM_SLOT, "spectrogram"),
+        (heatmap_bytes, report_engine.HEATMAP_SLOT, "heatmap"),
+    ):
+        if not image_bytes:
+            continue
+        try:
+            image = ImageReader(io.BytesIO(image_bytes))
+            p.drawString(50, y, caption)
+            y -= 180
+            p.drawImage(image, x, y, width=w, height=h, preserveAspectRatio=True, mask="auto")
+            y -= 30
+        except Exception as e:
+            p.setFillColorRGB(1, 0, 0)
+            p.drawString(50, y, f"[Error loading {what}: {str(e)}]")
+            y -= 30
+            p.setFillColorRGB(0, 0, 0)
+
+    p.showPage()
+    p.save()
+    return buffer.getvalue()
+
+
+def reports_per_sec(render, n, spectrogram, heatmap):
+    render(PREDICTION, spectrogram, heatmap, USER_INFO)   # warm-up
+    t0 = time.perf_counter()
+    for _ in range(n):
+        render(PREDICTION, spectrogram, heatmap, USER_INFO)
+    return n / (time.perf_counter() - t0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reports", type=int, default=200)
+    args = parser.parse_args()
+
+    # Same sizes matplotlib produces for a 6x3in spectrogram and a 224px heatmap
+    spectrogram = synthetic_png(600, 300, seed=1)
+    heatmap = synthetic_png(224, 224, seed=2)
+
+    before = reports_per_sec(render_uncached, args.reports, spectrogram, heatmap)
+    after = reports_per_sec(report_engine.render_report, args.reports, spectrogram, heatmap)
+    print(json.dumps({
+        "reports": args.reports,
+        "uncached_reports_per_sec": round(before, 1),
+        "template_reports_per_sec": round(after, 1),
+        "speedup": round(after / before, 2),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
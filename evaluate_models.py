@@ -0,0 +1,72 @@
+"""
+evaluate_models.py
+------------------
+Gate a retrained artifact set before it replaces the deployed models.
+Training scripts write to models/candidate/; this scores the candidate
+(laid over the deployed set) and the deployed set on the frozen holdout
+(model_holdout.json), comparing accuracy, single-row/batched latency and
+memory. Exits non-zero and leaves the deployed files alone on any regression;
+with --promote a passing candidate becomes the registry's CURRENT version.
+
+    python evaluate_models.py                      # report only
+    python evaluate_models.py --promote            # promote if the gate passes
+    python evaluate_models.py --candidate /tmp/run7 --max-latency-increase 0.5
+"""
+
+import argparse
+import os
+import sys
+
+from predictor import model_eval
+
+
+def _fmt(result):
+    if result["status"] != "ok":
+        return result["status"] + (f" ({result.get('error') or result.get('reason')})" if result["status"] != "missing" else "")
+    lat, mem = result["latency_ms"], result["memory_mb"]
+    return (f"acc {result['accuracy']:.4f} (n={result['n']})  single p50 {lat['single_p50']:.2f} ms  "
+            f"batch{lat['batch_size']} p50 {lat['batch_p50']:.2f} ms  rss +{mem['rss_delta']:.0f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--candidate", default=model_eval.CANDIDATE_DIR)
+    parser.add_argument("--deployed", default=None, help="Artifact directory (default: registry CURRENT)")
+    parser.add_argument("--promote", action="store_true", help="Promote the candidate when the gate passes")
+    parser.add_argument("--max-accuracy-drop", type=float, default=model_eval.MAX_ACCURACY_DROP)
+    parser.add_argument("--max-latency-increase", type=float, default=model_eval.MAX_LATENCY_INCREASE)
+    parser.add_argument("--max-memory-increase", type=float, default=model_eval.MAX_MEMORY_INCREASE)
+    parser.add_argument("--out", default=None, help=f"Report path (default: <candidate>/{model_eval.REPORT_NAME})")
+    args = parser.parse_args()
+
+    report = model_eval.gate(
+        args.candidate, args.deployed,
+        max_accuracy_drop=args.max_accuracy_drop,
+        max_latency_increase=args.max_latency_increase,
+        max_memory_increase=args.max_memory_increase,
+    )
+    out = args.out or os.path.join(args.candidate, model_eval.REPORT_NAME)
+    model_eval.write_report(report, out)
+
+    if not report["components"]:
+        print(f"Nothing to evaluate: {report['reason']}")
+        return
+    for name, result in report["components"].items():
+        print(f"\n{name}:")
+        print(f"  deployed   {_fmt(result['deployed'])}")
+        print(f"  candidate  {_fmt(result['candidate'])}")
+        for problem in report["regressions"].get(name, []):
+            print(f"  ❌ {problem}")
+
+    if not report["promote"]:
+        print(f"\n❌ Promotion refused; report → {out}")
+        sys.exit(1)
+    if args.promote:
+        version = model_eval.promote(report)
+        print(f"\n✅ Promoted {', '.join(report['changed_files'])} as model version {version}")
+    else:
+        print(f"\n✅ Gate passed; re-run with --promote to deploy. Report → {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+extract_embeddings.py
+---------------------
+Compute 1280-d MobileNetV2 (ImageNet, frozen) + GAP embeddings for an MRI
+image dataset and write them as mri_features.npy for fusion_model_train.py.
+Images are read from packed shards and embedded in large batches; vectors
+are kept in the float16 store under cache/embeddings/, keyed by image hash,
+so re-runs and the API only embed images they have not seen before.
+
+    python extract_embeddings.py --manifest dataset_manifest.json
+    python extract_embeddings.py dataset --out mri_features.npy --labels-out mri_labels.npy
+"""
+
+import argparse
+
+import numpy as np
+
+from predictor import dataset_manifest, embeddings, image_shards
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("root", nargs="?", default=None)
+    parser.add_argument("--manifest", default=None, help="Embed the images listed in this manifest")
+    parser.add_argument("--out", default="mri_features.npy")
+    parser.add_argument("--labels-out", default="mri_labels.npy")
+    parser.add_argument("--batch-size", type=int, default=embeddings.BATCH_SIZE)
+    args = parser.parse_args()
+
+    if args.root:
+        shard_dir = image_shards.pack_directory(args.root)
+    else:
+        manifest = dataset_manifest.load(args.manifest or dataset_manifest.DEFAULT_MANIFEST)
+        shard_dir = image_shards.pack_manifest(manifest)
+
+    packed = image_shards.PackedImageDataset(shard_dir)
+    X = embeddings.embed_packed(packed, batch_size=args.batch_size).astype(np.float32)
+    np.save(args.out, X)
+    np.save(args.labels_out, packed.labels)
+    print(f"✅ {X.shape[0]} embeddings {X.shape[1:]} → {args.out} (labels → {args.labels_out})")
+
+
+if __name__ == "__main__":
+    main()
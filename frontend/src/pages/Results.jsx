@@ -38,10 +38,17 @@ const Results = () => {
       const token = localStorage.getItem("access");
       if (!token) throw new Error("No access token found. Please log in.");
 
-      const response = await axios.get(result.report_url, {
-        headers: { Authorization: `Bearer ${token}` },
-        responseType: "blob",
-      });
+      // Reports render in the background; 202 means "still rendering, retry"
+      let response;
+      for (let attempt = 0; attempt < 10; attempt++) {
+        response = await axios.get(result.report_url, {
+          headers: { Authorization: `Bearer ${token}` },
+          responseType: "blob",
+        });
+        if (response.status !== 202) break;
+        await new Promise((resolve) => setTimeout(resolve, 1000));
+      }
+      if (response.status === 202) throw new Error("Report is still being generated.");
 
       const url = window.URL.createObjectURL(new Blob([response.data]));
       const link = document.createElement("a");
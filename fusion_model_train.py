@@ -3,9 +3,14 @@ fusion_model_train.py
 ----------------------
 Train a multimodal deep learning system for Parkinson's Detection.
 Combines audio-based features and CNN-based MRI features.
+
+Artifacts are written to models/candidate/; promote them with
+``python evaluate_models.py --promote`` once they pass the evaluation gate.
+Rows in the frozen holdout (model_holdout.json) are never trained on.
 """
 
 import os
+import json
 import numpy as np
 import joblib
 from sklearn.model_selection import train_test_split
@@ -19,29 +24,59 @@ from tensorflow.keras.optimizers import Adam
 from tensorflow.keras.callbacks import EarlyStopping, ModelCheckpoint
 from tensorflow.keras.applications import MobileNetV2
 from tensorflow.keras.layers import GlobalAveragePooling2D
-from tensorflow.keras.preprocessing.image import ImageDataGenerator
+
+from predictor import data_pipeline, dataset_manifest, feature_store, image_shards, model_eval
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+OUT_DIR = model_eval.CANDIDATE_DIR
+os.makedirs(OUT_DIR, exist_ok=True)
 
 # -------------------------------------------------------------------------
 # 1️⃣ LOAD DATA (replace these with your real extracted features)
 # -------------------------------------------------------------------------
 # Example: each sample = one patient
 # voice_features.npy → shape (N, 40)
-# mri_features.npy → shape (N, 1024)
+# mri_features.npy → shape (N, 1280), MobileNetV2 GAP embeddings from extract_embeddings.py
 # labels.npy → shape (N, )
+# voice_feature_ids.json (optional) → N audio file SHA-256s, the recording behind each row
 
 audio_feat_path = os.path.join(BASE_DIR, "voice_features.npy")
 image_feat_path = os.path.join(BASE_DIR, "mri_features.npy")
 label_path = os.path.join(BASE_DIR, "labels.npy")
+voice_ids_path = os.path.join(BASE_DIR, "voice_feature_ids.json")
 
 if not (os.path.exists(audio_feat_path) and os.path.exists(image_feat_path) and os.path.exists(label_path)):
-    raise FileNotFoundError("Please generate voice_features.npy, mri_features.npy, and labels.npy before training.")
+    raise FileNotFoundError(
+        "Please generate voice_features.npy, mri_features.npy (extract_embeddings.py), and labels.npy before training."
+    )
 
 X_audio = np.load(audio_feat_path)
 X_image = np.load(image_feat_path)
 y = np.load(label_path)
 
+# Holdout rows are identified by the content of voice_features.npy, so the
+# mask is taken before any feature substitution below
+keep = model_eval.voice_training_mask(X_audio)
+
+# Prefer voice features materialized by materialize_features.py (praat40),
+# aligned row by row through the recording hashes in voice_feature_ids.json
+voice_shards = os.path.join(feature_store.CACHE_DIR, "praat40", "shards", "dataset_voice")
+if os.path.exists(os.path.join(voice_shards, "index.json")) and os.path.exists(voice_ids_path):
+    with open(voice_ids_path) as f:
+        voice_ids = json.load(f)
+    if len(voice_ids) != len(X_audio):
+        print(f"⚠️ {voice_ids_path} lists {len(voice_ids)} rows for {len(X_audio)} features; not using {voice_shards}")
+    else:
+        try:
+            X_audio = feature_store.take_by_sha(voice_shards, voice_ids)
+            print(f"Using materialized voice features from {voice_shards}")
+        except KeyError as e:
+            print(f"⚠️ Not using materialized voice features: {e}")
+
+# Keep the frozen evaluation holdout out of training
+X_audio, X_image, y = X_audio[keep], X_image[keep], y[keep]
+print(f"Excluded {int((~keep).sum())} holdout rows (model_holdout.json)")
+
 print("Loaded datasets:")
 print(f"Audio features: {X_audio.shape}")
 print(f"Image features: {X_image.shape}")
@@ -58,8 +93,8 @@ X_audio_scaled = scaler.fit_transform(X_audio)
 audio_model = RandomForestClassifier(n_estimators=200, random_state=42)
 audio_model.fit(X_audio_scaled, y)
 
-joblib.dump(audio_model, os.path.join(BASE_DIR, "parkinsons_model.pkl"))
-joblib.dump(scaler, os.path.join(BASE_DIR, "scaler.pkl"))
+joblib.dump(audio_model, os.path.join(OUT_DIR, "parkinsons_model.pkl"))
+joblib.dump(scaler, os.path.join(OUT_DIR, "scaler.pkl"))
 
 print("✅ Saved: parkinsons_model.pkl & scaler.pkl")
 
@@ -70,22 +105,10 @@ print("\nTraining MRI CNN model...")
 
 # Suppose you have images stored in dataset/healthy and dataset/parkinson
 dataset_dir = os.path.join(BASE_DIR, "dataset")
-train_datagen = ImageDataGenerator(rescale=1.0 / 255.0, validation_split=0.2)
-
-train_gen = train_datagen.flow_from_directory(
-    dataset_dir,
-    target_size=(224, 224),
-    batch_size=8,
-    class_mode="binary",
-    subset="training"
-)
-val_gen = train_datagen.flow_from_directory(
-    dataset_dir,
-    target_size=(224, 224),
-    batch_size=8,
-    class_mode="binary",
-    subset="validation"
-)
+manifest, _ = dataset_manifest.update(dataset_dir)
+packed = image_shards.PackedImageDataset(image_shards.pack_manifest(manifest, image_size=(224, 224)))
+# Validation comes from the train split; the test split is the frozen holdout
+train_gen, val_gen = data_pipeline.packed_train_validation(packed, batch_size=8)
 
 base_model = MobileNetV2(weights="imagenet", include_top=False, input_shape=(224, 224, 3))
 x = GlobalAveragePooling2D()(base_model.output)
@@ -101,7 +124,7 @@ image_model.compile(optimizer=Adam(1e-4), loss="binary_crossentropy", metrics=["
 
 callbacks = [
     EarlyStopping(monitor="val_loss", patience=5, restore_best_weights=True),
-    ModelCheckpoint(os.path.join(BASE_DIR, "image_model.h5"), save_best_only=True)
+    ModelCheckpoint(os.path.join(OUT_DIR, "image_model.h5"), save_best_only=True)
 ]
 
 image_model.fit(train_gen, validation_data=val_gen, epochs=10, callbacks=callbacks)
@@ -138,7 +161,7 @@ fusion_model.compile(optimizer=Adam(1e-4), loss="binary_crossentropy", metrics=[
 
 callbacks = [
     EarlyStopping(monitor="val_loss", patience=5, restore_best_weights=True),
-    ModelCheckpoint(os.path.join(BASE_DIR, "fusion_model.h5"), save_best_only=True)
+    ModelCheckpoint(os.path.join(OUT_DIR, "fusion_model.h5"), save_best_only=True)
 ]
 
 fusion_model.fit(
@@ -151,4 +174,5 @@ fusion_model.fit(
 )
 
 print("✅ Saved: fusion_model.h5")
-print("\n✅ All models trained and saved successfully!")
+print(f"\n✅ All models trained and saved to {OUT_DIR}")
+print("   Next: python evaluate_models.py --promote")
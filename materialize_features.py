@@ -0,0 +1,34 @@
+"""
+materialize_features.py
+-----------------------
+Extract features for a labelled directory (root/<class>/*) in parallel and
+pack them into memory-mappable shards under cache/features/ for the
+training scripts. Only new or changed files are processed on re-runs.
+
+    python materialize_features.py dataset_voice --classes healthy parkinsons --extractor praat40
+    python materialize_features.py dataset_voice --classes healthy parkinsons --extractor mfcc40x173
+"""
+
+import argparse
+
+from predictor import feature_store
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("root")
+    parser.add_argument("--classes", nargs="+", default=["healthy", "parkinsons"])
+    parser.add_argument("--extractor", choices=sorted(feature_store.EXTRACTORS), default="praat40")
+    parser.add_argument("--name", default=None, help="Dataset name (defaults to the directory name)")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    shard_dir = feature_store.materialize_directory(
+        args.root, args.classes, args.extractor, name=args.name, workers=args.workers
+    )
+    X, y = feature_store.load_features(shard_dir)
+    print(f"✅ {X.shape[0]} samples {X.shape[1:]} → {shard_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+pack_images.py
+--------------
+Pack an image directory (root/<class>/*) into pre-resized uint8 shards
+under cache/image_shards/ for memory-mapped training and offline scoring.
+With --manifest, rows follow the manifest and keep their train/test split.
+Re-runs only decode new or changed files.
+
+    python pack_images.py dataset
+    python pack_images.py --manifest dataset_manifest.json
+    python manage.py score_dataset --packed cache/image_shards/dataset --out scores.csv
+"""
+
+import argparse
+
+from predictor import dataset_manifest, image_shards
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("root", nargs="?", default=None)
+    parser.add_argument("--manifest", default=None, help="Pack the images listed in this manifest")
+    parser.add_argument("--out", default=None, help="Shard directory (defaults to cache/image_shards/<name>)")
+    parser.add_argument("--size", type=int, nargs=2, default=list(image_shards.features.IMAGE_SIZE))
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.manifest:
+        manifest = dataset_manifest.load(args.manifest)
+        out = image_shards.pack_manifest(manifest, args.out, tuple(args.size), workers=args.workers)
+    elif args.root:
+        out = image_shards.pack_directory(args.root, args.out, tuple(args.size), workers=args.workers)
+    else:
+        parser.error("give a directory or --manifest")
+
+    packed = image_shards.PackedImageDataset(out)
+    print(f"✅ {len(packed)} images {packed.image_size} → {out}")
+
+
+if __name__ == "__main__":
+    main()
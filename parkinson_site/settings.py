@@ -96,16 +96,35 @@ WSGI_APPLICATION = 'parkinson_site.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Connections are reused instead of opened per request: persistent
+# per-thread connections (DB_CONN_MAX_AGE seconds, health-checked before
+# reuse) or, with DB_POOL_SIZE > 0, a psycopg connection pool of that many
+# connections per worker process (Django >= 5.1, `pip install "psycopg[pool]"`).
+# Size it so workers x DB_POOL_SIZE stays below PostgreSQL's max_connections.
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', '0'))
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
-        'NAME': 'parkinson_db',
-        'USER': 'parkinson_user',
-        'PASSWORD': 'yourpassword',
-        'HOST': 'localhost',
-        'PORT': '5432',
+        'NAME': os.environ.get('DB_NAME', 'parkinson_db'),
+        'USER': os.environ.get('DB_USER', 'parkinson_user'),
+        'PASSWORD': os.environ.get('DB_PASSWORD', 'yourpassword'),
+        'HOST': os.environ.get('DB_HOST', 'localhost'),
+        'PORT': os.environ.get('DB_PORT', '5432'),
+        # a pool manages connection lifetime itself; Django requires 0 then
+        'CONN_MAX_AGE': 0 if DB_POOL_SIZE else int(os.environ.get('DB_CONN_MAX_AGE', '60')),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'connect_timeout': 5,
+        },
     }
 }
+if DB_POOL_SIZE:
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': min(2, DB_POOL_SIZE),
+        'max_size': DB_POOL_SIZE,
+        'timeout': float(os.environ.get('DB_POOL_TIMEOUT', '10')),  # seconds to wait for a free connection
+    }
 
 
 # Password validation
@@ -152,11 +171,20 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # simplejwt token checks with the user row served from the cache
+        'accounts.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    # Per-user request rate for predict/report/spectrogram (ScopedRateThrottle).
+    # Throttle counts live in CACHES: per worker process unless CACHE_REDIS_URL is set
+    'DEFAULT_THROTTLE_RATES': {
+        'predict': os.environ.get('PREDICT_RATE', '30/min'),
+        # /api/auth/login/ attempts per client IP and per target account
+        'login_ip': os.environ.get('LOGIN_IP_RATE', '20/min'),
+        'login_account': os.environ.get('LOGIN_ACCOUNT_RATE', '10/min'),
+    },
 }
 
 # CORS - allow your frontend host (dev allow all)
@@ -165,12 +193,92 @@ CORS_ALLOW_ALL_ORIGINS = True
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 MEDIA_URL = '/media/'
 
+# Hot tier of the prediction result cache, and the state behind the auth
+# user cache, login/predict throttles and per-account prediction slots.
+# Set CACHE_REDIS_URL (needs `pip install redis`) so all workers share it;
+# the LocMem fallback is per worker process, which turns those limits into
+# per-worker limits.
+if os.environ.get('CACHE_REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['CACHE_REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'parkinson-default',
+        }
+    }
+PREDICTION_CACHE_TTL = 60 * 60 * 24  # seconds
+# Seconds a JWT-authenticated user is served from the cache. Saves invalidate
+# it at once only on a shared cache; under LocMem other workers may keep a
+# deactivated/demoted user for up to this long, hence the short fallback
+AUTH_USER_CACHE_TTL = 60 if os.environ.get('CACHE_REDIS_URL') else 10
+LOGIN_HASH_WORKERS = 2        # threads verifying login passwords per worker (0 = inline)
+LOGIN_HASH_MAX_PENDING = 16   # queued password checks before logins get 503
+BULK_IMPORT_HASH_WORKERS = None  # password hashing processes for manage.py import_users (None = one per CPU)
+BULK_IMPORT_MAX_ROWS = 200       # per /api/auth/users/bulk-import/ request (hashed in the request)
+BULK_IMPORT_WEB_WORKERS = 2      # hashing processes for that endpoint
+
+# Generated PDF reports live outside MEDIA_ROOT and expire after the TTL
+REPORT_STORE_DIR = os.environ.get('REPORT_STORE_DIR')  # defaults to <tmp>/parkinson_reports
+REPORT_TTL_SECONDS = 60 * 60
+REPORT_JANITOR_INTERVAL = 5 * 60
+REPORT_WORKERS = 2  # background report render threads per worker process
+REPORT_PENDING_TIMEOUT = 5 * 60  # a render queued longer than this (its worker died) reports as failed
+BULK_REPORT_WORKERS = 4  # render processes for cohort archives
+BULK_REPORT_WINDOW = 8   # max PDFs in flight/buffered per archive
+
+# Admission control for prediction uploads (predictor/admission.py)
+PREDICT_MAX_REQUEST_BYTES = 40 * 1024 * 1024  # declared Content-Length, checked before parsing
+MAX_AUDIO_BYTES = 25 * 1024 * 1024
+MAX_AUDIO_SECONDS = 60            # from the WAV header
+MAX_IMAGE_BYTES = 15 * 1024 * 1024
+MAX_IMAGE_PIXELS = 4096 * 4096    # from the image header
+PREDICT_USER_CONCURRENCY = 2      # predictions in flight per account (429 beyond); per worker under LocMem
+PREDICT_MAX_INFLIGHT = 8          # predictions in flight per worker process (503 beyond)
+REPORT_QUEUE_MAX_PENDING = 64     # queued background reports per worker (503 beyond)
+
+# Live comparison of the model registry's CANDIDATE version against CURRENT
+# (python manage.py model_registry candidate <version>)
+SHADOW_SAMPLE_RATE = float(os.environ.get('SHADOW_SAMPLE_RATE', '0.1'))  # requests re-scored in the background
+CANARY_SHARE = float(os.environ.get('CANARY_SHARE', '0'))                 # users served by the candidate
+SHADOW_FLUSH_INTERVAL = 60   # seconds between shadow_summary log lines
+SHADOW_MAX_PENDING = 32      # shadow jobs queued per worker before dropping
+
+# /api/predictor/metrics/ is open to staff users, or to scrapers sending
+# "Authorization: Bearer <METRICS_TOKEN>" when the token is set
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
+# predictor logs (one structured JSON line per prediction) are written by a
+# background thread so a slow stdout/stderr never stalls a request
+LOG_PREDICTION_OUTCOMES = False   # add final_label/final_confidence (patient outcomes) to those lines
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'plain': {'format': '%(asctime)s %(levelname)s %(name)s %(message)s'},
+    },
+    'handlers': {
+        'async_console': {
+            'class': 'predictor.log_handlers.AsyncStreamHandler',
+            'formatter': 'plain',
+        },
+    },
+    'loggers': {
+        'predictor': {'handlers': ['async_console'], 'level': 'INFO', 'propagate': False},
+    },
+}
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=120),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=7),          
     "ROTATE_REFRESH_TOKENS": False,
     "BLACKLIST_AFTER_ROTATION": True,
-    "UPDATE_LAST_LOGIN": True,
+    "UPDATE_LAST_LOGIN": False,   # no user-row write (and cache invalidation) per token issued
 
     "ALGORITHM": "HS256",
     "SIGNING_KEY": SECRET_KEY,
@@ -1,6 +1,20 @@
 from django.contrib import admin
-from .models import ParkinsonPrediction   # ✅ must match the model name
+from .models import ParkinsonPrediction, DailyPredictionRollup, CachedPredictionResult   # ✅ must match the model name
 
 @admin.register(ParkinsonPrediction)
 class ParkinsonPredictionAdmin(admin.ModelAdmin):
     list_display = ('prediction_type', 'result', 'uploaded_at')
+    list_select_related = ('user',)
+    raw_id_fields = ('user',)
+
+
+@admin.register(DailyPredictionRollup)
+class DailyPredictionRollupAdmin(admin.ModelAdmin):
+    list_display = ('day', 'prediction_type', 'total', 'positives', 'refreshed_at')
+    list_filter = ('prediction_type',)
+
+
+@admin.register(CachedPredictionResult)
+class CachedPredictionResultAdmin(admin.ModelAdmin):
+    list_display = ('key', 'hits', 'created_at', 'last_hit_at')
+    search_fields = ('key',)
@@ -0,0 +1,193 @@
+"""
+Admission control for the prediction endpoints.
+
+Requests are turned away as cheaply as possible, before anything is decoded:
+
+- the declared request size (Content-Length) is checked before the multipart
+  body is parsed (413);
+- uploads are checked from their headers only: WAV size, duration and channel
+  count via soundfile.info, image dimensions via PIL's lazy open, which reads
+  the header but not the pixels (400, see PredictSerializer);
+- each user may have at most PREDICT_USER_CONCURRENCY predictions in flight,
+  counted in the default cache (429). The limit holds across workers only
+  when that cache is shared (CACHE_REDIS_URL); with the LocMem fallback it
+  is per worker process, so an account can have up to workers x the limit
+  in flight;
+- each worker runs at most PREDICT_MAX_INFLIGHT predictions at once and sheds
+  the rest, and async reports are refused while the render queue is
+  saturated (503 with Retry-After).
+
+Request rates are limited separately by DRF's ScopedRateThrottle (the
+"predict" scope in REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"]).
+"""
+
+import logging
+import threading
+from contextlib import contextmanager
+
+import soundfile as sf
+from PIL import Image
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.response import Response
+
+from . import metrics, report_queue
+
+logger = logging.getLogger(__name__)
+
+REJECTIONS = metrics.counter("predictor_admission_rejected_total", "Requests refused by admission control",
+                             ["reason"])
+
+SLOT_PREFIX = "predict-inflight:"
+SLOT_TTL = 5 * 60   # seconds; bounds a leaked slot if a worker dies mid-request
+
+_inflight = None
+_inflight_lock = threading.Lock()
+
+
+class Rejected(Exception):
+    def __init__(self, status_code, reason, detail, retry_after=None):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.reason = reason
+        self.detail = detail
+        self.retry_after = retry_after
+
+    def response(self):
+        response = Response({"error": self.detail}, status=self.status_code)
+        if self.retry_after:
+            response["Retry-After"] = str(self.retry_after)
+        return response
+
+
+def _limit(name, default):
+    return getattr(settings, name, default)
+
+
+def _reject(status_code, reason, detail, retry_after=None):
+    REJECTIONS.inc(reason=reason)
+    logger.warning(f"🚫 Admission refused ({reason}): {detail}")
+    raise Rejected(status_code, reason, detail, retry_after)
+
+
+# ===============================
+# UPLOAD HEADERS
+# ===============================
+def check_audio(upload):
+    """
+    Error message for an audio upload that is too large or too long, judged
+    from its size and header; None if it is acceptable.
+    """
+    max_bytes = _limit("MAX_AUDIO_BYTES", 25 * 1024 * 1024)
+    if upload.size > max_bytes:
+        return f"Audio file is larger than {max_bytes // (1024 * 1024)} MB"
+    try:
+        info = sf.info(upload)
+    except Exception:
+        return "Unreadable audio file; upload a WAV recording"
+    finally:
+        upload.seek(0)
+    if not info.samplerate or not info.frames:
+        return "Audio file is empty"
+    max_seconds = _limit("MAX_AUDIO_SECONDS", 60)
+    if info.frames / info.samplerate > max_seconds:
+        return f"Audio is longer than {max_seconds} seconds"
+    if info.channels > 2:
+        return "Audio must be mono or stereo"
+    return None
+
+
+def check_image(upload):
+    """
+    Error message for an image upload that is too large, judged from its
+    size and header dimensions; None if it is acceptable.
+    """
+    max_bytes = _limit("MAX_IMAGE_BYTES", 15 * 1024 * 1024)
+    if upload.size > max_bytes:
+        return f"Image file is larger than {max_bytes // (1024 * 1024)} MB"
+    try:
+        with Image.open(upload) as img:   # lazy: header only, no pixel decode
+            width, height = img.size
+    except Exception:
+        return "Unreadable image file"
+    finally:
+        upload.seek(0)
+    max_pixels = _limit("MAX_IMAGE_PIXELS", 4096 * 4096)
+    if width * height > max_pixels:
+        return f"Image is {width}x{height}; at most {max_pixels:,} pixels are accepted"
+    return None
+
+
+# ===============================
+# CONCURRENCY & LOAD SHEDDING
+# ===============================
+def _worker_slots():
+    global _inflight
+    if _inflight is None:
+        with _inflight_lock:
+            if _inflight is None:
+                _inflight = threading.BoundedSemaphore(_limit("PREDICT_MAX_INFLIGHT", 8))
+    return _inflight
+
+
+def _acquire_user_slot(user_id):
+    # Atomic across workers on a shared cache; LocMem counts per process
+    key = f"{SLOT_PREFIX}{user_id}"
+    cache.add(key, 0, SLOT_TTL)
+    try:
+        count = cache.incr(key)
+    except ValueError:   # expired between add() and incr()
+        cache.add(key, 1, SLOT_TTL)
+        count = 1
+    if count > _limit("PREDICT_USER_CONCURRENCY", 2):
+        _release_user_slot(user_id)
+        return False
+    return True
+
+
+def _release_user_slot(user_id):
+    try:
+        cache.decr(f"{SLOT_PREFIX}{user_id}")
+    except ValueError:
+        pass
+
+
+@contextmanager
+def admit(request):
+    """
+    Hold a per-user and a per-worker prediction slot for the duration of the
+    block; raises Rejected when the request must be turned away.
+    """
+    try:
+        declared = int(request.META.get("CONTENT_LENGTH") or 0)
+    except ValueError:
+        declared = 0
+    max_request = _limit("PREDICT_MAX_REQUEST_BYTES", 40 * 1024 * 1024)
+    if declared > max_request:
+        _reject(status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, "request_size",
+                f"Request body is larger than {max_request // (1024 * 1024)} MB")
+
+    user_id = request.user.id
+    if not _acquire_user_slot(user_id):
+        _reject(status.HTTP_429_TOO_MANY_REQUESTS, "user_concurrency",
+                "Too many predictions in progress for this account", retry_after=1)
+    slots = _worker_slots()
+    if not slots.acquire(blocking=False):
+        _release_user_slot(user_id)
+        _reject(status.HTTP_503_SERVICE_UNAVAILABLE, "overloaded",
+                "Server is busy; retry shortly", retry_after=1)
+    try:
+        yield
+    finally:
+        slots.release()
+        _release_user_slot(user_id)
+
+
+def check_report_queue():
+    """
+    Refuse a background report while this worker's render queue is full.
+    """
+    if report_queue.pending_count() >= _limit("REPORT_QUEUE_MAX_PENDING", 64):
+        _reject(status.HTTP_503_SERVICE_UNAVAILABLE, "report_queue",
+                "Report queue is full; retry shortly", retry_after=5)
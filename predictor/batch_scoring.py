@@ -0,0 +1,236 @@
+"""
+Offline batch scoring: walk a directory, extract features in worker
+processes, run batched inference and append results incrementally with a
+resumable checkpoint. Driven by ``manage.py score_dataset``.
+"""
+
+import csv
+import os
+import json
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from . import features
+
+logger = logging.getLogger(__name__)
+
+RESULT_FIELDS = ["path", "modality", "label_hint", "label", "probability", "error"]
+
+
+# ===============================
+# DISCOVERY
+# ===============================
+def modality_for(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext in features.AUDIO_EXTENSIONS:
+        return "audio"
+    if ext in features.IMAGE_EXTENSIONS:
+        return "image"
+    return None
+
+
+def walk_files(roots, modality="auto"):
+    """
+    Yields (path, modality, item_key) in a stable order. item_key changes
+    whenever the file does, so edited files are rescored on resume.
+    """
+    for root in roots:
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames.sort()
+            for name in sorted(filenames):
+                path = os.path.join(dirpath, name)
+                kind = modality_for(path)
+                if kind is None or (modality != "auto" and kind != modality):
+                    continue
+                st = os.stat(path)
+                yield path, kind, f"{os.path.abspath(path)}:{st.st_size}:{st.st_mtime_ns}"
+
+
+# ===============================
+# WORKER-SIDE EXTRACTION
+# ===============================
+def extract_item(item):
+    """
+    Runs in a worker process. Returns (path, modality, array or None, error).
+    """
+    path, kind = item
+    try:
+        if kind == "audio":
+            fv = features.extract_raw_audio_features(path)
+            if fv is None:
+                return path, kind, None, "empty recording"
+            return path, kind, fv[0], None
+        return path, kind, features.load_image_array(path), None
+    except Exception as e:
+        return path, kind, None, str(e)
+
+
+# ===============================
+# CHECKPOINT + OUTPUT
+# ===============================
+class Checkpoint:
+    """
+    Append-only list of finished item keys, flushed after each batch is written.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.done = set()
+        if os.path.exists(path):
+            with open(path) as f:
+                self.done = {line.rstrip("\n") for line in f if line.strip()}
+
+    def mark(self, keys):
+        with open(self.path, "a") as f:
+            f.writelines(f"{k}\n" for k in keys)
+            f.flush()
+            os.fsync(f.fileno())
+        self.done.update(keys)
+
+
+class CsvWriter:
+    def __init__(self, path):
+        self.path = path
+        self._new = not os.path.exists(path) or os.path.getsize(path) == 0
+
+    def write(self, rows):
+        with open(self.path, "a", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS)
+            if self._new:
+                writer.writeheader()
+                self._new = False
+            writer.writerows(rows)
+            f.flush()
+            os.fsync(f.fileno())
+
+
+class ParquetWriter:
+    """
+    One part file per batch under a directory, so a crash never corrupts
+    earlier parts; read back with pandas.read_parquet(directory).
+    """
+    def __init__(self, directory):
+        import pandas  # noqa: F401  (fail early if the parquet stack is missing)
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._part = len([n for n in os.listdir(directory) if n.endswith(".parquet")])
+
+    def write(self, rows):
+        import pandas as pd
+        tmp = os.path.join(self.directory, f".part-{self._part:05d}.tmp")
+        pd.DataFrame(rows, columns=RESULT_FIELDS).to_parquet(tmp, index=False)
+        os.replace(tmp, os.path.join(self.directory, f"part-{self._part:05d}.parquet"))
+        self._part += 1
+
+
+def make_writer(out, fmt=None):
+    fmt = fmt or ("parquet" if not out.endswith(".csv") and (out.endswith(".parquet") or os.path.isdir(out)) else "csv")
+    return ParquetWriter(out) if fmt == "parquet" else CsvWriter(out)
+
+
+# ===============================
+# DRIVER
+# ===============================
+def _score_batch(extracted, predict_audio, predict_image):
+    """
+    Result rows for one extracted batch, plus the indices of rows whose
+    inference failed. A batch-level inference error falls back to scoring
+    the batch row by row, so one bad input cannot fail its neighbours.
+    """
+    rows, failed = [], set()
+    by_kind = {"audio": [], "image": []}
+    for i, (path, kind, arr, err) in enumerate(extracted):
+        row = {
+            "path": path, "modality": kind, "label_hint": os.path.basename(os.path.dirname(path)),
+            "label": None, "probability": None, "error": err,
+        }
+        rows.append(row)
+        if arr is not None:
+            by_kind[kind].append((i, arr))
+
+    for kind, predict in (("audio", predict_audio), ("image", predict_image)):
+        pending = by_kind[kind]
+        if not pending:
+            continue
+        try:
+            results = predict(np.stack([arr for _, arr in pending]))
+        except Exception as e:
+            logger.warning(f"⚠️ Batched {kind} inference failed ({e}); scoring {len(pending)} rows one by one")
+            results = []
+            for i, arr in pending:
+                try:
+                    results.append(predict(arr[np.newaxis])[0])
+                except Exception as row_error:
+                    results.append(None)
+                    rows[i]["error"] = f"inference failed: {row_error}"
+                    failed.add(i)
+        for (i, _), res in zip(pending, results):
+            if res is not None:
+                rows[i]["label"], rows[i]["probability"] = res["label"], res["probability"]
+    return rows, failed
+
+
+def score(roots, out, predict_audio, predict_image, modality="auto", batch_size=64,
+          workers=None, checkpoint_path=None, fmt=None, progress=None):
+    """
+    Score every matching file under ``roots`` that the checkpoint has not seen.
+    Rows whose inference failed are written with the error but left out of the
+    checkpoint, so the next run retries them (the newest row for a path wins).
+    Returns (scored, skipped).
+    """
+    checkpoint = Checkpoint(checkpoint_path or f"{out.rstrip(os.sep)}.checkpoint")
+    writer = make_writer(out, fmt)
+
+    todo, skipped = [], 0
+    for path, kind, key in walk_files(roots, modality):
+        if key in checkpoint.done:
+            skipped += 1
+        else:
+            todo.append((path, kind, key))
+
+    scored = 0
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), mp_context=ctx) as pool:
+        for start in range(0, len(todo), batch_size):
+            batch = todo[start:start + batch_size]
+            extracted = list(pool.map(extract_item, [(p, k) for p, k, _ in batch], chunksize=4))
+            rows, failed = _score_batch(extracted, predict_audio, predict_image)
+            writer.write(rows)
+            checkpoint.mark([key for i, (_, _, key) in enumerate(batch) if i not in failed])
+            scored += len(batch)
+            if progress:
+                progress(scored, len(todo))
+    logger.info(json.dumps({"event": "score_dataset_done", "scored": scored, "skipped": skipped}))
+    return scored, skipped
+
+
+def score_packed(shard_dir, out, predict_image, batch_size=64, checkpoint_path=None, fmt=None, progress=None):
+    """
+    Score a packed image dataset (see image_shards) straight from its
+    memory-mapped shards: no per-file open or decode. Returns (scored, skipped).
+    """
+    from .image_shards import PackedImageDataset
+
+    packed = PackedImageDataset(shard_dir)
+    checkpoint = Checkpoint(checkpoint_path or f"{out.rstrip(os.sep)}.checkpoint")
+    writer = make_writer(out, fmt)
+
+    keys = [f"{os.path.abspath(e['path'])}:{e['stamp'][0]}:{e['stamp'][1]}" for e in packed.entries]
+    todo = np.array([i for i, key in enumerate(keys) if key not in checkpoint.done], dtype=np.int64)
+    skipped = len(keys) - len(todo)
+
+    scored = 0
+    for start in range(0, len(todo), batch_size):
+        idx = todo[start:start + batch_size]
+        images, _ = packed.take(idx)
+        extracted = [(packed.entries[i]["path"], "image", img, None) for i, img in zip(idx, images)]
+        rows, failed = _score_batch(extracted, None, predict_image)
+        writer.write(rows)
+        checkpoint.mark([keys[i] for n, i in enumerate(idx) if n not in failed])
+        scored += len(idx)
+        if progress:
+            progress(scored, len(todo))
+    logger.info(json.dumps({"event": "score_dataset_done", "scored": scored, "skipped": skipped, "packed": shard_dir}))
+    return scored, skipped
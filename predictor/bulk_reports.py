@@ -0,0 +1,115 @@
+import io
+import logging
+import multiprocessing
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+from django.conf import settings
+
+from .models import ParkinsonPrediction
+from . import report_engine, stats
+
+logger = logging.getLogger(__name__)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    """
+    Shared worker processes. "spawn" keeps children free of the parent's
+    TensorFlow threads; they only import the Django-free report_engine.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(
+                    max_workers=getattr(settings, "BULK_REPORT_WORKERS", 4),
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+    return _pool
+
+
+def prediction_queryset(ids):
+    return (
+        ParkinsonPrediction.objects.filter(id__in=ids)
+        .select_related("user")
+        .only("id", "uploaded_at", "result", "probability", "user__email", "user__full_name", "user__phone")
+        .order_by("id")
+    )
+
+
+def iter_jobs(queryset):
+    for row in queryset.iterator(chunk_size=500):
+        user = row.user
+        yield {
+            "filename": f"parkinson_report_{row.id}.pdf",
+            "prediction": {
+                "final_label": 1 if row.result == stats.POSITIVE else 0,
+                "final_confidence": row.probability,
+            },
+            "user_info": {
+                "name": (user.full_name if user and user.full_name else "Unknown"),
+                "email": user.email if user else "N/A",
+                "phone": user.phone if user else "N/A",
+                "test_date": row.uploaded_at.strftime("%Y-%m-%d %H:%M:%S"),
+            },
+        }
+
+
+class _ZipStream(io.RawIOBase):
+    """
+    Write-only sink for ZipFile; the archive is drained after every member.
+    Not seekable, so zipfile writes data descriptors instead of seeking back.
+    """
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self._chunks.append(bytes(b))
+        return len(b)
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_zip(jobs, window=None, pool=None):
+    """
+    Render jobs in worker processes and yield zip bytes as each PDF finishes.
+    At most ``window`` documents are in flight or buffered at once.
+    """
+    window = window or getattr(settings, "BULK_REPORT_WINDOW", 8)
+    pool = pool or _get_pool()
+    jobs = iter(jobs)
+    sink = _ZipStream()
+    in_flight = set()
+
+    def fill():
+        while len(in_flight) < window:
+            job = next(jobs, None)
+            if job is None:
+                return
+            in_flight.add(pool.submit(report_engine.render_job, job))
+
+    try:
+        with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_DEFLATED) as archive:
+            fill()
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    in_flight.discard(future)
+                    filename, pdf_bytes = future.result()
+                    archive.writestr(filename, pdf_bytes)
+                    yield sink.drain()
+                fill()
+        yield sink.drain()   # central directory
+    finally:
+        for future in in_flight:
+            future.cancel()
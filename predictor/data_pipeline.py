@@ -0,0 +1,167 @@
+"""
+tf.data input pipelines for the image models, replacing the deprecated,
+single-threaded ImageDataGenerator.flow_from_directory.
+
+    paths -> parallel read/decode/resize -> cache (uint8) -> shuffle
+          -> batch -> vectorized augmentation -> normalize -> prefetch
+
+Resized images are cached as uint8 after the first epoch (in memory, or on
+disk with ``cache_path``), so later epochs skip PNG decoding entirely.
+``packed_dataset`` reads pre-resized batches from image_shards instead.
+"""
+
+import os
+
+import tensorflow as tf
+
+from . import dataset_manifest, features
+
+AUTOTUNE = tf.data.AUTOTUNE
+IMAGE_SIZE = features.IMAGE_SIZE
+
+
+def list_labelled_images(root):
+    """
+    (paths, labels, class_names) for root/<class>/*, with classes sorted
+    alphabetically like flow_from_directory (healthy=0, parkinson=1).
+    """
+    class_names = sorted(d for d in os.listdir(root) if os.path.isdir(os.path.join(root, d)))
+    paths, labels = [], []
+    for label, name in enumerate(class_names):
+        folder = os.path.join(root, name)
+        for fname in sorted(os.listdir(folder)):
+            if fname.lower().endswith(features.IMAGE_EXTENSIONS):
+                paths.append(os.path.join(folder, fname))
+                labels.append(label)
+    return paths, labels, class_names
+
+
+def _decode(path, label, image_size):
+    data = tf.io.read_file(path)
+    img = tf.io.decode_image(data, channels=3, expand_animations=False)
+    img = tf.image.resize(img, image_size, method="bilinear")
+    return tf.cast(tf.clip_by_value(tf.round(img), 0, 255), tf.uint8), label
+
+
+def _augment_batch(images, labels, zoom_range, seed):
+    """
+    Random horizontal flip and zoom for a whole batch in a few fused ops.
+    ``seed`` is this batch's stateless seed pair; it is split so the flip
+    and zoom draws are independent.
+    """
+    images = tf.cast(images, tf.float32)
+    n = tf.shape(images)[0]
+    height, width = images.shape[1], images.shape[2]
+    flip_seed, zoom_seed = tf.unstack(tf.random.experimental.stateless_split(seed, num=2))
+
+    flip = tf.random.stateless_uniform([n], seed=flip_seed) < 0.5
+    images = tf.where(flip[:, None, None, None], tf.reverse(images, axis=[2]), images)
+
+    if zoom_range:
+        # Box size > 1 zooms out (zero padding), < 1 zooms in, like zoom_range
+        scale = tf.random.stateless_uniform([n], zoom_seed, 1.0 - zoom_range, 1.0 + zoom_range)
+        half = scale / 2.0
+        boxes = tf.stack([0.5 - half, 0.5 - half, 0.5 + half, 0.5 + half], axis=1)
+        images = tf.image.crop_and_resize(images, boxes, tf.range(n), (height, width))
+    return images, labels
+
+
+def _normalize(images, labels):
+    return tf.cast(images, tf.float32) / 255.0, labels
+
+
+def build_image_dataset(paths, labels, batch_size=32, image_size=IMAGE_SIZE, training=False,
+                        zoom_range=0.2, cache=True, cache_path="", shuffle_buffer=2048, seed=42):
+    """
+    Batched dataset of (float32 images in [0, 1], float32 labels).
+    """
+    ds = tf.data.Dataset.from_tensor_slices((list(paths), [float(l) for l in labels]))
+    ds = ds.map(lambda p, l: _decode(p, l, image_size), num_parallel_calls=AUTOTUNE, deterministic=not training)
+    if cache:
+        ds = ds.cache(cache_path)
+    if training:
+        ds = ds.shuffle(min(shuffle_buffer, len(paths)) or 1, seed=seed, reshuffle_each_iteration=True)
+    ds = ds.batch(batch_size, num_parallel_calls=AUTOTUNE)
+    return _finish(ds, training, zoom_range, seed)
+
+
+def _finish(ds, training, zoom_range, seed):
+    if training:
+        # One stateless seed pair per batch, from a seeded stream that differs per epoch
+        seeds = tf.data.Dataset.random(seed=seed, rerandomize_each_iteration=True).batch(2, drop_remainder=True)
+        ds = tf.data.Dataset.zip((ds, seeds))
+        ds = ds.map(lambda batch, s: _augment_batch(*batch, zoom_range, s), num_parallel_calls=AUTOTUNE)
+    ds = ds.map(_normalize, num_parallel_calls=AUTOTUNE)
+    return ds.prefetch(AUTOTUNE)
+
+
+def directory_dataset(root, batch_size=32, image_size=IMAGE_SIZE, training=False, **kwargs):
+    paths, labels, _ = list_labelled_images(root)
+    return build_image_dataset(paths, labels, batch_size, image_size, training=training, **kwargs)
+
+
+def manifest_split(manifest, batch_size=32, image_size=IMAGE_SIZE, seed=42, root=None, **kwargs):
+    """
+    (train_ds, test_ds) read straight from a dataset manifest's index, with
+    no copied split directories.
+    """
+    tr_p, tr_l = dataset_manifest.split_files(manifest, dataset_manifest.TRAIN, root)
+    te_p, te_l = dataset_manifest.split_files(manifest, dataset_manifest.TEST, root)
+    train_ds = build_image_dataset(tr_p, tr_l, batch_size, image_size, training=True, seed=seed, **kwargs)
+    test_ds = build_image_dataset(te_p, te_l, batch_size, image_size, training=False, seed=seed, **kwargs)
+    return train_ds, test_ds
+
+
+def packed_dataset(packed, split=None, batch_size=32, training=False, zoom_range=0.2, seed=42, rows=None):
+    """
+    Batched dataset over an image_shards.PackedImageDataset: each batch is
+    gathered from the memory-mapped shards, with no per-file open/decode.
+    ``rows`` (row indices) overrides ``split``.
+    """
+    h, w = packed.image_size
+    epoch = [0]
+
+    def batches():
+        # A fresh permutation per epoch, reproducible from the seed
+        epoch[0] += 1
+        for x, y in packed.iter_batches(batch_size, split, shuffle=training, seed=seed + epoch[0], rows=rows):
+            yield x, y.astype("float32")
+
+    ds = tf.data.Dataset.from_generator(
+        batches,
+        output_signature=(
+            tf.TensorSpec((None, h, w, 3), tf.uint8),
+            tf.TensorSpec((None,), tf.float32),
+        ),
+    )
+    return _finish(ds, training, zoom_range, seed)
+
+
+def packed_split(packed, batch_size=32, seed=42, **kwargs):
+    """
+    (train_ds, test_ds) from packed shards built with image_shards.pack_manifest.
+    """
+    train_ds = packed_dataset(packed, dataset_manifest.TRAIN, batch_size, training=True, seed=seed, **kwargs)
+    test_ds = packed_dataset(packed, dataset_manifest.TEST, batch_size, training=False, seed=seed, **kwargs)
+    return train_ds, test_ds
+
+
+def packed_train_validation(packed, batch_size=32, validation_fraction=0.15, seed=42, **kwargs):
+    """
+    (train_ds, val_ds), both from the TRAIN split: the validation rows are a
+    stratified slice of it chosen by content hash. The TEST split is the
+    frozen evaluation holdout (model_eval), so it must not steer training
+    through early stopping or checkpoint selection.
+    """
+    by_label = {}
+    for i in packed.indices(dataset_manifest.TRAIN):
+        by_label.setdefault(int(packed.labels[i]), []).append(int(i))
+    val = []
+    for members in by_label.values():
+        members.sort(key=lambda i: dataset_manifest._rank(packed.entries[i]["sha256"], seed, "validation"))
+        val.extend(members[:max(1, round(len(members) * validation_fraction))])
+    val = sorted(val)
+    train = sorted(set(i for members in by_label.values() for i in members) - set(val))
+    train_ds = packed_dataset(packed, batch_size=batch_size, training=True, seed=seed, rows=train, **kwargs)
+    val_ds = packed_dataset(packed, batch_size=batch_size, training=False, seed=seed, rows=val, **kwargs)
+    return train_ds, val_ds
@@ -0,0 +1,239 @@
+"""
+Manifest-based dataset splits: the train/test split and CV folds are index
+files (relative path + sha256 + label + split) instead of copied images.
+
+Split membership is derived from content hashes, so it is reproducible on
+any machine and stable under renames. ``update`` is incremental: existing
+images keep their split, removed ones are dropped and new arrivals are
+assigned so that each class stays close to the requested test fraction.
+File hashes are only recomputed when size/mtime change (stat cache under
+cache/manifests, not tracked by git).
+"""
+
+import os
+import json
+import hashlib
+import logging
+import tempfile
+
+from . import features
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_MANIFEST = os.path.join(BASE_DIR, "dataset_manifest.json")
+STAT_CACHE_DIR = os.path.join(BASE_DIR, "cache", "manifests")
+MANIFEST_VERSION = 1
+
+TRAIN = "train"
+TEST = "test"
+
+
+# ===============================
+# HASHING
+# ===============================
+def sha256_file(path, chunk_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _rank(sha, seed, salt=""):
+    """
+    Deterministic pseudo-random position of an item, independent of path
+    and listing order.
+    """
+    return hashlib.sha256(f"{seed}:{salt}:{sha}".encode()).hexdigest()
+
+
+def _stat_cache_path(manifest_path):
+    return os.path.join(STAT_CACHE_DIR, os.path.basename(manifest_path) + ".stat.json")
+
+
+def _load_stat_cache(manifest_path):
+    try:
+        with open(_stat_cache_path(manifest_path)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _atomic_write_json(path, data):
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".part")
+    with os.fdopen(fd, "w") as f:
+        json.dump(data, f, indent=1)
+        f.write("\n")
+    os.replace(tmp, path)
+
+
+def scan(root, manifest_path=DEFAULT_MANIFEST):
+    """
+    {relative path: (sha256, class name)} for root/<class>/* images, reusing
+    cached hashes for files whose size and mtime are unchanged.
+    """
+    cache = _load_stat_cache(manifest_path)
+    fresh_cache, found, hashed = {}, {}, 0
+    for name in sorted(os.listdir(root)):
+        folder = os.path.join(root, name)
+        if not os.path.isdir(folder):
+            continue
+        for fname in sorted(os.listdir(folder)):
+            if not fname.lower().endswith(features.IMAGE_EXTENSIONS):
+                continue
+            rel = f"{name}/{fname}"
+            st = os.stat(os.path.join(folder, fname))
+            stamp = f"{st.st_size}:{st.st_mtime_ns}"
+            cached = cache.get(rel)
+            if cached and cached[0] == stamp:
+                sha = cached[1]
+            else:
+                sha = sha256_file(os.path.join(folder, fname))
+                hashed += 1
+            fresh_cache[rel] = [stamp, sha]
+            found[rel] = (sha, name)
+    _atomic_write_json(_stat_cache_path(manifest_path), fresh_cache)
+    logger.info(f"📇 Scanned {len(found)} images under {root} ({hashed} hashed)")
+    return found
+
+
+# ===============================
+# MANIFEST
+# ===============================
+def load(manifest_path=DEFAULT_MANIFEST):
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    if manifest.get("version") != MANIFEST_VERSION:
+        raise ValueError(f"Unsupported manifest version in {manifest_path}: {manifest.get('version')}")
+    return manifest
+
+
+def save(manifest, manifest_path=DEFAULT_MANIFEST):
+    _atomic_write_json(manifest_path, manifest)
+
+
+def _assign_new(entries, new_entries, test_size, seed):
+    """
+    Place new entries class by class so the test share of each class ends
+    up as close as possible to ``test_size``; existing entries never move.
+    """
+    by_class = {}
+    for e in entries:
+        counts = by_class.setdefault(e["class"], {TRAIN: 0, TEST: 0})
+        counts[e["split"]] += 1
+    for e in sorted(new_entries, key=lambda e: _rank(e["sha256"], seed, "split")):
+        counts = by_class.setdefault(e["class"], {TRAIN: 0, TEST: 0})
+        total = counts[TRAIN] + counts[TEST] + 1
+        e["split"] = TEST if counts[TEST] < round(total * test_size) else TRAIN
+        counts[e["split"]] += 1
+
+
+def update(root, manifest_path=DEFAULT_MANIFEST, test_size=0.2, seed=42):
+    """
+    Create or incrementally refresh the manifest for ``root`` and save it.
+    Returns (manifest, {"added": n, "removed": n, "kept": n}).
+    """
+    if os.path.exists(manifest_path):
+        manifest = load(manifest_path)
+        test_size, seed = manifest["test_size"], manifest["seed"]
+        old = manifest["entries"]
+    else:
+        rel_root = os.path.relpath(os.path.abspath(root), BASE_DIR)
+        manifest = {"version": MANIFEST_VERSION,
+                    "root": os.path.abspath(root) if rel_root.startswith("..") else rel_root,
+                    "test_size": test_size, "seed": seed}
+        old = []
+
+    found = scan(root, manifest_path)
+    # Carry splits over by content, so renamed/moved files keep their side
+    split_by_sha = {e["sha256"]: e["split"] for e in old}
+
+    kept, new = [], []
+    for rel, (sha, class_name) in found.items():
+        entry = {"path": rel, "sha256": sha, "class": class_name}
+        if sha in split_by_sha:
+            entry["split"] = split_by_sha[sha]
+            kept.append(entry)
+        else:
+            new.append(entry)
+    _assign_new(kept, new, test_size, seed)
+
+    classes = sorted({e["class"] for e in kept + new})
+    entries = sorted(kept + new, key=lambda e: e["path"])
+    for e in entries:
+        e["label"] = classes.index(e["class"])
+
+    manifest["classes"] = classes
+    manifest["entries"] = entries
+    save(manifest, manifest_path)
+
+    changes = {
+        "added": len(new),
+        "removed": len(set(split_by_sha) - {sha for sha, _ in found.values()}),
+        "kept": len(kept),
+    }
+    logger.info(f"📇 Manifest {manifest_path}: {changes}")
+    return manifest, changes
+
+
+# ===============================
+# LOADERS
+# ===============================
+def root_of(manifest, root=None):
+    root = root or manifest["root"]
+    return root if os.path.isabs(root) else os.path.join(BASE_DIR, root)
+
+
+def split_files(manifest, split, root=None):
+    """
+    (absolute paths, labels) for one split, read straight from the index.
+    """
+    root = root_of(manifest, root)
+    entries = [e for e in manifest["entries"] if e["split"] == split]
+    return [os.path.join(root, e["path"]) for e in entries], [e["label"] for e in entries]
+
+
+def folds(manifest, k=5, split=TRAIN, seed=None, root=None):
+    """
+    k stratified folds over ``split`` as a list of ((train_paths, train_labels),
+    (val_paths, val_labels)). Fold membership depends only on content hashes
+    and the seed, so it is identical across machines and runs.
+    """
+    seed = manifest["seed"] if seed is None else seed
+    root = root_of(manifest, root)
+    fold_of = {}
+    by_class = {}
+    for e in manifest["entries"]:
+        if e["split"] == split:
+            by_class.setdefault(e["class"], []).append(e)
+    for members in by_class.values():
+        members.sort(key=lambda e: _rank(e["sha256"], seed, f"fold{k}"))
+        for i, e in enumerate(members):
+            fold_of[e["path"]] = i % k
+
+    entries = [e for e in manifest["entries"] if e["path"] in fold_of]
+    result = []
+    for fold in range(k):
+        train = [e for e in entries if fold_of[e["path"]] != fold]
+        val = [e for e in entries if fold_of[e["path"]] == fold]
+        result.append((
+            ([os.path.join(root, e["path"]) for e in train], [e["label"] for e in train]),
+            ([os.path.join(root, e["path"]) for e in val], [e["label"] for e in val]),
+        ))
+    return result
+
+
+def verify(manifest, root=None):
+    """
+    Paths whose content no longer matches the manifest (missing or changed).
+    """
+    root = root_of(manifest, root)
+    stale = []
+    for e in manifest["entries"]:
+        path = os.path.join(root, e["path"])
+        if not os.path.exists(path) or sha256_file(path) != e["sha256"]:
+            stale.append(e["path"])
+    return stale
@@ -0,0 +1,245 @@
+"""
+MRI image embeddings from the frozen MobileNetV2 trunk + global average
+pooling (1280-d), shared by fusion training and serving.
+
+Embeddings are computed in large batches and persisted in a compact,
+append-only float16 store keyed by the image's SHA-256, so a given image is
+embedded once no matter whether it arrives through training, offline jobs
+or an upload:
+
+    cache/embeddings/<BACKBONE_TAG>/embeddings.v2.f16
+        fixed-size records: 32-byte raw sha256 digest + 1280 x float16 (2.5 KB)
+
+(The digest is an opaque "V32" field: numpy "S" fields strip trailing NUL
+bytes, which made digests ending in 0x00 unreadable in the first format,
+embeddings.f16. That file is ignored and can be deleted.)
+
+Reads go through np.memmap; appends take an exclusive file lock where the
+platform supports it, so several server processes can share one store.
+"""
+
+import os
+import hashlib
+import logging
+import threading
+
+import numpy as np
+
+from . import features
+
+try:
+    import fcntl
+except ImportError:   # Windows: appends are serialized per process only
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EMBEDDING_DIM = 1280
+BACKBONE_TAG = "mobilenetv2_imagenet_gap_224"
+STORE_DIR = os.path.join(BASE_DIR, "cache", "embeddings", BACKBONE_TAG)
+BATCH_SIZE = 64
+
+
+# ===============================
+# STORE
+# ===============================
+class EmbeddingStore:
+    """
+    sha256 hex -> float16 vector, backed by one append-only record file.
+    """
+    def __init__(self, directory=STORE_DIR, dim=EMBEDDING_DIM):
+        self.path = os.path.join(directory, "embeddings.v2.f16")
+        self.dtype = np.dtype([("sha", "V32"), ("vec", "<f2", (dim,))])
+        self.dim = dim
+        self._lock = threading.Lock()
+        self._rows = {}
+        self._scanned = 0
+        self._records = None
+        self._size = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _refresh(self):
+        """
+        Re-map the file if another process (or thread) appended to it.
+        """
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        if size == self._size:
+            return
+        n = size // self.dtype.itemsize
+        self._records = np.memmap(self.path, dtype=self.dtype, mode="r", shape=(n,)) if n else None
+        for row in range(self._scanned, n):
+            self._rows.setdefault(self._records[row]["sha"].tobytes().hex(), row)
+        self._scanned = n
+        self._size = n * self.dtype.itemsize
+
+    def __len__(self):
+        with self._lock:
+            self._refresh()
+            return len(self._rows)
+
+    def __contains__(self, sha):
+        with self._lock:
+            self._refresh()
+            return sha in self._rows
+
+    def get_many(self, shas):
+        """
+        (float16 array (n, dim), boolean mask of found rows).
+        """
+        with self._lock:
+            self._refresh()
+            rows = [self._rows.get(sha, -1) for sha in shas]
+            out = np.zeros((len(shas), self.dim), dtype=np.float16)
+            found = np.array([r >= 0 for r in rows], dtype=bool)
+            if found.any():
+                out[found] = self._records["vec"][[r for r in rows if r >= 0]]
+            return out, found
+
+    def put_many(self, shas, vectors):
+        vectors = np.asarray(vectors, dtype=np.float16).reshape(len(shas), self.dim)
+        with self._lock:
+            self._refresh()
+            new = [(i, sha) for i, sha in enumerate(shas) if sha not in self._rows]
+            if not new:
+                return 0
+            records = np.empty(len(new), dtype=self.dtype)
+            records["sha"] = np.frombuffer(b"".join(bytes.fromhex(sha) for _, sha in new), dtype="V32")
+            records["vec"] = vectors[[i for i, _ in new]]
+            with open(self.path, "ab") as f:
+                if fcntl:
+                    fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    # Keep the file a whole number of records even if a
+                    # previous writer died mid-append
+                    f.truncate(os.fstat(f.fileno()).st_size // self.dtype.itemsize * self.dtype.itemsize)
+                    f.write(records.tobytes())
+                    f.flush()
+                finally:
+                    if fcntl:
+                        fcntl.flock(f, fcntl.LOCK_UN)
+            self._refresh()
+            return len(new)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = EmbeddingStore()
+        return _store
+
+
+# ===============================
+# BACKBONE
+# ===============================
+_backbone = None
+_backbone_lock = threading.Lock()
+
+
+def load_backbone(weights="imagenet"):
+    """
+    Frozen MobileNetV2 trunk + GAP as a graph function taking a uint8
+    (n, 224, 224, 3) batch; the [-1, 1] scaling MobileNetV2 expects is
+    folded in. Graph mode frees activations layer by layer (eager calls
+    hold ~5x the memory per image).
+    """
+    global _backbone
+    with _backbone_lock:
+        if _backbone is None:
+            import tensorflow as tf
+            from tensorflow.keras.applications import MobileNetV2
+
+            h, w = features.IMAGE_SIZE
+            trunk = MobileNetV2(weights=weights, include_top=False, input_shape=(h, w, 3), pooling="avg")
+            trunk.trainable = False
+
+            @tf.function(input_signature=[tf.TensorSpec((None, h, w, 3), tf.uint8)])
+            def infer(images):
+                x = tf.cast(images, tf.float32) / 127.5 - 1.0
+                return trunk(x, training=False)
+
+            _backbone = infer
+            logger.info(f"Embedding backbone loaded ({BACKBONE_TAG}, weights={weights})")
+        return _backbone
+
+
+def embed_arrays(images, batch_size=BATCH_SIZE):
+    """
+    float32 (n, 1280) embeddings for a (n, 224, 224, 3) uint8 batch.
+    """
+    images = np.asarray(images, dtype=np.uint8)
+    if len(images) == 0:
+        return np.zeros((0, EMBEDDING_DIM), dtype=np.float32)
+    infer = load_backbone()
+    out = [infer(images[start:start + batch_size]).numpy() for start in range(0, len(images), batch_size)]
+    return np.concatenate(out)
+
+
+# ===============================
+# CACHED ENTRY POINTS
+# ===============================
+def sha256_bytes(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def embed_by_sha(shas, load_image, batch_size=BATCH_SIZE, store=None):
+    """
+    Embeddings for ``shas`` (float16, (n, 1280)), computing only the ones
+    not yet stored. ``load_image(i)`` returns the uint8 image for shas[i].
+    """
+    store = store if store is not None else get_store()
+    vectors, found = store.get_many(shas)
+    missing = np.flatnonzero(~found)
+    if len(missing):
+        logger.info(f"Embedding {len(missing)} images ({int(found.sum())} cached)")
+    for start in range(0, len(missing), batch_size):
+        idx = missing[start:start + batch_size]
+        batch = np.stack([load_image(int(i)) for i in idx])
+        vecs = embed_arrays(batch, batch_size).astype(np.float16)
+        store.put_many([shas[i] for i in idx], vecs)
+        vectors[idx] = vecs
+    return vectors
+
+
+def embed_files(paths, shas=None, batch_size=BATCH_SIZE, store=None):
+    """
+    Embeddings for image files; pass ``shas`` when they are already known
+    (e.g. from a dataset manifest) to skip hashing.
+    """
+    if shas is None:
+        from .dataset_manifest import sha256_file
+        shas = [sha256_file(p) for p in paths]
+    return embed_by_sha(list(shas), lambda i: features.load_image_array(paths[i]), batch_size, store)
+
+
+def embed_packed(packed, batch_size=BATCH_SIZE, store=None):
+    """
+    Embeddings for every row of an image_shards.PackedImageDataset, in row
+    order, reading images from the memory-mapped shards.
+    """
+    shas = []
+    for e in packed.entries:
+        sha = e.get("sha256")
+        if sha is None:
+            from .dataset_manifest import sha256_file
+            sha = sha256_file(e["path"])
+        shas.append(sha)
+    return embed_by_sha(shas, packed.row, batch_size, store)
+
+
+def embed_image_file(path, sha=None):
+    """
+    (1, 1280) float32 embedding for a single upload, served from the store
+    when the same image was seen before. Pass the upload's ``sha`` when it
+    is already known to skip re-reading and hashing the file.
+    """
+    if sha is None:
+        with open(path, "rb") as f:
+            sha = sha256_bytes(f.read())
+    vectors = embed_by_sha([sha], lambda i: features.load_image_array(path))
+    return vectors.astype(np.float32)
@@ -0,0 +1,204 @@
+"""
+Content-addressed feature cache shared by the training scripts.
+
+Each file's features are stored once under cache/features/<extractor>/ by
+the SHA-256 of the file, so renames and re-runs never recompute. A dataset
+is then materialized as ordered, memory-mappable .npy shards plus an index:
+
+    cache/features/<extractor>/shards/<name>/
+        features-00000.npy  labels.npy  index.json
+
+Only files whose content is new are extracted, in a process pool. No
+Django/TensorFlow imports here so training scripts and workers stay light.
+"""
+
+import os
+import json
+import hashlib
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+from . import features
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_DIR = os.path.join(BASE_DIR, "cache", "features")
+SHARD_ROWS = 65536
+
+
+def _praat40(path):
+    return features.extract_raw_audio_features(path)[0]
+
+
+# name -> (callable(path) -> np.ndarray, accepted extensions). Workers look
+# extractors up by name, so new ones must be added here at import time.
+EXTRACTORS = {
+    "praat40": (_praat40, features.AUDIO_EXTENSIONS),
+    "mfcc40x173": (features.extract_mfcc, features.AUDIO_EXTENSIONS),
+}
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _object_path(cache_dir, extractor, sha):
+    return os.path.join(cache_dir, extractor, sha[:2], f"{sha}.npy")
+
+
+def _shard_dir(cache_dir, extractor, name):
+    return os.path.join(cache_dir, extractor, "shards", name)
+
+
+def _extract_one(job):
+    """
+    Worker entry point: extract and persist one file. Returns (sha, error).
+    """
+    cache_dir, extractor, path, sha = job
+    try:
+        fn, _ = EXTRACTORS[extractor]
+        arr = np.asarray(fn(path), dtype=np.float32)
+        out = _object_path(cache_dir, extractor, sha)
+        os.makedirs(os.path.dirname(out), exist_ok=True)
+        tmp = f"{out}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            np.save(f, arr)
+        os.replace(tmp, out)
+        return sha, None
+    except Exception as e:
+        return sha, f"{path}: {e}"
+
+
+def labelled_files(root, classes, extensions):
+    """
+    (path, label) pairs for root/<class>/* with label = index in ``classes``.
+    """
+    items = []
+    for label, folder in enumerate(classes):
+        folder_path = os.path.join(root, folder)
+        if not os.path.isdir(folder_path):
+            continue
+        for name in sorted(os.listdir(folder_path)):
+            if name.lower().endswith(extensions):
+                items.append((os.path.join(folder_path, name), label))
+    return items
+
+
+def _hash_all(items, previous):
+    """
+    Reuse hashes from the previous index when size+mtime are unchanged.
+    """
+    def one(path):
+        st = os.stat(path)
+        stamp = [st.st_size, st.st_mtime_ns]
+        prev = previous.get(path)
+        if prev and prev["stamp"] == stamp:
+            return path, prev["sha"], stamp
+        return path, file_sha256(path), stamp
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        return list(pool.map(one, [p for p, _ in items]))
+
+
+def materialize(items, extractor, name, workers=None, shard_rows=SHARD_ROWS, cache_dir=None):
+    """
+    Ensure features for ``items`` [(path, label), ...] exist and are packed
+    into shards for dataset ``name``. Returns the shard directory.
+    """
+    if extractor not in EXTRACTORS:
+        raise KeyError(f"Unknown extractor {extractor!r}; known: {sorted(EXTRACTORS)}")
+    cache_dir = cache_dir or CACHE_DIR
+    shard_dir = _shard_dir(cache_dir, extractor, name)
+    index_path = os.path.join(shard_dir, "index.json")
+    previous = {}
+    if os.path.exists(index_path):
+        with open(index_path) as f:
+            previous = {e["path"]: e for e in json.load(f)["entries"]}
+
+    hashed = _hash_all(items, previous)
+    missing = sorted({sha for _, sha, _ in hashed if not os.path.exists(_object_path(cache_dir, extractor, sha))})
+    sha_to_path = {sha: path for path, sha, _ in hashed}
+
+    failed = set()
+    if missing:
+        logger.info(f"Extracting {len(missing)} new files with {extractor} ({len(hashed) - len(missing)} cached)")
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), mp_context=ctx) as pool:
+            jobs = [(cache_dir, extractor, sha_to_path[sha], sha) for sha in missing]
+            for sha, err in pool.map(_extract_one, jobs, chunksize=8):
+                if err:
+                    failed.add(sha)
+                    logger.warning(f"Feature extraction failed for {err}")
+
+    labels = dict(items)
+    entries = [
+        {"path": path, "sha": sha, "stamp": stamp, "label": int(labels[path])}
+        for path, sha, stamp in hashed if sha not in failed
+    ]
+    order = [(e["sha"], e["label"]) for e in entries]
+    if not missing and previous and [(e["sha"], e["label"]) for e in previous.values()] == order:
+        return shard_dir   # nothing changed since the last pack
+
+    os.makedirs(shard_dir, exist_ok=True)
+    for old in os.listdir(shard_dir):
+        if old.startswith("features-"):
+            os.remove(os.path.join(shard_dir, old))
+    shards = []
+    for i, start in enumerate(range(0, len(entries), shard_rows)):
+        chunk = entries[start:start + shard_rows]
+        arr = np.stack([np.load(_object_path(cache_dir, extractor, e["sha"])) for e in chunk])
+        fname = f"features-{i:05d}.npy"
+        np.save(os.path.join(shard_dir, fname), arr)
+        shards.append({"file": fname, "rows": len(chunk)})
+    np.save(os.path.join(shard_dir, "labels.npy"), np.array([e["label"] for e in entries], dtype=np.int64))
+    with open(index_path + ".tmp", "w") as f:
+        json.dump({"extractor": extractor, "shards": shards, "entries": entries}, f)
+    os.replace(index_path + ".tmp", index_path)
+    return shard_dir
+
+
+def materialize_directory(root, classes, extractor, name=None, workers=None, cache_dir=None):
+    _, extensions = EXTRACTORS[extractor]
+    items = labelled_files(root, classes, extensions)
+    return materialize(
+        items, extractor, name or os.path.basename(os.path.normpath(root)), workers=workers, cache_dir=cache_dir
+    )
+
+
+def load_features(shard_dir, mmap_mode="r"):
+    """
+    (X, y) for a materialized dataset. A single shard is returned as a
+    read-only memmap (no copy); multiple shards are concatenated.
+    """
+    with open(os.path.join(shard_dir, "index.json")) as f:
+        index = json.load(f)
+    parts = [np.load(os.path.join(shard_dir, s["file"]), mmap_mode=mmap_mode) for s in index["shards"]]
+    y = np.load(os.path.join(shard_dir, "labels.npy"))
+    if not parts:
+        return np.empty((0,)), y
+    X = parts[0] if len(parts) == 1 else np.concatenate(parts)
+    return X, y
+
+
+def take_by_sha(shard_dir, shas):
+    """
+    Rows of a materialized dataset in the order of ``shas`` (source file
+    SHA-256s), for aligning with arrays built elsewhere. Raises KeyError
+    naming the hashes that were not materialized.
+    """
+    with open(os.path.join(shard_dir, "index.json")) as f:
+        entries = json.load(f)["entries"]
+    index = {e["sha"]: i for i, e in enumerate(entries)}
+    missing = [sha for sha in shas if sha not in index]
+    if missing:
+        raise KeyError(f"{len(missing)} rows not materialized in {shard_dir}, e.g. {missing[0][:12]}")
+    X, _ = load_features(shard_dir)
+    return np.asarray(X[np.array([index[sha] for sha in shas], dtype=np.int64)])
@@ -0,0 +1,159 @@
+"""
+Model-free feature extraction shared by the API, offline scoring and
+training scripts. Deliberately imports no TensorFlow/Django so it is cheap
+to load in worker processes.
+"""
+
+import logging
+
+import numpy as np
+from PIL import Image
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+AUDIO_FEATURE_DIM = 40
+IMAGE_SIZE = (224, 224)
+
+AUDIO_EXTENSIONS = (".wav", ".flac", ".ogg", ".mp3")
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff")
+
+
+# ===============================
+# AUDIO
+# ===============================
+def compute_pitch_stats(sound):
+    from parselmouth.praat import call
+    try:
+        pitch = call(sound, "To Pitch", 0.0, 75, 600)
+        values = pitch.selected_array["frequency"]
+        values = values[values != 0]
+        if len(values) == 0:
+            return np.nan, np.nan, np.nan
+        return float(np.mean(values)), float(np.max(values)), float(np.min(values))
+    except Exception:
+        return np.nan, np.nan, np.nan
+
+
+def extract_parselmouth_measures(sound):
+    from parselmouth.praat import call
+    try:
+        point_process = call(sound, "To PointProcess (periodic, cc)", 75, 600)
+    except Exception:
+        point_process = None
+
+    jitter_local = shimmer_local = np.nan
+    hnr = nhr = np.nan
+
+    if point_process is not None:
+        try:
+            jitter_local = call(point_process, "Get jitter (local)", 0, 0, 0.0001, 0.02, 1.3)
+            shimmer_local = call([sound, point_process], "Get shimmer (local)", 0, 0, 0.0001, 0.02, 1.3, 1.6)
+        except Exception:
+            pass
+
+    try:
+        harmonicity = call(sound, "To Harmonicity (cc)", 0.01, 75, 0.1, 1.0)
+        hnr_val = call(harmonicity, "Get mean", 0, 0)
+        hnr = float(hnr_val)
+        nhr = float(10 ** (-hnr / 10.0))
+    except Exception:
+        pass
+
+    return {"jitter_local": jitter_local, "shimmer_local": shimmer_local, "hnr": hnr, "nhr": nhr}
+
+
+def extract_raw_audio_features(file_path, sr=22050):
+    """
+    Unscaled (1, 40) Praat feature vector, or None for an empty recording.
+    """
+    import librosa
+    import parselmouth
+
+    with metrics.stage("audio_decode"):
+        y, sr = librosa.load(file_path, sr=sr, mono=True)
+    if y.size == 0:
+        return None
+    with metrics.stage("praat"):
+        sound = parselmouth.Sound(y, sampling_frequency=sr)
+        fo_mean, fo_max, fo_min = compute_pitch_stats(sound)
+        measures = extract_parselmouth_measures(sound)
+    feature_vector = [
+        fo_mean,
+        fo_max,
+        fo_min,
+        measures.get("jitter_local", 0),
+        measures.get("shimmer_local", 0),
+        measures.get("hnr", 0),
+        measures.get("nhr", 0),
+    ]
+    feature_vector += [0.0] * (AUDIO_FEATURE_DIM - len(feature_vector))
+    return np.array(feature_vector).reshape(1, -1)
+
+
+def extract_mfcc(file_path, n_mfcc=40, max_len=173):
+    """
+    (n_mfcc, max_len) MFCC matrix, zero-padded or truncated along time.
+    """
+    import librosa
+
+    y, sr = librosa.load(file_path, sr=None)
+    mfcc = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=n_mfcc)
+    if mfcc.shape[1] < max_len:
+        mfcc = np.pad(mfcc, pad_width=((0, 0), (0, max_len - mfcc.shape[1])), mode="constant")
+    else:
+        mfcc = mfcc[:, :max_len]
+    return mfcc
+
+
+# ===============================
+# IMAGE
+# ===============================
+REDUCING_GAP = 3.0   # Pillow: integer pre-reduction this far above the target is visually exact
+
+
+def image_to_array(img, size=IMAGE_SIZE):
+    """
+    RGB uint8 (h, w, 3) array of a not yet loaded PIL image, resized for the CNN.
+
+    Large inputs are never decoded at full size when avoidable: JPEGs are
+    DCT-scaled while decoding (draft mode) and other formats are box-reduced
+    by an integer factor before the final resample. L/RGB images are resized
+    before the RGB conversion, so the full-size image is never copied.
+    Pixel values stay 0-255; the served image model folds in the 1/255
+    scaling (see utils).
+    """
+    if img.format == "JPEG":
+        img.draft("RGB", size)
+    if img.mode in ("L", "RGB"):
+        img = img.resize(size, reducing_gap=REDUCING_GAP).convert("RGB")
+    else:
+        img = img.convert("RGB").resize(size, reducing_gap=REDUCING_GAP)
+    return np.asarray(img, dtype=np.uint8)
+
+
+def load_image_array(path_or_file, size=IMAGE_SIZE):
+    """
+    RGB uint8 array resized for the CNN (see image_to_array).
+    """
+    with Image.open(path_or_file) as img:
+        return image_to_array(img, size)
+
+
+# ===============================
+# MODEL OUTPUTS
+# ===============================
+def prediction_labels(pred):
+    """
+    (labels, probabilities) for a batch of Keras model outputs, the one rule
+    used by serving, batch scoring and the evaluation gate. A single sigmoid
+    unit is thresholded at 0.5 and its output (the positive-class
+    probability) kept; wider outputs take the argmax and that class's
+    probability.
+    """
+    pred = np.asarray(pred, dtype=np.float64).reshape(len(pred), -1)
+    if pred.shape[1] == 1:
+        return (pred[:, 0] >= 0.5).astype(int), pred[:, 0]
+    labels = np.argmax(pred, axis=1)
+    return labels, pred[np.arange(len(pred)), labels]
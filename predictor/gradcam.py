@@ -0,0 +1,122 @@
+"""
+Grad-CAM saliency maps for the MRI CNN.
+
+The map comes out of the prediction itself: one GradientTape pass returns
+the class scores and the last convolution's activations, and the gradient
+of the predicted class score w.r.t. those activations weights them into the
+map. There is no second forward run. The map is upsampled, coloured through
+a 256-entry colormap lookup table (one vectorized gather), blended over the
+224x224 input; the PNG is kept in the report store
+(report_store.save_heatmap) under the report TTL, so a repeated image
+(same model set) within that window never recomputes it.
+"""
+
+import io
+import logging
+import threading
+import weakref
+
+import numpy as np
+import tensorflow as tf
+from PIL import Image
+from tensorflow.keras import Input, Model
+from tensorflow.keras.layers import Conv2D
+from tensorflow.keras.models import Sequential
+
+logger = logging.getLogger(__name__)
+
+OVERLAY_ALPHA = 0.4
+COLORMAP = "jet"
+
+_passes = weakref.WeakKeyDictionary()   # model -> compiled prediction + CAM pass (or None)
+_passes_lock = threading.Lock()
+_lut = None
+
+
+# ===============================
+# PREDICTION + CAM PASS
+# ===============================
+def _build_pass(model):
+    conv = next((layer for layer in reversed(model.layers) if isinstance(layer, Conv2D)), None)
+    if conv is None:
+        logger.warning(f"No Conv2D layer in {model.name}; Grad-CAM disabled for it")
+        return None
+    if isinstance(model, Sequential):
+        # Keras 3 Sequential models loaded from disk have no symbolic
+        # outputs; re-trace the same (shared-weight) layers
+        x = inputs = Input(model.input_shape[1:])
+        for layer in model.layers:
+            x = layer(x)
+            if layer is conv:
+                activations = x
+        grad_model = Model(inputs, [activations, x])
+    else:
+        grad_model = Model(model.inputs, [conv.output, model.outputs[0]])
+
+    @tf.function(reduce_retracing=True)
+    def run(batch):
+        with tf.GradientTape() as tape:
+            activations, preds = grad_model(batch, training=False)
+            # the predicted class's score, labelled as features.prediction_labels does
+            if preds.shape[-1] == 1:
+                score = tf.where(preds[:, 0] >= 0.5, preds[:, 0], 1.0 - preds[:, 0])
+            else:
+                label = tf.argmax(preds, axis=1)
+                score = tf.gather(preds, label, axis=1, batch_dims=1)
+        grads = tape.gradient(score, activations)
+        weights = tf.reduce_mean(grads, axis=(1, 2), keepdims=True)
+        cam = tf.nn.relu(tf.reduce_sum(activations * weights, axis=-1))
+        return preds, cam
+
+    return run
+
+
+def _get_pass(model):
+    try:
+        return _passes[model]
+    except KeyError:
+        with _passes_lock:
+            if model not in _passes:
+                _passes[model] = _build_pass(model)
+            return _passes[model]
+
+
+def supports(model):
+    return model is not None and _get_pass(model) is not None
+
+
+def predict_with_cam(model, batch):
+    """
+    (predictions, cams) for a float32 batch in one forward/backward pass:
+    the same scores model.predict gives, plus one (h, w) map per row for
+    the predicted class, scaled to 0..1.
+    """
+    preds, cam = _get_pass(model)(tf.convert_to_tensor(batch))
+    cam = cam.numpy()
+    peak = cam.max(axis=(1, 2), keepdims=True)
+    return preds.numpy(), np.divide(cam, peak, out=np.zeros_like(cam), where=peak > 0)
+
+
+# ===============================
+# RENDERING
+# ===============================
+def _colormap_lut():
+    global _lut
+    if _lut is None:
+        from matplotlib import colormaps
+        _lut = (colormaps[COLORMAP](np.linspace(0.0, 1.0, 256))[:, :3] * 255).astype(np.float32)
+    return _lut
+
+
+def render_overlay(pixels, cam, alpha=OVERLAY_ALPHA):
+    """
+    PNG bytes of the colour-mapped ``cam`` blended over ``pixels``
+    ((h, w, 3) uint8).
+    """
+    h, w = pixels.shape[:2]
+    upsampled = np.asarray(Image.fromarray(cam.astype(np.float32), mode="F").resize((w, h), Image.BILINEAR))
+    colored = _colormap_lut()[np.clip(upsampled * 255.0, 0, 255).astype(np.uint8)]
+    blended = pixels * (1.0 - alpha) + colored * alpha
+    buf = io.BytesIO()
+    Image.fromarray(blended.astype(np.uint8)).save(buf, format="PNG", compress_level=1)
+    return buf.getvalue()
@@ -0,0 +1,237 @@
+"""
+Packed image shards: a directory of small PNG/JPEG files converted into a
+few contiguous, pre-resized uint8 .npy arrays plus an index, so training and
+offline scoring read batches from memory-mapped pages instead of opening
+and decoding one file per sample.
+
+    cache/image_shards/<name>/
+        images-00000.npy   (rows, H, W, 3) uint8
+        labels.npy         (n,) int64
+        index.json         image size, shard table, per-row path/label/split
+
+Re-packing is incremental: rows for files whose size/mtime are unchanged
+are copied from the previous shards; only new or changed files are decoded,
+in a thread pool. No Django/TensorFlow imports.
+"""
+
+import os
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from . import features
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_DIR = os.path.join(BASE_DIR, "cache", "image_shards")
+SHARD_ROWS = 2048
+
+
+def _decode(job):
+    """
+    Returns (position, uint8 array or None, error).
+    """
+    pos, path, size = job
+    try:
+        return pos, features.load_image_array(path, tuple(size)), None
+    except Exception as e:
+        return pos, None, f"{path}: {e}"
+
+
+def _stamp(path):
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns]
+
+
+def _read_index(out_dir):
+    try:
+        with open(os.path.join(out_dir, "index.json")) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+# ===============================
+# PACKING
+# ===============================
+def pack(items, out_dir, image_size=features.IMAGE_SIZE, shard_rows=SHARD_ROWS, workers=None):
+    """
+    Pack ``items`` [{"path", "label", optional "split"/"sha256"}, ...] into shards
+    under ``out_dir``. Returns out_dir.
+    """
+    image_size = list(image_size)
+    entries = [
+        {"path": it["path"], "label": int(it["label"]), "split": it.get("split"),
+         "sha256": it.get("sha256"), "stamp": _stamp(it["path"])}
+        for it in items
+    ]
+
+    previous = _read_index(out_dir)
+    reusable = {}
+    if previous and previous["image_size"] == image_size:
+        if [(e["path"], e["stamp"], e["label"], e["split"]) for e in previous["entries"]] == \
+                [(e["path"], e["stamp"], e["label"], e["split"]) for e in entries]:
+            return out_dir   # nothing changed since the last pack
+        old = PackedImageDataset(out_dir)
+        for row, e in enumerate(previous["entries"]):
+            reusable[(e["path"], tuple(e["stamp"]))] = (old, row)
+
+    to_decode = [
+        (pos, e["path"], image_size) for pos, e in enumerate(entries)
+        if (e["path"], tuple(e["stamp"])) not in reusable
+    ]
+    logger.info(f"📦 Packing {len(entries)} images into {out_dir} ({len(to_decode)} to decode)")
+
+    # Decoded rows go straight into a disk-backed staging array, so memory
+    # stays flat however many files are new
+    os.makedirs(out_dir, exist_ok=True)
+    staging_path = os.path.join(out_dir, ".staging.tmp")
+    staging = np.lib.format.open_memmap(
+        staging_path, mode="w+", dtype=np.uint8, shape=(max(len(to_decode), 1), *image_size, 3)
+    )
+    staged, failed = {}, set()
+    if to_decode:
+        def decode_into(slot_job):
+            slot, job = slot_job
+            pos, arr, err = _decode(job)
+            if arr is not None:
+                staging[slot] = arr
+            return slot, pos, err
+
+        # Threads, not processes: PIL releases the GIL while decoding/resizing,
+        # and the unguarded training scripts that call this can't be re-imported
+        with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+            for slot, pos, err in pool.map(decode_into, enumerate(to_decode)):
+                if err:
+                    failed.add(pos)
+                    logger.warning(f"Could not decode {err}")
+                else:
+                    staged[pos] = slot
+
+    kept = [(pos, e) for pos, e in enumerate(entries) if pos not in failed]
+    shards = []
+    for i, start in enumerate(range(0, len(kept), shard_rows)):
+        chunk = kept[start:start + shard_rows]
+        fname = f"images-{i:05d}.npy"
+        tmp = os.path.join(out_dir, f".{fname}.tmp")
+        arr = np.lib.format.open_memmap(tmp, mode="w+", dtype=np.uint8, shape=(len(chunk), *image_size, 3))
+        for row, (pos, e) in enumerate(chunk):
+            if pos in staged:
+                arr[row] = staging[staged[pos]]
+            else:
+                old, old_row = reusable[(e["path"], tuple(e["stamp"]))]
+                arr[row] = old.row(old_row)
+        arr.flush()
+        del arr
+        shards.append({"file": fname, "rows": len(chunk), "tmp": tmp})
+
+    del staging
+    os.remove(staging_path)
+
+    # Swap in the new shards only after every row has been written
+    for s in shards:
+        os.replace(s.pop("tmp"), os.path.join(out_dir, s["file"]))
+    live = {s["file"] for s in shards}
+    for name in os.listdir(out_dir):
+        if name.startswith("images-") and name not in live:
+            os.remove(os.path.join(out_dir, name))
+
+    rows = [e for _, e in kept]
+    np.save(os.path.join(out_dir, "labels.npy"), np.array([e["label"] for e in rows], dtype=np.int64))
+    index_path = os.path.join(out_dir, "index.json")
+    with open(index_path + ".tmp", "w") as f:
+        json.dump({"image_size": image_size, "shards": shards, "entries": rows}, f)
+    os.replace(index_path + ".tmp", index_path)
+    return out_dir
+
+
+def pack_directory(root, out_dir=None, image_size=features.IMAGE_SIZE, workers=None):
+    """
+    Pack root/<class>/* with labels in alphabetical class order.
+    """
+    classes = sorted(d for d in os.listdir(root) if os.path.isdir(os.path.join(root, d)))
+    items = []
+    for label, name in enumerate(classes):
+        folder = os.path.join(root, name)
+        for fname in sorted(os.listdir(folder)):
+            if fname.lower().endswith(features.IMAGE_EXTENSIONS):
+                items.append({"path": os.path.join(folder, fname), "label": label})
+    out_dir = out_dir or os.path.join(CACHE_DIR, os.path.basename(os.path.normpath(root)))
+    return pack(items, out_dir, image_size, workers=workers)
+
+
+def pack_manifest(manifest, out_dir=None, image_size=features.IMAGE_SIZE, workers=None):
+    """
+    Pack the images listed in a dataset manifest, keeping each row's split.
+    """
+    from . import dataset_manifest
+
+    root = dataset_manifest.root_of(manifest)
+    items = [
+        {"path": os.path.join(root, e["path"]), "label": e["label"], "split": e["split"], "sha256": e["sha256"]}
+        for e in manifest["entries"]
+    ]
+    out_dir = out_dir or os.path.join(CACHE_DIR, os.path.basename(os.path.normpath(manifest["root"])))
+    return pack(items, out_dir, image_size, workers=workers)
+
+
+# ===============================
+# LOADING
+# ===============================
+class PackedImageDataset:
+    """
+    Read-only view over packed shards. ``images`` is a memmap when there is
+    a single shard; batches are gathered per shard with one fancy index.
+    """
+    def __init__(self, shard_dir, mmap_mode="r"):
+        self.shard_dir = shard_dir
+        index = _read_index(shard_dir)
+        if index is None:
+            raise FileNotFoundError(f"No packed image index in {shard_dir}")
+        self.image_size = tuple(index["image_size"])
+        self.entries = index["entries"]
+        self.labels = np.load(os.path.join(shard_dir, "labels.npy"))
+        self._shards = [np.load(os.path.join(shard_dir, s["file"]), mmap_mode=mmap_mode) for s in index["shards"]]
+        self._starts = np.cumsum([0] + [s["rows"] for s in index["shards"]])
+
+    def __len__(self):
+        return len(self.entries)
+
+    @property
+    def images(self):
+        if len(self._shards) == 1:
+            return self._shards[0]
+        return np.concatenate(self._shards) if self._shards else np.empty((0, *self.image_size, 3), np.uint8)
+
+    def row(self, i):
+        s = int(np.searchsorted(self._starts, i, side="right") - 1)
+        return self._shards[s][i - self._starts[s]]
+
+    def indices(self, split=None):
+        if split is None:
+            return np.arange(len(self.entries))
+        return np.array([i for i, e in enumerate(self.entries) if e.get("split") == split], dtype=np.int64)
+
+    def take(self, idx):
+        """
+        (uint8 images, labels) for row indices ``idx``, in the given order.
+        """
+        idx = np.asarray(idx, dtype=np.int64)
+        out = np.empty((len(idx), *self.image_size, 3), dtype=np.uint8)
+        shard_of = np.searchsorted(self._starts, idx, side="right") - 1
+        for s in np.unique(shard_of):
+            mask = shard_of == s
+            rows = idx[mask] - self._starts[s]
+            order = np.argsort(rows)   # ascending reads are page-cache friendly
+            out[np.flatnonzero(mask)[order]] = self._shards[s][rows[order]]
+        return out, self.labels[idx]
+
+    def iter_batches(self, batch_size=32, split=None, shuffle=False, seed=None, rows=None):
+        idx = self.indices(split) if rows is None else np.asarray(rows, dtype=np.int64)
+        if shuffle:
+            idx = np.random.default_rng(seed).permutation(idx)
+        for start in range(0, len(idx), batch_size):
+            yield self.take(idx[start:start + batch_size])
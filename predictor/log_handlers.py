@@ -0,0 +1,28 @@
+"""
+Logging handlers that keep stream I/O off the request path.
+
+AsyncStreamHandler formats the record in the calling thread and hands it to
+a QueueListener thread, which does the actual (possibly blocking) write to
+stderr/stdout. Wired up in settings.LOGGING.
+"""
+
+import sys
+import queue
+import atexit
+import logging
+import logging.handlers
+
+
+class AsyncStreamHandler(logging.handlers.QueueHandler):
+    def __init__(self, stream=None):
+        super().__init__(queue.SimpleQueue())
+        target = logging.StreamHandler(stream or sys.stderr)
+        self.listener = logging.handlers.QueueListener(self.queue, target)
+        self.listener.start()
+        atexit.register(self.close)
+
+    def close(self):
+        listener, self.listener = self.listener, None
+        if listener is not None:
+            listener.stop()   # drains the queue before returning
+        super().close()
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from predictor import bulk_reports
+
+
+class Command(BaseCommand):
+    help = "Render reports for stored predictions into a single zip archive."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--ids", nargs="*", type=int, default=[], help="Prediction ids")
+        parser.add_argument("--ids-file", help="File with one prediction id per line")
+        parser.add_argument("--out", required=True, help="Output .zip path")
+        parser.add_argument("--window", type=int, default=None, help="Max documents in flight")
+
+    def handle(self, *args, **options):
+        ids = list(options["ids"])
+        if options["ids_file"]:
+            with open(options["ids_file"]) as f:
+                ids += [int(line) for line in f if line.strip()]
+        if not ids:
+            raise CommandError("No prediction ids given (use --ids or --ids-file)")
+
+        queryset = bulk_reports.prediction_queryset(ids)
+        found = queryset.count()
+        if found != len(set(ids)):
+            self.stderr.write(f"⚠️ {len(set(ids)) - found} prediction ids not found; skipping them")
+
+        with open(options["out"], "wb") as out:
+            for chunk in bulk_reports.iter_zip(bulk_reports.iter_jobs(queryset), window=options["window"]):
+                out.write(chunk)
+        self.stdout.write(self.style.SUCCESS(f"✅ Wrote {found} reports to {options['out']}"))
@@ -0,0 +1,79 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from predictor import model_registry
+
+
+class Command(BaseCommand):
+    help = "List, register, activate, roll back, verify or shadow-test versioned model artifact sets."
+
+    def add_arguments(self, parser):
+        sub = parser.add_subparsers(dest="action", required=True)
+        sub.add_parser("list", help="Registered versions (* = CURRENT, c = CANDIDATE)")
+        register = sub.add_parser("register", help="Register artifacts from a directory as a new version")
+        register.add_argument("directory", nargs="?", default=model_registry.LEGACY_DIR,
+                              help="Directory holding any of the artifact files (default: repo root)")
+        register.add_argument("--note", default="", help="Free-form note stored in the manifest")
+        register.add_argument("--activate", action="store_true", help="Make it CURRENT right away")
+        activate = sub.add_parser("activate", help="Point CURRENT at a version")
+        activate.add_argument("version")
+        sub.add_parser("rollback", help="Re-activate the version the current one replaced")
+        candidate = sub.add_parser("candidate", help="Shadow/canary-test a version against CURRENT")
+        candidate.add_argument("version", nargs="?", default=None)
+        candidate.add_argument("--clear", action="store_true")
+        verify = sub.add_parser("verify", help="Re-check artifact checksums")
+        verify.add_argument("version", nargs="?", default=None)
+
+    def handle(self, *args, **options):
+        try:
+            getattr(self, f"_{options['action']}")(options)
+        except model_registry.RegistryError as e:
+            raise CommandError(str(e))
+
+    def _list(self, options):
+        current = model_registry.current_version()
+        candidate = model_registry.candidate_version()
+        if current is None:
+            self.stdout.write(f"No CURRENT version; serving legacy files from {model_registry.LEGACY_DIR}")
+        for version in model_registry.versions():
+            manifest = model_registry.load_manifest(version)
+            marker = "*" if version == current else ("c" if version == candidate else " ")
+            note = manifest["metadata"].get("note") or manifest["metadata"].get("source") or ""
+            self.stdout.write(f"{marker} {version}  {', '.join(manifest['artifacts'])}  {note}")
+
+    def _register(self, options):
+        directory = options["directory"]
+        files = {name: path for name, path in model_registry.artifact_paths(directory).items() if os.path.exists(path)}
+        if not files:
+            raise CommandError(f"No model artifacts in {directory}")
+        version = model_registry.register(files, metadata={"source": os.path.abspath(directory), "note": options["note"]})
+        if options["activate"]:
+            model_registry.activate(version)
+        self.stdout.write(self.style.SUCCESS(f"✅ Registered {version}" + (" (CURRENT)" if options["activate"] else "")))
+
+    def _activate(self, options):
+        version = model_registry.activate(options["version"])
+        self.stdout.write(self.style.SUCCESS(f"✅ CURRENT → {version}; workers swap within {model_registry.POLL_INTERVAL:g}s"))
+
+    def _rollback(self, options):
+        version = model_registry.rollback()
+        self.stdout.write(self.style.SUCCESS(f"✅ Rolled back; CURRENT → {version}"))
+
+    def _candidate(self, options):
+        if options["clear"]:
+            model_registry.set_candidate(None)
+            self.stdout.write(self.style.SUCCESS("✅ CANDIDATE cleared"))
+            return
+        if not options["version"]:
+            self.stdout.write(f"CANDIDATE: {model_registry.candidate_version() or '-'}")
+            return
+        version = model_registry.set_candidate(options["version"])
+        self.stdout.write(self.style.SUCCESS(f"✅ CANDIDATE → {version} (shadowed/canaried per settings)"))
+
+    def _verify(self, options):
+        version = options["version"] or model_registry.current_version()
+        if version is None:
+            raise CommandError("No version given and no CURRENT version")
+        model_registry.verify(version)
+        self.stdout.write(self.style.SUCCESS(f"✅ {version}: all checksums match"))
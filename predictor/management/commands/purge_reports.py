@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from predictor import report_store
+
+
+class Command(BaseCommand):
+    help = "Delete generated PDF reports and Grad-CAM heatmaps older than the TTL from the report store and MEDIA_ROOT."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--max-age", type=int, default=None,
+            help="Age in seconds (defaults to REPORT_TTL_SECONDS)",
+        )
+
+    def handle(self, *args, **options):
+        removed = report_store.purge_expired(max_age=options["max_age"])
+        self.stdout.write(self.style.SUCCESS(f"✅ Removed {removed} expired reports"))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from predictor import stats
+
+
+class Command(BaseCommand):
+    help = "Recompute materialized daily prediction rollups (run from cron, e.g. every 15 minutes)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=2, help="Number of closed days to recompute")
+
+    def handle(self, *args, **options):
+        count = stats.refresh_daily_rollups(days=options["days"])
+        self.stdout.write(self.style.SUCCESS(f"✅ Refreshed {count} rollup rows"))
@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from predictor import batch_scoring, utils
+
+
+class Command(BaseCommand):
+    help = (
+        "Score a directory of recordings and/or MRI slices offline. Results are appended "
+        "to CSV or Parquet and progress is checkpointed, so re-running resumes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("paths", nargs="*", help="Directories to walk, e.g. dataset/")
+        parser.add_argument("--packed", default=None, help="Score a packed image shard directory instead (pack_images.py)")
+        parser.add_argument("--out", required=True, help="results.csv, or a directory/.parquet for Parquet parts")
+        parser.add_argument("--format", choices=["csv", "parquet"], default=None)
+        parser.add_argument("--modality", choices=["auto", "audio", "image"], default="auto")
+        parser.add_argument("--batch-size", type=int, default=64)
+        parser.add_argument("--workers", type=int, default=None, help="Feature extraction processes")
+        parser.add_argument("--checkpoint", default=None, help="Defaults to <out>.checkpoint")
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be positive")
+        if bool(options["paths"]) == bool(options["packed"]):
+            raise CommandError("Give either directories to walk or --packed, not both")
+
+        def progress(done, total):
+            self.stdout.write(f"  scored {done}/{total}")
+
+        if options["packed"]:
+            scored, skipped = batch_scoring.score_packed(
+                options["packed"],
+                options["out"],
+                predict_image=utils.predict_image_batch,
+                batch_size=options["batch_size"],
+                checkpoint_path=options["checkpoint"],
+                fmt=options["format"],
+                progress=progress,
+            )
+            self.stdout.write(self.style.SUCCESS(f"✅ Scored {scored} images ({skipped} already done) → {options['out']}"))
+            return
+
+        scored, skipped = batch_scoring.score(
+            options["paths"],
+            options["out"],
+            predict_audio=utils.predict_audio_batch,
+            predict_image=utils.predict_image_batch,
+            modality=options["modality"],
+            batch_size=options["batch_size"],
+            workers=options["workers"],
+            checkpoint_path=options["checkpoint"],
+            fmt=options["format"],
+            progress=progress,
+        )
+        self.stdout.write(self.style.SUCCESS(f"✅ Scored {scored} files ({skipped} already done) → {options['out']}"))
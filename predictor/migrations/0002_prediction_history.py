@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:02
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('predictor', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyPredictionRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('prediction_type', models.CharField(max_length=50)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('positives', models.PositiveIntegerField(default=0)),
+                ('avg_probability', models.FloatField(blank=True, null=True)),
+                ('refreshed_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-day', 'prediction_type'],
+            },
+        ),
+        migrations.AddField(
+            model_name='parkinsonprediction',
+            name='user',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='predictions', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='parkinsonprediction',
+            index=models.Index(fields=['user', '-id'], name='prediction_user_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='parkinsonprediction',
+            index=models.Index(fields=['uploaded_at'], name='prediction_uploaded_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailypredictionrollup',
+            constraint=models.UniqueConstraint(fields=('day', 'prediction_type'), name='rollup_day_type_uniq'),
+        ),
+    ]
@@ -0,0 +1,418 @@
+"""
+Evaluation gate for model artifacts.
+
+Training scripts write a candidate artifact set to models/candidate/ instead
+of overwriting the deployed (registry CURRENT) files. Promotion then goes
+through this module (driven by evaluate_models.py):
+
+    candidate set = candidate files laid over the deployed set
+                    (exactly what would be served after promotion)
+    each changed component (audio, image, fusion) is scored on a frozen
+    holdout -> accuracy, single-row and batched latency, memory
+    any regression against the deployed set -> promotion refused
+    otherwise -> registered as a new model_registry version and activated
+
+The holdout (model_holdout.json) is frozen on first use: voice/MRI feature
+rows are identified by content hash, images by manifest sha256, so later
+dataset changes or re-ordering cannot move samples in or out of it.
+
+Each artifact set is evaluated in a fresh process so memory numbers and
+warm-up are not skewed by the other set. No Django imports.
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+import numpy as np
+
+from . import dataset_manifest, features, model_registry
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CANDIDATE_DIR = os.path.join(BASE_DIR, "models", "candidate")
+HOLDOUT_PATH = os.path.join(BASE_DIR, "model_holdout.json")
+HOLDOUT_VERSION = 1
+REPORT_NAME = "evaluation.json"
+
+VOICE_FEATURES = os.path.join(BASE_DIR, "voice_features.npy")
+MRI_FEATURES = os.path.join(BASE_DIR, "mri_features.npy")
+FEATURE_LABELS = os.path.join(BASE_DIR, "labels.npy")
+
+# component -> artifact files it is served from
+COMPONENTS = {
+    "audio": ("parkinsons_model.pkl", "scaler.pkl"),
+    "image": ("image_model.h5",),
+    "fusion": ("fusion_model.h5", "scaler.pkl"),
+}
+ARTIFACTS = model_registry.ARTIFACTS
+
+# Regression thresholds (candidate vs deployed)
+MAX_ACCURACY_DROP = 0.01        # absolute
+MAX_LATENCY_INCREASE = 0.20     # relative, single-row and batched p50
+MAX_MEMORY_INCREASE = 0.25      # relative, resident memory after load
+LATENCY_FLOOR_MS = 0.5          # differences below these are noise
+MEMORY_FLOOR_MB = 16.0
+
+LATENCY_CALLS = 50
+WARMUP_CALLS = 5
+BATCH_SIZE = 32
+
+
+# ===============================
+# FROZEN HOLDOUT
+# ===============================
+def _row_sha(row):
+    return hashlib.sha256(np.ascontiguousarray(row, dtype=np.float64).tobytes()).hexdigest()
+
+
+def _stratified_pick(items, fraction, seed, salt):
+    """
+    items: [(sha, label), ...] -> set of shas, ~fraction of each class,
+    chosen by hash rank so the pick does not depend on order.
+    """
+    picked = set()
+    for label in sorted({label for _, label in items}):
+        members = sorted((s for s, l in items if l == label), key=lambda s: dataset_manifest._rank(s, seed, salt))
+        picked.update(members[:max(1, round(len(members) * fraction))])
+    return picked
+
+
+def freeze_holdout(path=HOLDOUT_PATH, fraction=0.2, seed=42, manifest_path=dataset_manifest.DEFAULT_MANIFEST):
+    """
+    Load the frozen holdout, creating it on first use. An existing file is
+    never rewritten; delete it deliberately to re-freeze.
+    """
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+
+    holdout = {"version": HOLDOUT_VERSION, "fraction": fraction, "seed": seed,
+               "created": datetime.now(timezone.utc).isoformat(timespec="seconds")}
+    if os.path.exists(VOICE_FEATURES) and os.path.exists(FEATURE_LABELS):
+        X, y = np.load(VOICE_FEATURES), np.load(FEATURE_LABELS)
+        rows = [(_row_sha(X[i]), int(y[i])) for i in range(len(X))]
+        picked = _stratified_pick(rows, fraction, seed, "holdout:voice")
+        holdout["voice"] = [{"sha256": s, "label": l} for s, l in rows if s in picked]
+    if os.path.exists(manifest_path):
+        manifest = dataset_manifest.load(manifest_path)
+        holdout["image"] = {
+            "manifest": os.path.relpath(manifest_path, BASE_DIR),
+            "entries": [
+                {"path": e["path"], "sha256": e["sha256"], "label": e["label"]}
+                for e in manifest["entries"] if e["split"] == dataset_manifest.TEST
+            ],
+        }
+
+    with open(path + ".tmp", "w") as f:
+        json.dump(holdout, f, indent=1)
+    os.replace(path + ".tmp", path)
+    logger.info(f"🧊 Froze holdout: {len(holdout.get('voice', []))} voice rows, "
+                f"{len(holdout.get('image', {}).get('entries', []))} images → {path}")
+    return holdout
+
+
+def voice_training_mask(X, holdout=None):
+    """
+    Boolean mask of feature rows that are NOT in the frozen holdout;
+    training scripts fit on X[mask] only.
+    """
+    holdout = holdout or freeze_holdout()
+    frozen = {r["sha256"] for r in holdout.get("voice", [])}
+    return np.array([_row_sha(row) not in frozen for row in np.asarray(X)], dtype=bool)
+
+
+def _voice_holdout(holdout):
+    """
+    (voice rows, MRI feature rows or None, labels) for the frozen voice holdout.
+    """
+    X = np.load(VOICE_FEATURES)
+    index = {_row_sha(X[i]): i for i in range(len(X))}
+    wanted = holdout.get("voice", [])
+    missing = [r["sha256"][:12] for r in wanted if r["sha256"] not in index]
+    if missing:
+        raise RuntimeError(f"Holdout rows missing from voice_features.npy: {missing[:5]}")
+    rows = np.array([index[r["sha256"]] for r in wanted], dtype=np.int64)
+    mri = np.load(MRI_FEATURES)[rows] if os.path.exists(MRI_FEATURES) else None
+    return X[rows], mri, np.array([r["label"] for r in wanted])
+
+
+def _image_holdout(holdout):
+    spec = holdout["image"]
+    manifest = dataset_manifest.load(os.path.join(BASE_DIR, spec["manifest"]))
+    root = dataset_manifest.root_of(manifest)
+    images = []
+    for e in spec["entries"]:
+        path = os.path.join(root, e["path"])
+        if dataset_manifest.sha256_file(path) != e["sha256"]:
+            raise RuntimeError(f"Holdout image changed or missing: {e['path']}")
+        images.append(features.load_image_array(path))
+    return np.stack(images), np.array([e["label"] for e in spec["entries"]])
+
+
+# ===============================
+# MEASUREMENT
+# ===============================
+def _rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def _latency(fn, calls=LATENCY_CALLS, warmup=WARMUP_CALLS):
+    for _ in range(warmup):
+        fn()
+    timings = []
+    for _ in range(calls):
+        t0 = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - t0)
+    ms = np.array(timings) * 1000.0
+    return round(float(np.percentile(ms, 50)), 3), round(float(np.percentile(ms, 95)), 3)
+
+
+def _tile(X, n):
+    return X[np.arange(n) % len(X)]
+
+
+def _labels(pred):
+    return features.prediction_labels(pred)[0]   # the serving rule
+
+
+def _component_result(accuracy, n, single, batch, rss_delta, files):
+    return {
+        "status": "ok",
+        "accuracy": round(float(accuracy), 4),
+        "n": int(n),
+        "latency_ms": {"single_p50": single[0], "single_p95": single[1],
+                       "batch_p50": batch[0], "batch_p95": batch[1], "batch_size": BATCH_SIZE},
+        "memory_mb": {"rss_delta": round(rss_delta, 1),
+                      "file": round(sum(os.path.getsize(p) for p in files) / 2**20, 2)},
+    }
+
+
+def _eval_audio(paths, holdout):
+    import joblib
+    X, _, y = _voice_holdout(holdout)
+    rss0 = _rss_mb()
+    model = joblib.load(paths["parkinsons_model.pkl"])
+    scaler = joblib.load(paths["scaler.pkl"]) if os.path.exists(paths["scaler.pkl"]) else None
+    rss_delta = _rss_mb() - rss0
+    scale = scaler.transform if scaler is not None else (lambda a: a)
+
+    accuracy = np.mean(np.round(model.predict(scale(X))).astype(int) == y)
+
+    def serve(rows):   # same calls as utils.predict_audio_from_file
+        fv = scale(rows)
+        model.predict(fv)
+        model.predict_proba(fv)
+
+    single = _latency(lambda: serve(X[:1]))
+    batch = _latency(lambda: serve(_tile(X, BATCH_SIZE)))
+    files = [p for p in (paths["parkinsons_model.pkl"], paths["scaler.pkl"]) if os.path.exists(p)]
+    return _component_result(accuracy, len(y), single, batch, rss_delta, files)
+
+
+def _eval_image(paths, holdout):
+    from tensorflow.keras.models import load_model
+    images, y = _image_holdout(holdout)
+    rss0 = _rss_mb()
+    model = load_model(paths["image_model.h5"])
+    rss_delta = _rss_mb() - rss0
+    batch_in = images.astype(np.float32) / 255.0
+
+    accuracy = np.mean(_labels(model.predict(batch_in, verbose=0)) == y)
+    single = _latency(lambda: model.predict(batch_in[:1], verbose=0))
+    tiled = _tile(batch_in, BATCH_SIZE)
+    batch = _latency(lambda: model.predict(tiled, batch_size=BATCH_SIZE, verbose=0))
+    return _component_result(accuracy, len(y), single, batch, rss_delta, [paths["image_model.h5"]])
+
+
+def _eval_fusion(paths, holdout):
+    import joblib
+    from tensorflow.keras.models import load_model
+    X, mri, y = _voice_holdout(holdout)
+    rss0 = _rss_mb()
+    model = load_model(paths["fusion_model.h5"])
+    rss_delta = _rss_mb() - rss0
+    dims = [tuple(t.shape[1:]) for t in model.inputs]
+    if mri is None or dims != [(X.shape[1],), (mri.shape[1],)]:
+        have = None if mri is None else [X.shape[1], mri.shape[1]]
+        return {"status": "skipped", "reason": f"model inputs {dims} do not match holdout features {have}"}
+    if os.path.exists(paths["scaler.pkl"]):
+        X = joblib.load(paths["scaler.pkl"]).transform(X)
+
+    accuracy = np.mean(_labels(model.predict([X, mri], verbose=0)) == y)
+    single = _latency(lambda: model.predict([X[:1], mri[:1]], verbose=0))
+    tX, tM = _tile(X, BATCH_SIZE), _tile(mri, BATCH_SIZE)
+    batch = _latency(lambda: model.predict([tX, tM], batch_size=BATCH_SIZE, verbose=0))
+    return _component_result(accuracy, len(y), single, batch, rss_delta, [paths["fusion_model.h5"]])
+
+
+EVALUATORS = {"audio": _eval_audio, "image": _eval_image, "fusion": _eval_fusion}
+
+
+def evaluate_set(paths, components=None, holdout_path=HOLDOUT_PATH):
+    """
+    Score one artifact set ({artifact name: path}) on the frozen holdout.
+    Runs in the calling process; see evaluate_isolated.
+    """
+    with open(holdout_path) as f:
+        holdout = json.load(f)
+    if any(p.endswith(".h5") and os.path.exists(p) for p in paths.values()):
+        import tensorflow  # noqa: F401  -- runtime import kept out of the RSS deltas
+
+    results = {}
+    for name in components or COMPONENTS:
+        if not os.path.exists(paths[COMPONENTS[name][0]]):
+            results[name] = {"status": "missing"}
+            continue
+        try:
+            results[name] = EVALUATORS[name](paths, holdout)
+        except Exception as e:
+            logger.exception(f"Evaluating {name} failed: {e}")
+            results[name] = {"status": "error", "error": f"{type(e).__name__}: {e}"}
+    return results
+
+
+def evaluate_isolated(paths, components=None, holdout_path=HOLDOUT_PATH):
+    """
+    evaluate_set in a fresh interpreter, so imports, caches and memory
+    from one artifact set cannot affect the next.
+    """
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+        return pool.submit(evaluate_set, paths, components, holdout_path).result()
+
+
+# ===============================
+# GATE
+# ===============================
+artifact_paths = model_registry.artifact_paths
+
+
+def overlay_paths(candidate_dir, deployed_dir):
+    """
+    Artifact set served after promotion: candidate files where present,
+    deployed files otherwise.
+    """
+    paths = artifact_paths(deployed_dir)
+    for name in ARTIFACTS:
+        candidate = os.path.join(candidate_dir, name)
+        if os.path.exists(candidate):
+            paths[name] = candidate
+    return paths
+
+
+def _file_sha(path):
+    return dataset_manifest.sha256_file(path) if os.path.exists(path) else None
+
+
+def changed_components(candidate_dir, deployed_dir):
+    changed_files = {
+        name for name in ARTIFACTS
+        if os.path.exists(os.path.join(candidate_dir, name))
+        and _file_sha(os.path.join(candidate_dir, name)) != _file_sha(os.path.join(deployed_dir, name))
+    }
+    return [c for c, files in COMPONENTS.items() if changed_files & set(files)], sorted(changed_files)
+
+
+def _worse(new, old, relative, floor):
+    return new > old * (1 + relative) and new - old > floor
+
+
+def compare(candidate, deployed, max_accuracy_drop=MAX_ACCURACY_DROP,
+            max_latency_increase=MAX_LATENCY_INCREASE, max_memory_increase=MAX_MEMORY_INCREASE):
+    """
+    Regressions (list of strings) of one component's candidate result
+    against the deployed result.
+    """
+    if candidate["status"] == "skipped" and deployed.get("status") != "ok":
+        return []
+    if candidate["status"] != "ok":
+        return [f"candidate could not be evaluated ({candidate.get('error') or candidate.get('reason') or candidate['status']})"]
+    if deployed.get("status") != "ok":
+        return []   # nothing comparable deployed
+
+    problems = []
+    if candidate["accuracy"] < deployed["accuracy"] - max_accuracy_drop:
+        problems.append(f"accuracy {deployed['accuracy']:.4f} → {candidate['accuracy']:.4f}")
+    for key in ("single_p50", "batch_p50"):
+        new, old = candidate["latency_ms"][key], deployed["latency_ms"][key]
+        if _worse(new, old, max_latency_increase, LATENCY_FLOOR_MS):
+            problems.append(f"{key} latency {old:.2f} → {new:.2f} ms")
+    new, old = candidate["memory_mb"]["rss_delta"], deployed["memory_mb"]["rss_delta"]
+    if _worse(new, old, max_memory_increase, MEMORY_FLOOR_MB):
+        problems.append(f"memory {old:.0f} → {new:.0f} MB")
+    return problems
+
+
+def gate(candidate_dir=CANDIDATE_DIR, deployed_dir=None, isolated=True, **thresholds):
+    """
+    Evaluate the candidate set against the deployed one (default: the
+    registry's current version). Returns a report whose "promote" is True
+    only when something changed and nothing regressed.
+    """
+    freeze_holdout()
+    deployed_dir = deployed_dir or model_registry.current_dir()
+    components, files = changed_components(candidate_dir, deployed_dir)
+    report = {
+        "candidate_dir": candidate_dir,
+        "deployed_dir": deployed_dir,
+        "deployed_version": model_registry.current_version(),
+        "changed_files": files,
+        "components": {},
+        "regressions": {},
+        "promote": False,
+    }
+    if not components:
+        report["reason"] = "no candidate artifacts differ from the deployed set"
+        return report
+
+    run = evaluate_isolated if isolated else evaluate_set
+    deployed = run(artifact_paths(deployed_dir), components)
+    candidate = run(overlay_paths(candidate_dir, deployed_dir), components)
+    for name in components:
+        report["components"][name] = {"candidate": candidate[name], "deployed": deployed[name]}
+        problems = compare(candidate[name], deployed[name], **thresholds)
+        if problems:
+            report["regressions"][name] = problems
+    report["promote"] = not report["regressions"]
+    return report
+
+
+def promote(report):
+    """
+    Register the candidate files that passed the gate as a new registry
+    version (other artifacts carried over from the deployed one) and make
+    it current. Serving workers hot-swap to it without a restart.
+    """
+    if not report["promote"]:
+        raise model_registry.RegistryError("Refusing to promote a candidate that did not pass the gate")
+    files = {name: os.path.join(report["candidate_dir"], name) for name in report["changed_files"]}
+    summary = {
+        name: {side: {k: r[side].get(k) for k in ("accuracy", "latency_ms", "memory_mb")} for side in ("candidate", "deployed")}
+        for name, r in report["components"].items()
+    }
+    version = model_registry.register(
+        files,
+        metadata={"source": report["candidate_dir"], "evaluation": summary},
+        base=report["deployed_version"],
+    )
+    return model_registry.activate(version)
+
+
+def write_report(report, path):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path + ".tmp", "w") as f:
+        json.dump(report, f, indent=2)
+    os.replace(path + ".tmp", path)
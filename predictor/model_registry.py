@@ -0,0 +1,256 @@
+"""
+Versioned registry of servable model artifact sets.
+
+    models/registry/
+        CURRENT                         <- version id, replaced atomically
+        CANDIDATE                       <- optional version under shadow/canary test
+        versions/<version>/
+            manifest.json               <- checksums, sizes, metadata
+            parkinsons_model.pkl  scaler.pkl  image_model.h5  fusion_model.h5
+
+Every version is a complete set: registering a partial set (e.g. only a new
+audio model) carries the other artifacts over from the current version.
+Files are always copied in, never hard-linked, so a training script that
+later rewrites its output in place cannot alter a registered version.
+Versions are immutable once written; switching
+or rolling back only rewrites CURRENT, which serving workers poll and
+hot-swap to (see predictor.utils).
+
+Before any version is registered, the legacy artifacts in the repo root are
+served, so existing checkouts keep working. No Django imports.
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+import logging
+from datetime import datetime, timezone
+
+from . import dataset_manifest
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REGISTRY_DIR = os.environ.get("MODEL_REGISTRY_DIR") or os.path.join(BASE_DIR, "models", "registry")
+LEGACY_DIR = BASE_DIR
+MANIFEST_NAME = "manifest.json"
+POLL_INTERVAL = float(os.environ.get("MODEL_REGISTRY_POLL_SECONDS", "5"))
+
+ARTIFACTS = ("parkinsons_model.pkl", "scaler.pkl", "image_model.h5", "fusion_model.h5")
+
+
+class RegistryError(Exception):
+    pass
+
+
+# ===============================
+# LAYOUT
+# ===============================
+def _versions_dir(registry_dir=None):
+    return os.path.join(registry_dir or REGISTRY_DIR, "versions")
+
+
+def version_dir(version, registry_dir=None):
+    return os.path.join(_versions_dir(registry_dir), version)
+
+
+def _current_path(registry_dir=None):
+    return os.path.join(registry_dir or REGISTRY_DIR, "CURRENT")
+
+
+def _candidate_path(registry_dir=None):
+    return os.path.join(registry_dir or REGISTRY_DIR, "CANDIDATE")
+
+
+def _read_pointer(path):
+    try:
+        with open(path) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def _write_pointer(path, version):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + ".tmp", "w") as f:
+        f.write(version + "\n")
+    os.replace(path + ".tmp", path)
+
+
+def versions(registry_dir=None):
+    """
+    Registered version ids, oldest first (ids start with a UTC timestamp).
+    """
+    root = _versions_dir(registry_dir)
+    if not os.path.isdir(root):
+        return []
+    return sorted(v for v in os.listdir(root)
+                  if not v.startswith(".") and os.path.exists(os.path.join(root, v, MANIFEST_NAME)))
+
+
+def load_manifest(version, registry_dir=None):
+    try:
+        with open(os.path.join(version_dir(version, registry_dir), MANIFEST_NAME)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        raise RegistryError(f"Unknown model version {version!r}")
+
+
+def current_version(registry_dir=None):
+    return _read_pointer(_current_path(registry_dir))
+
+
+def candidate_version(registry_dir=None):
+    """
+    Version being compared against CURRENT on live traffic (see predictor.shadow).
+    """
+    return _read_pointer(_candidate_path(registry_dir))
+
+
+def current_dir(registry_dir=None):
+    """
+    Directory the serving artifacts are read from.
+    """
+    version = current_version(registry_dir)
+    return version_dir(version, registry_dir) if version else LEGACY_DIR
+
+
+def artifact_paths(directory):
+    return {name: os.path.join(directory, name) for name in ARTIFACTS}
+
+
+# ===============================
+# CHECKSUMS
+# ===============================
+def combined_fingerprint(checksums):
+    """
+    One digest over every artifact checksum ("missing" for absent files).
+    """
+    digest = hashlib.sha256()
+    for name in ARTIFACTS:
+        digest.update((checksums.get(name) or "missing").encode())
+    return digest.hexdigest()
+
+
+def verify(version, registry_dir=None):
+    """
+    Re-hash a version's files against its manifest; raises RegistryError.
+    """
+    manifest = load_manifest(version, registry_dir)
+    directory = version_dir(version, registry_dir)
+    for name, meta in manifest["artifacts"].items():
+        path = os.path.join(directory, name)
+        if not os.path.exists(path):
+            raise RegistryError(f"{version}: {name} is missing")
+        if os.path.getsize(path) != meta["size"] or dataset_manifest.sha256_file(path) != meta["sha256"]:
+            raise RegistryError(f"{version}: {name} does not match its checksum")
+    return manifest
+
+
+# ===============================
+# WRITES
+# ===============================
+def _fsync(path):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _copy_durable(src, dst):
+    shutil.copy2(src, dst)
+    _fsync(dst)
+
+
+def register(files, metadata=None, registry_dir=None, base=None):
+    """
+    Add an immutable version from {artifact name: path}. Artifacts not given
+    are carried over from ``base`` (default: the current version, or the
+    legacy root files). Returns the new version id; CURRENT is not changed.
+    """
+    unknown = set(files) - set(ARTIFACTS)
+    if unknown:
+        raise RegistryError(f"Unknown artifacts: {sorted(unknown)}")
+    base_dir = version_dir(base, registry_dir) if base else current_dir(registry_dir)
+    sources = {name: p for name, p in artifact_paths(base_dir).items() if os.path.exists(p)}
+    sources.update(files)
+
+    # Copy first and checksum the copies, so the manifest describes exactly
+    # the bytes in the version even if a source is rewritten meanwhile
+    os.makedirs(_versions_dir(registry_dir), exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=".staging-", dir=_versions_dir(registry_dir))
+    try:
+        for name, path in sources.items():
+            _copy_durable(path, os.path.join(staging, name))
+        checksums = {name: dataset_manifest.sha256_file(os.path.join(staging, name)) for name in sources}
+        fingerprint = combined_fingerprint(checksums)
+        stamp = datetime.now(timezone.utc)
+        version = f"{stamp.strftime('%Y%m%dT%H%M%SZ')}-{fingerprint[:8]}"
+        manifest = {
+            "version": version,
+            "created": stamp.isoformat(timespec="seconds"),
+            "fingerprint": fingerprint,
+            "artifacts": {
+                name: {"sha256": checksums[name], "size": os.path.getsize(os.path.join(staging, name))}
+                for name in sorted(sources)
+            },
+            "metadata": {"base": current_version(registry_dir) if base is None else base, **(metadata or {})},
+        }
+        with open(os.path.join(staging, MANIFEST_NAME), "w") as f:
+            json.dump(manifest, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        _fsync(staging)
+        if os.path.exists(version_dir(version, registry_dir)):   # same content registered this second
+            return version
+        os.replace(staging, version_dir(version, registry_dir))
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    logger.info(f"📦 Registered model version {version} ({', '.join(sorted(files)) or 'no new artifacts'})")
+    return version
+
+
+def activate(version, registry_dir=None):
+    """
+    Point CURRENT at ``version`` (after verifying it). Workers pick the
+    change up within POLL_INTERVAL seconds.
+    """
+    verify(version, registry_dir)
+    _write_pointer(_current_path(registry_dir), version)
+    logger.info(f"🔀 CURRENT → {version}")
+    if candidate_version(registry_dir) == version:
+        set_candidate(None, registry_dir)   # promoted; nothing left to compare
+    return version
+
+
+def set_candidate(version, registry_dir=None):
+    """
+    Point CANDIDATE at ``version`` (verified), or clear it with None.
+    """
+    if version is None:
+        try:
+            os.remove(_candidate_path(registry_dir))
+        except FileNotFoundError:
+            pass
+        logger.info("🔀 CANDIDATE cleared")
+        return None
+    verify(version, registry_dir)
+    _write_pointer(_candidate_path(registry_dir), version)
+    logger.info(f"🔀 CANDIDATE → {version}")
+    return version
+
+
+def rollback(registry_dir=None):
+    """
+    Re-activate the version the current one was registered on top of.
+    """
+    current = current_version(registry_dir)
+    if current is None:
+        raise RegistryError("No active version to roll back from")
+    previous = load_manifest(current, registry_dir)["metadata"].get("base")
+    if not previous:
+        raise RegistryError(f"{current} has no previous version")
+    return activate(previous, registry_dir)
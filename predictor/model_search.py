@@ -0,0 +1,248 @@
+"""
+Hyperparameter search for the voice (audio feature) classifiers.
+
+Candidates (SVC, random forest, gradient boosting) are raced fold by fold
+over stratified k-fold CV:
+
+    round r: every surviving candidate is fit on fold r in parallel
+             -> candidates clearly beaten on accuracy by a faster one are dropped
+
+Per-fold StandardScaler transforms are computed once and cached on disk
+(joblib.Memory), not refit per candidate. Besides accuracy, each candidate
+is timed on single-row predict_proba calls, the shape of serving traffic,
+and the report lists the accuracy/latency Pareto front. Timings taken inside
+the parallel workers only steer the race (they are inflated by contention);
+the front is re-timed serially in this process before it is reported.
+
+No Django/TensorFlow imports; driven by search_audio_model.py.
+"""
+
+import os
+import json
+import time
+import logging
+import warnings
+import itertools
+
+import numpy as np
+from joblib import Memory, Parallel, delayed
+from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+from sklearn.model_selection import StratifiedKFold
+from sklearn.preprocessing import StandardScaler
+from sklearn.svm import SVC
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_DIR = os.path.join(BASE_DIR, "cache", "model_search")
+LATENCY_CALLS = 50
+
+
+# ===============================
+# CANDIDATES
+# ===============================
+def _grid(**axes):
+    keys = list(axes)
+    return [dict(zip(keys, values)) for values in itertools.product(*axes.values())]
+
+
+def default_candidates():
+    """
+    [(name, estimator family, params), ...] covering the search space.
+    """
+    space = {
+        "svc": _grid(C=[0.1, 1.0, 10.0, 100.0], gamma=["scale", 0.01, 0.1]),
+        "rf": _grid(n_estimators=[50, 100, 200, 400], max_depth=[None, 4, 8, 16]),
+        "gb": _grid(n_estimators=[50, 100, 200], max_depth=[2, 3], learning_rate=[0.05, 0.1]),
+    }
+    candidates = []
+    for family, grid in space.items():
+        for params in grid:
+            label = ",".join(f"{k}={v}" for k, v in params.items())
+            candidates.append((f"{family}({label})", family, params))
+    return candidates
+
+
+def build_estimator(family, params, seed=42):
+    if family == "svc":
+        return SVC(kernel="rbf", probability=True, random_state=seed, **params)
+    if family == "rf":
+        return RandomForestClassifier(random_state=seed, n_jobs=1, **params)
+    if family == "gb":
+        return GradientBoostingClassifier(random_state=seed, **params)
+    raise ValueError(f"Unknown model family {family!r}")
+
+
+# ===============================
+# FOLD TRANSFORMS (cached)
+# ===============================
+def _fold_transforms(X, y, k, seed):
+    """
+    [(X_train_scaled, y_train, X_val_scaled, y_val), ...] for k stratified folds.
+    """
+    folds = []
+    for train_idx, val_idx in StratifiedKFold(n_splits=k, shuffle=True, random_state=seed).split(X, y):
+        scaler = StandardScaler().fit(X[train_idx])
+        folds.append((
+            scaler.transform(X[train_idx]).astype(np.float32), y[train_idx],
+            scaler.transform(X[val_idx]).astype(np.float32), y[val_idx],
+        ))
+    return folds
+
+
+def fold_transforms(X, y, k=5, seed=42, cache_dir=CACHE_DIR):
+    memory = Memory(cache_dir or None, verbose=0)
+    return memory.cache(_fold_transforms)(np.asarray(X, dtype=np.float64), np.asarray(y), k, seed)
+
+
+# ===============================
+# EVALUATION
+# ===============================
+def _single_row_latency_ms(model, X, calls=LATENCY_CALLS):
+    rows = X[np.arange(calls) % len(X)]
+    timings = []
+    for i in range(calls):
+        t0 = time.perf_counter()
+        model.predict_proba(rows[i:i + 1])
+        timings.append(time.perf_counter() - t0)
+    return float(np.median(timings) * 1000.0)
+
+
+def _evaluate(name, family, params, fold, fold_no, seed):
+    X_train, y_train, X_val, y_val = fold
+    model = build_estimator(family, params, seed)
+    t0 = time.perf_counter()
+    with warnings.catch_warnings():
+        # SVC(probability=True) is deprecated in newer scikit-learn, but
+        # serving relies on predict_proba from the pickled model
+        warnings.simplefilter("ignore", FutureWarning)
+        model.fit(X_train, y_train)
+    fit_s = time.perf_counter() - t0
+    accuracy = float(np.mean(model.predict(X_val) == y_val))
+    return name, fold_no, accuracy, _single_row_latency_ms(model, X_val), fit_s
+
+
+def _summary(result):
+    acc = np.array(result["fold_accuracy"])
+    se = acc.std(ddof=1) / np.sqrt(len(acc)) if len(acc) > 1 else 1.0
+    return acc.mean(), se, float(np.median(result["fold_latency_ms"]))
+
+
+def _drop_dominated(results, alive, min_folds, margin):
+    """
+    Drop candidates whose optimistic accuracy (mean + se) is still below the
+    pessimistic accuracy (mean - se - margin) of a candidate that is also
+    no slower.
+    """
+    stats = {n: _summary(results[n]) for n in alive if len(results[n]["fold_accuracy"]) >= min_folds}
+    dropped = set()
+    for name, (mean, se, latency) in stats.items():
+        for other, (o_mean, o_se, o_latency) in stats.items():
+            if other != name and o_latency <= latency and mean + se < o_mean - o_se - margin:
+                dropped.add(name)
+                results[name]["dominated_by"] = other
+                break
+    return dropped
+
+
+def pareto_front(rows):
+    """
+    Rows not beaten on both accuracy (higher) and latency (lower).
+    """
+    front = []
+    for r in rows:
+        if not any(
+            o is not r
+            and o["accuracy"] >= r["accuracy"] and o["latency_ms"] <= r["latency_ms"]
+            and (o["accuracy"] > r["accuracy"] or o["latency_ms"] < r["latency_ms"])
+            for o in rows
+        ):
+            front.append(r)
+    return sorted(front, key=lambda r: r["latency_ms"])
+
+
+def search(X, y, candidates=None, k=5, n_jobs=-1, seed=42, min_folds=2, margin=0.02, cache_dir=CACHE_DIR):
+    """
+    Race ``candidates`` over k folds. Returns a JSON-serialisable report with
+    every candidate's scores and the accuracy/latency Pareto front.
+    """
+    candidates = candidates or default_candidates()
+    folds = fold_transforms(X, y, k, seed, cache_dir)
+    by_name = {name: (family, params) for name, family, params in candidates}
+    results = {
+        name: {"name": name, "family": family, "params": params, "fold_accuracy": [],
+               "fold_latency_ms": [], "fit_seconds": [], "status": "complete"}
+        for name, family, params in candidates
+    }
+
+    alive = [name for name, _, _ in candidates]
+    started = time.perf_counter()
+    with Parallel(n_jobs=n_jobs) as parallel:
+        for fold_no, fold in enumerate(folds):
+            scored = parallel(
+                delayed(_evaluate)(name, *by_name[name], fold, fold_no, seed) for name in alive
+            )
+            for name, _, accuracy, latency, fit_s in scored:
+                results[name]["fold_accuracy"].append(accuracy)
+                results[name]["fold_latency_ms"].append(latency)
+                results[name]["fit_seconds"].append(fit_s)
+            if fold_no + 1 < len(folds):
+                dropped = _drop_dominated(results, alive, min_folds, margin)
+                for name in dropped:
+                    results[name]["status"] = f"dropped after fold {fold_no + 1}"
+                alive = [name for name in alive if name not in dropped]
+                logger.info(f"🔎 Fold {fold_no + 1}/{len(folds)}: {len(alive)} candidates left ({len(dropped)} dropped)")
+
+    rows = []
+    for r in results.values():
+        mean, _, latency = _summary(r)
+        r["accuracy"] = round(float(mean), 4)
+        r["accuracy_std"] = round(float(np.std(r["fold_accuracy"])), 4)
+        r["latency_ms"] = round(latency, 4)
+        rows.append(r)
+    complete = [r for r in rows if r["status"] == "complete"]
+    front = pareto_front(complete)
+    _retime_serially(front, folds[0], seed)
+    front = pareto_front(front)   # serial timings can reorder or dominate members
+    return {
+        "folds": k,
+        "seed": seed,
+        "samples": int(len(y)),
+        "features": int(np.asarray(X).shape[1]),
+        "seconds": round(time.perf_counter() - started, 2),
+        "candidates": sorted(rows, key=lambda r: -r["accuracy"]),
+        "pareto_front": [
+            {key: r[key] for key in ("name", "family", "params", "accuracy", "accuracy_std", "latency_ms")}
+            for r in front
+        ],
+    }
+
+
+def _retime_serially(rows, fold, seed):
+    """
+    Replace the parallel-worker latency of ``rows`` with one measured here,
+    with nothing else running, on a model fit to ``fold``.
+    """
+    X_train, y_train, X_val, _ = fold
+    for r in rows:
+        model = build_estimator(r["family"], r["params"], seed)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", FutureWarning)
+            model.fit(X_train, y_train)
+        r["latency_ms_parallel"] = r["latency_ms"]
+        r["latency_ms"] = round(_single_row_latency_ms(model, X_val), 4)
+
+
+def pick(report, budget_ms=None):
+    """
+    Most accurate Pareto candidate within the latency budget (or overall).
+    """
+    front = [r for r in report["pareto_front"] if budget_ms is None or r["latency_ms"] <= budget_ms]
+    return max(front, key=lambda r: (r["accuracy"], -r["latency_ms"])) if front else None
+
+
+def write_report(report, path):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path + ".tmp", "w") as f:
+        json.dump(report, f, indent=2)
+    os.replace(path + ".tmp", path)
@@ -1,11 +1,66 @@
+from django.conf import settings
 from django.db import models
 
 class ParkinsonPrediction(models.Model):   # ✅ Correct class name
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="predictions",
+    )
     uploaded_at = models.DateTimeField(auto_now_add=True)
     prediction_type = models.CharField(max_length=50)  # 'audio' or 'image'
     result = models.CharField(max_length=50)           # 'Positive' or 'Negative'
     probability = models.FloatField(null=True, blank=True)
     file_path = models.CharField(max_length=255, null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            # Keyset pagination walks a user's history newest-first by id
+            models.Index(fields=["user", "-id"], name="prediction_user_id_idx"),
+            # Daily rollups scan a time window
+            models.Index(fields=["uploaded_at"], name="prediction_uploaded_idx"),
+        ]
+
     def __str__(self):
         return f"{self.prediction_type} - {self.result} ({self.uploaded_at})"
+
+
+class DailyPredictionRollup(models.Model):
+    """
+    Materialized per-day counts, refreshed by predictor.stats.refresh_daily_rollups
+    """
+    day = models.DateField()
+    prediction_type = models.CharField(max_length=50)
+    total = models.PositiveIntegerField(default=0)
+    positives = models.PositiveIntegerField(default=0)
+    avg_probability = models.FloatField(null=True, blank=True)
+    refreshed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["day", "prediction_type"], name="rollup_day_type_uniq"),
+        ]
+        ordering = ["-day", "prediction_type"]
+
+    @property
+    def positive_rate(self):
+        return self.positives / self.total if self.total else 0.0
+
+    def __str__(self):
+        return f"{self.day} {self.prediction_type}: {self.positives}/{self.total}"
+
+
+class CachedPredictionResult(models.Model):
+    """
+    Cold tier of the idempotent result cache (hot tier lives in Django's cache)
+    """
+    key = models.CharField(max_length=64, unique=True)
+    payload = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_hit_at = models.DateTimeField(null=True, blank=True)
+    hits = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.key[:12]}… ({self.hits} hits)"
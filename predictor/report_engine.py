@@ -0,0 +1,207 @@
+"""
+Template-based PDF report rendering.
+
+The static parts of the page (title, field labels, separator) are laid out
+once per template and drawn as a single form XObject; only the per-patient
+values and images are drawn on top. Spectrogram/heatmap images are re-encoded
+once to downscaled JPEGs kept in a bounded in-memory LRU by content hash
+(never on disk: they are patient data), which ReportLab embeds without
+decoding or recompressing.
+
+Kept free of Django and TensorFlow imports so worker processes stay light.
+"""
+
+import io
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+from PIL import Image
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen import canvas
+
+logger = logging.getLogger(__name__)
+
+IMAGE_CACHE_ENTRIES = 256
+JPEG_QUALITY = 88
+
+TITLE = "🧠 Parkinson’s Disease Prediction Report"
+RESULT_DETECTED = "⚠️ Parkinson's Detected"
+RESULT_BORDERLINE = "⚠️ Borderline — Parkinson’s might be present"
+RESULT_NEGATIVE = "✅ No Parkinson’s"
+
+# (caption, x, width, height) for each image slot, matching the original layout
+SPECTROGRAM_SLOT = ("🎵 Audio Spectrogram:", 50, 250, 150)
+HEATMAP_SLOT = ("🧬 MRI Heatmap:", 320, 200, 150)
+
+
+def _result_text(prediction):
+    if prediction.get("final_label") == 1:
+        return RESULT_DETECTED
+    if prediction.get("borderline", False):
+        return RESULT_BORDERLINE
+    return RESULT_NEGATIVE
+
+
+# ============================================================
+# IMAGE XOBJECT CACHE
+# ============================================================
+_images = OrderedDict()   # sha256 -> JPEG bytes
+_image_lock = threading.Lock()
+
+
+def cached_image(image_bytes, box_width, box_height):
+    """
+    JPEG rendition of ``image_bytes`` sized for a box_width x box_height
+    point slot (at 2x for print), keyed by content hash.
+    """
+    key = hashlib.sha256(image_bytes + f"{box_width}x{box_height}".encode()).hexdigest()
+    with _image_lock:
+        jpeg = _images.get(key)
+        if jpeg is not None:
+            _images.move_to_end(key)
+            return jpeg
+
+    img = Image.open(io.BytesIO(image_bytes))
+    if img.mode in ("RGBA", "LA", "P"):
+        img = img.convert("RGBA")
+        background = Image.new("RGB", img.size, (255, 255, 255))
+        background.paste(img, mask=img.split()[-1])
+        img = background
+    else:
+        img = img.convert("RGB")
+    img.thumbnail((box_width * 2, box_height * 2), Image.LANCZOS)
+    buf = io.BytesIO()
+    img.save(buf, format="JPEG", quality=JPEG_QUALITY)
+    jpeg = buf.getvalue()
+
+    with _image_lock:
+        _images[key] = jpeg
+        while len(_images) > IMAGE_CACHE_ENTRIES:
+            _images.popitem(last=False)
+    return jpeg
+
+
+# ============================================================
+# TEMPLATE
+# ============================================================
+class ReportTemplate:
+    """
+    Precomputed layout for one page variant (with or without patient info).
+    """
+    STATIC_FORM = "reportStatic"
+
+    def __init__(self, with_user_info=True, pagesize=A4):
+        self.pagesize = pagesize
+        self.width, self.height = pagesize
+        self.with_user_info = with_user_info
+
+        y = self.height - 100
+        self.field_rows = []
+        if with_user_info:
+            for label in ("Name", "Email", "Phone", "Test Date"):
+                prefix = f"{label}: "
+                self.field_rows.append((prefix, y, 50 + stringWidth(prefix, "Helvetica", 12)))
+                y -= 20
+            y -= 20
+        self.separator_y = y
+        y -= 20
+        self.result_prefix = "Prediction Result: "
+        self.result_y = y
+        self.result_x = 50 + stringWidth(self.result_prefix, "Helvetica-Bold", 14)
+        y -= 25
+        self.confidence_prefix = "Confidence: "
+        self.confidence_y = y
+        self.confidence_x = 50 + stringWidth(self.confidence_prefix, "Helvetica", 12)
+        self.images_y = y - 40
+
+    def _draw_static(self, p):
+        p.beginForm(self.STATIC_FORM)
+        p.setFont("Helvetica-Bold", 18)
+        p.drawString(50, self.height - 60, TITLE)
+        p.setFont("Helvetica", 12)
+        for prefix, y, _ in self.field_rows:
+            p.drawString(50, y, prefix)
+        p.line(50, self.separator_y, self.width - 50, self.separator_y)
+        p.setFont("Helvetica-Bold", 14)
+        p.drawString(50, self.result_y, self.result_prefix)
+        p.setFont("Helvetica", 12)
+        p.drawString(50, self.confidence_y, self.confidence_prefix)
+        p.endForm()
+        p.doForm(self.STATIC_FORM)
+
+    def _draw_image(self, p, y, slot, image_bytes, what):
+        caption, x, w, h = slot
+        try:
+            jpeg = cached_image(image_bytes, w, h)
+            p.drawString(50, y, caption)
+            y -= 180
+            p.drawImage(ImageReader(io.BytesIO(jpeg)), x, y, width=w, height=h, preserveAspectRatio=True)
+            return y - 30
+        except Exception as e:
+            p.setFillColorRGB(1, 0, 0)
+            p.drawString(50, y, f"[Error loading {what}: {str(e)}]")
+            p.setFillColorRGB(0, 0, 0)
+            return y - 30
+
+    def render(self, prediction, spectrogram_bytes=None, heatmap_bytes=None, user_info=None):
+        buffer = io.BytesIO()
+        p = canvas.Canvas(buffer, pagesize=self.pagesize)
+        self._draw_static(p)
+
+        p.setFont("Helvetica", 12)
+        if self.with_user_info:
+            values = (
+                user_info.get("name", "Unknown"),
+                user_info.get("email", "N/A"),
+                user_info.get("phone", "N/A"),
+                user_info.get("test_date", "N/A"),
+            )
+            for (_, y, x), value in zip(self.field_rows, values):
+                p.drawString(x, y, f"{value}")
+
+        p.setFont("Helvetica-Bold", 14)
+        p.drawString(self.result_x, self.result_y, _result_text(prediction))
+
+        p.setFont("Helvetica", 12)
+        confidence = prediction.get("final_confidence")
+        p.drawString(
+            self.confidence_x, self.confidence_y,
+            f"{(confidence * 100):.2f}%" if confidence is not None else "N/A",
+        )
+
+        y = self.images_y
+        if spectrogram_bytes:
+            y = self._draw_image(p, y, SPECTROGRAM_SLOT, spectrogram_bytes, "spectrogram")
+        if heatmap_bytes:
+            self._draw_image(p, y, HEATMAP_SLOT, heatmap_bytes, "heatmap")
+
+        p.showPage()
+        p.save()
+        return buffer.getvalue()
+
+
+_templates = {}
+
+
+def get_template(with_user_info):
+    template = _templates.get(with_user_info)
+    if template is None:
+        template = _templates[with_user_info] = ReportTemplate(with_user_info)
+    return template
+
+
+def render_report(prediction, spectrogram_bytes=None, heatmap_bytes=None, user_info=None):
+    return get_template(bool(user_info)).render(prediction, spectrogram_bytes, heatmap_bytes, user_info)
+
+
+def render_job(job):
+    """
+    Process-pool entry point: job is a plain dict so it pickles cheaply.
+    Returns (filename, pdf_bytes).
+    """
+    pdf_bytes = render_report(job["prediction"], user_info=job.get("user_info"))
+    return job["filename"], pdf_bytes
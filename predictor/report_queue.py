@@ -0,0 +1,133 @@
+import hashlib
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from django.conf import settings
+
+from . import report_store, utils
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+READY = "ready"
+FAILED = "failed"
+UNKNOWN = "unknown"
+
+
+_executor = None
+_executor_lock = threading.Lock()
+_jobs = {}          # report_id -> Future, only while in flight in this process
+_jobs_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, "REPORT_WORKERS", 2),
+                    thread_name_prefix="report-render",
+                )
+    return _executor
+
+
+def _pending_timeout():
+    return getattr(settings, "REPORT_PENDING_TIMEOUT", 5 * 60)
+
+
+def report_id_for(prediction_key, user_id):
+    """
+    Deterministic id so repeated requests for the same prediction and user
+    coalesce onto one render.
+    """
+    return hashlib.sha256(f"{prediction_key}:{user_id}".encode()).hexdigest()[:32]
+
+
+def _render(report_id, prediction, spectrogram_bytes, heatmap_bytes, user_info):
+    try:
+        pdf_bytes = utils.generate_pdf_report(
+            prediction=prediction,
+            spectrogram_bytes=spectrogram_bytes,
+            heatmap_bytes=heatmap_bytes,
+            user_info=user_info,
+        )
+        report_store.save(report_id, pdf_bytes)
+        report_store.clear_status(report_id)
+    except Exception as e:
+        logger.exception(f"Report {report_id} failed to render")
+        report_store.write_status(report_id, f"{FAILED}:{e}")
+        raise
+    finally:
+        with _jobs_lock:
+            _jobs.pop(report_id, None)
+
+
+def submit(report_id, prediction, spectrogram_bytes=None, heatmap_bytes=None, user_info=None):
+    """
+    Queue a render unless the report is already in the store or in flight,
+    here or in another worker sharing the store (a PENDING marker younger
+    than REPORT_PENDING_TIMEOUT). Returns the current status.
+    """
+    with _jobs_lock:
+        if report_id in _jobs:
+            return PENDING
+        if report_store.find(report_id):
+            return READY
+        marker = report_store.read_status(report_id)
+        if marker is not None and marker[0] == PENDING and marker[1] <= _pending_timeout():
+            return PENDING
+        report_store.write_status(report_id, PENDING)
+        _jobs[report_id] = _get_executor().submit(
+            _render, report_id, dict(prediction), spectrogram_bytes, heatmap_bytes, user_info
+        )
+    return PENDING
+
+
+def pending_count():
+    with _jobs_lock:
+        return len(_jobs)
+
+
+def status(report_id):
+    """
+    Status as seen by any worker sharing the report store. A render still
+    pending after REPORT_PENDING_TIMEOUT seconds (its worker died) is FAILED.
+    """
+    if report_store.find(report_id):
+        return READY
+    marker = report_store.read_status(report_id)
+    if marker is None:
+        return UNKNOWN
+    value, age = marker
+    if value.startswith(FAILED):
+        return FAILED
+    if value == PENDING and age > _pending_timeout():
+        return FAILED
+    return value
+
+
+def wait(report_id, timeout):
+    """
+    Block up to ``timeout`` seconds for a report. Waits on the local future when
+    this process owns the job, otherwise polls the shared store.
+    """
+    with _jobs_lock:
+        future = _jobs.get(report_id)
+    if future is not None:
+        try:
+            future.result(timeout=timeout)
+        except FutureTimeoutError:
+            return PENDING
+        except Exception:
+            return FAILED
+        return status(report_id)
+
+    deadline = time.monotonic() + timeout
+    while True:
+        current = status(report_id)
+        if current != PENDING or time.monotonic() >= deadline:
+            return current
+        time.sleep(0.2)
@@ -0,0 +1,293 @@
+import os
+import re
+import glob
+import time
+import logging
+import tempfile
+import threading
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified
+
+logger = logging.getLogger(__name__)
+
+REPORT_NAME_RE = re.compile(r"^parkinson_report_([0-9a-f]{32})\.pdf$")
+LEGACY_PATTERN = "parkinson_report_*.pdf"
+STATUS_PATTERN = "parkinson_report_*.status"
+
+_janitor_lock = threading.Lock()
+_janitor_thread = None
+
+
+# ============================================================
+# SHORT-LIVED REPORT STORE
+# ============================================================
+def store_dir():
+    path = getattr(settings, "REPORT_STORE_DIR", None) or os.path.join(tempfile.gettempdir(), "parkinson_reports")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def report_ttl():
+    return getattr(settings, "REPORT_TTL_SECONDS", 60 * 60)
+
+
+def report_filename(report_id):
+    return f"parkinson_report_{report_id}.pdf"
+
+
+def parse_report_filename(filename):
+    """
+    Returns the report id for a well-formed report filename, else None.
+    Also guards the download view against path traversal.
+    """
+    match = REPORT_NAME_RE.match(filename or "")
+    return match.group(1) if match else None
+
+
+def save(report_id, pdf_bytes):
+    """
+    Atomically write a report into the store; readers never see partial files.
+    """
+    ensure_janitor()
+    final_path = os.path.join(store_dir(), report_filename(report_id))
+    fd, tmp_path = tempfile.mkstemp(dir=store_dir(), suffix=".part")
+    with os.fdopen(fd, "wb") as f:
+        f.write(pdf_bytes)
+    os.replace(tmp_path, final_path)
+    return final_path
+
+
+def find(report_id):
+    """
+    Path of a live report, falling back to legacy MEDIA_ROOT files. Expired
+    store entries are evicted on read.
+    """
+    path = os.path.join(store_dir(), report_filename(report_id))
+    try:
+        if time.time() - os.path.getmtime(path) <= report_ttl():
+            return path
+        os.remove(path)
+    except OSError:
+        pass
+    legacy = os.path.join(getattr(settings, "MEDIA_ROOT", "media"), report_filename(report_id))
+    return legacy if os.path.exists(legacy) else None
+
+
+# ============================================================
+# GRAD-CAM HEATMAPS
+# ============================================================
+# Overlays live in the store too, under heatmaps/<model fingerprint[:16]>/,
+# and expire like reports: REPORT_TTL_SECONDS after they were rendered.
+def heatmap_path(image_sha, fingerprint):
+    return os.path.join(store_dir(), "heatmaps", fingerprint[:16], f"heatmap_{image_sha}.png")
+
+
+def save_heatmap(image_sha, fingerprint, png_bytes):
+    ensure_janitor()
+    path = heatmap_path(image_sha, fingerprint)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".part")
+    with os.fdopen(fd, "wb") as f:
+        f.write(png_bytes)
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_heatmap(image_sha, fingerprint):
+    """
+    PNG bytes of a live heatmap, else None. Expired ones are evicted on read.
+    """
+    path = heatmap_path(image_sha, fingerprint)
+    try:
+        if time.time() - os.path.getmtime(path) > report_ttl():
+            os.remove(path)
+            return None
+        with open(path, "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+# ============================================================
+# RENDER STATUS MARKERS
+# ============================================================
+# A report that is queued or failed has a small marker file next to where the
+# PDF will land, so every worker sharing the store sees the same status.
+def _status_path(report_id):
+    return os.path.join(store_dir(), f"parkinson_report_{report_id}.status")
+
+
+def write_status(report_id, value):
+    ensure_janitor()
+    fd, tmp_path = tempfile.mkstemp(dir=store_dir(), suffix=".part")
+    with os.fdopen(fd, "w") as f:
+        f.write(value)
+    os.replace(tmp_path, _status_path(report_id))
+
+
+def read_status(report_id):
+    """
+    (value, age in seconds) of a live status marker, else None.
+    """
+    path = _status_path(report_id)
+    try:
+        age = time.time() - os.path.getmtime(path)
+        if age > report_ttl():
+            os.remove(path)
+            return None
+        with open(path) as f:
+            return f.read(), age
+    except OSError:
+        return None
+
+
+def clear_status(report_id):
+    try:
+        os.remove(_status_path(report_id))
+    except OSError:
+        pass
+
+
+# ============================================================
+# JANITOR
+# ============================================================
+def purge_expired(max_age=None, directories=None):
+    """
+    Delete reports, status markers and heatmaps older than ``max_age``
+    seconds from the store and reports from MEDIA_ROOT (where earlier
+    versions wrote them). Returns the count removed.
+    """
+    max_age = report_ttl() if max_age is None else max_age
+    directories = directories or [store_dir(), getattr(settings, "MEDIA_ROOT", "media")]
+    cutoff = time.time() - max_age
+    removed = 0
+    for directory in directories:
+        paths = [path for pattern in (LEGACY_PATTERN, STATUS_PATTERN, "*.part")
+                 for path in glob.glob(os.path.join(directory, pattern))]
+        for path in paths:
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    removed += 1
+            except OSError:
+                pass
+    removed += _purge_heatmaps(cutoff)
+    if removed:
+        logger.info(f"Report janitor removed {removed} expired reports")
+    return removed
+
+
+def _purge_heatmaps(cutoff):
+    heatmaps = os.path.join(store_dir(), "heatmaps")
+    removed = 0
+    for dirpath, _, filenames in os.walk(heatmaps, topdown=False):
+        for name in filenames:
+            try:
+                path = os.path.join(dirpath, name)
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    removed += 1
+            except OSError:
+                pass
+        if dirpath != heatmaps:
+            try:
+                os.rmdir(dirpath)   # only succeeds once a replaced model set's maps are gone
+            except OSError:
+                pass
+    return removed
+
+
+def _janitor_loop(interval):
+    while True:
+        time.sleep(interval)
+        try:
+            purge_expired()
+        except Exception:
+            logger.exception("Report janitor sweep failed")
+
+
+def ensure_janitor():
+    """
+    Start the per-process background sweeper once.
+    """
+    global _janitor_thread
+    if _janitor_thread is not None:
+        return
+    with _janitor_lock:
+        if _janitor_thread is None:
+            interval = getattr(settings, "REPORT_JANITOR_INTERVAL", 5 * 60)
+            _janitor_thread = threading.Thread(target=_janitor_loop, args=(interval,), name="report-janitor", daemon=True)
+            _janitor_thread.start()
+
+
+# ============================================================
+# DELIVERY (ETag + single Range)
+# ============================================================
+def _parse_range(header, size):
+    """
+    Parse a single ``bytes=start-end`` range. Returns (start, end) inclusive,
+    None when absent/unsupported, or "invalid" when unsatisfiable.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    start_s, _, end_s = header[len("bytes="):].strip().partition("-")
+    try:
+        if start_s == "":
+            length = int(end_s)
+            if length <= 0:
+                return "invalid"
+            return max(size - length, 0), size - 1
+        start = int(start_s)
+        end = int(end_s) if end_s else size - 1
+    except ValueError:
+        return None
+    if start >= size or end < start:
+        return "invalid"
+    return start, min(end, size - 1)
+
+
+def file_response(request, path, filename):
+    """
+    FileResponse (sendfile via wsgi.file_wrapper) with ETag and Range support.
+    The file is opened before it is stat'ed, so the janitor deleting it in
+    between cannot pair headers with a missing file; an already deleted
+    report is a 404.
+    """
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        raise Http404("Report not found or expired.")
+    st = os.fstat(f.fileno())
+    etag = f'"{st.st_size:x}-{st.st_mtime_ns:x}"'
+
+    if etag in [t.strip() for t in request.headers.get("If-None-Match", "").split(",")]:
+        f.close()
+        response = HttpResponseNotModified()
+        response["ETag"] = etag
+        return response
+
+    byte_range = _parse_range(request.headers.get("Range"), st.st_size)
+    if_range = request.headers.get("If-Range")
+    if if_range and if_range != etag:
+        byte_range = None
+
+    if byte_range == "invalid":
+        f.close()
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{st.st_size}"
+    elif byte_range:
+        start, end = byte_range
+        with f:
+            f.seek(start)
+            body = f.read(end - start + 1)
+        response = HttpResponse(body, status=206, content_type="application/pdf")
+        response["Content-Range"] = f"bytes {start}-{end}/{st.st_size}"
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    else:
+        response = FileResponse(f, as_attachment=True, filename=filename)
+
+    response["ETag"] = etag
+    response["Accept-Ranges"] = "bytes"
+    response["Cache-Control"] = "private, max-age=0"
+    return response
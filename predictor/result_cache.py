@@ -0,0 +1,65 @@
+import copy
+import hashlib
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError
+from django.db.models import F
+from django.utils import timezone
+
+from .models import CachedPredictionResult
+from . import utils
+
+logger = logging.getLogger(__name__)
+
+KEY_VERSION = "v1"
+HOT_PREFIX = "prediction-result:"
+
+
+def _hot_ttl():
+    return getattr(settings, "PREDICTION_CACHE_TTL", 60 * 60 * 24)
+
+
+def make_key(audio_sha=None, image_sha=None, fused=False):
+    """
+    Content hashes of the inputs plus fingerprints of the deployed artifacts,
+    so swapping a model naturally invalidates every stored result.
+    """
+    parts = [
+        KEY_VERSION,
+        f"audio={audio_sha or '-'}",
+        f"image={image_sha or '-'}",
+        f"fused={int(bool(fused))}",
+        f"models={utils.artifact_fingerprint()}",
+    ]
+    return hashlib.sha256("|".join(parts).encode()).hexdigest()
+
+
+def lookup(key):
+    """
+    Returns (payload, tier) where tier is "hot", "cold" or None on a miss.
+    """
+    payload = cache.get(HOT_PREFIX + key)
+    if payload is not None:
+        return payload, "hot"
+
+    row = CachedPredictionResult.objects.filter(key=key).only("id", "payload").first()
+    if row is None:
+        return None, None
+
+    CachedPredictionResult.objects.filter(id=row.id).update(hits=F("hits") + 1, last_hit_at=timezone.now())
+    cache.set(HOT_PREFIX + key, row.payload, _hot_ttl())   # promote
+    return row.payload, "cold"
+
+
+def store(key, payload):
+    payload = copy.deepcopy(payload)
+    cache.set(HOT_PREFIX + key, payload, _hot_ttl())
+    try:
+        CachedPredictionResult.objects.get_or_create(key=key, defaults={"payload": payload})
+    except IntegrityError:
+        # Another worker stored the same result concurrently
+        pass
+    except Exception as e:
+        logger.warning(f"Could not persist cached prediction {key[:12]}: {e}")
@@ -1,5 +1,8 @@
 from rest_framework import serializers
 
+from .models import ParkinsonPrediction
+from . import admission
+
 class PredictSerializer(serializers.Serializer):
     audio_file = serializers.FileField(required=False)
     image_file = serializers.ImageField(required=False)
@@ -9,8 +12,33 @@ class PredictSerializer(serializers.Serializer):
     return_spectrogram = serializers.BooleanField(default=False)
     return_heatmap = serializers.BooleanField(default=False)
     generate_report = serializers.BooleanField(default=False)
+    # "url": store briefly and return report_url; "inline": respond with the PDF itself
+    report_delivery = serializers.ChoiceField(choices=["url", "inline"], default="url")
+    # Render "url" reports in the background and return immediately with report_id
+    async_report = serializers.BooleanField(default=True)
 
     # ✅ Add user info fields
     name = serializers.CharField(required=False, allow_blank=True)
     email = serializers.EmailField(required=False, allow_blank=True)
     phone = serializers.CharField(required=False, allow_blank=True)
+
+    # Size/duration/dimension limits, checked from the headers before decoding
+    def validate_audio_file(self, upload):
+        error = admission.check_audio(upload)
+        if error:
+            raise serializers.ValidationError(error)
+        return upload
+
+    def validate_image_file(self, upload):
+        error = admission.check_image(upload)
+        if error:
+            raise serializers.ValidationError(error)
+        return upload
+
+
+class PredictionHistorySerializer(serializers.ModelSerializer):
+    user_email = serializers.EmailField(source="user.email", read_only=True)
+
+    class Meta:
+        model = ParkinsonPrediction
+        fields = ('id', 'uploaded_at', 'prediction_type', 'result', 'probability', 'user_email')
@@ -0,0 +1,221 @@
+"""
+Live-traffic comparison of the registry CANDIDATE version against CURRENT.
+
+Canary: a sticky share of users (CANARY_SHARE, by hashed user id) is served
+entirely by the candidate model set.
+
+Shadow: on a sampled fraction of the remaining requests (SHADOW_SAMPLE_RATE)
+the inputs already extracted for the response (raw voice features, the
+preprocessed MRI array; see utils.capture_inputs) are re-scored by both the
+current and the candidate audio/image models after the response has been
+sent, on one background thread. Nothing is decoded twice and the user never
+waits for the candidate.
+
+Agreement rates, probability deltas and model latencies (both sets timed
+back to back on the same thread) are aggregated and logged as one
+"shadow_summary" line per modality every SHADOW_FLUSH_INTERVAL seconds.
+"""
+
+import time
+import json
+import random
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from django.conf import settings
+
+from . import metrics, model_registry, utils
+
+logger = logging.getLogger(__name__)
+
+SHADOW_DECISIONS = metrics.counter("predictor_shadow_total", "Shadow comparisons by modality and agreement",
+                                   ["modality", "agree"])
+SHADOW_DROPPED = metrics.counter("predictor_shadow_dropped_total", "Shadow jobs dropped because the queue was full")
+CANARY_REQUESTS = metrics.counter("predictor_canary_requests_total", "Requests served by the candidate version")
+
+_executor = None
+_executor_lock = threading.Lock()
+_pending = 0
+_candidate = None            # ModelSet for the CANDIDATE version
+_candidate_checked = float("-inf")
+_candidate_lock = threading.Lock()
+_stats = {}                  # (modality, current, candidate) -> running totals
+_stats_lock = threading.Lock()
+_last_flush = time.monotonic()
+
+
+def _sample_rate():
+    return getattr(settings, "SHADOW_SAMPLE_RATE", 0.1)
+
+
+def _canary_share():
+    return getattr(settings, "CANARY_SHARE", 0.0)
+
+
+# ===============================
+# CANDIDATE MODEL SET
+# ===============================
+def candidate_models():
+    """
+    The CANDIDATE version's ModelSet, or None. The pointer is re-read at
+    most every registry poll interval; a version that fails to verify is
+    treated as no candidate.
+    """
+    global _candidate, _candidate_checked
+    now = time.monotonic()
+    if now - _candidate_checked < model_registry.POLL_INTERVAL:
+        return _candidate
+    with _candidate_lock:
+        if now - _candidate_checked >= model_registry.POLL_INTERVAL:
+            version = model_registry.candidate_version()
+            if version is None or version == utils.model_version():
+                _candidate = None
+            elif _candidate is None or _candidate.version != version:
+                try:
+                    _candidate = utils.open_model_set(version)
+                except Exception:
+                    logger.exception(f"Candidate model version {version} is unusable")
+                    _candidate = None
+            _candidate_checked = time.monotonic()
+    return _candidate
+
+
+def _in_canary(user_id, version, share):
+    digest = hashlib.sha256(f"canary:{version}:{user_id}".encode()).digest()
+    return int.from_bytes(digest[:8], "big") / 2**64 < share
+
+
+def choose_models(user):
+    """
+    (model set, is_canary) for this request.
+    """
+    share = _canary_share()
+    candidate = candidate_models() if share > 0 else None
+    if candidate is not None and _in_canary(getattr(user, "id", None), candidate.version, share):
+        CANARY_REQUESTS.inc()
+        return candidate, True
+    return utils.current_models(), False
+
+
+# ===============================
+# SHADOW JOBS
+# ===============================
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shadow")
+    return _executor
+
+
+def _timed(fn, *args):
+    t0 = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - t0) * 1000.0
+
+
+def _compare(current, candidate, captured):
+    for modality, input_key, model_name, score in (("audio", "audio_raw", "audio_model", utils.score_audio),
+                                                   ("image", "image_input", "image_model", utils.score_image)):
+        if modality not in captured or input_key not in captured:
+            continue
+        if current.get(model_name) is None or candidate.get(model_name) is None:
+            continue
+        try:
+            served, current_ms = _timed(score, current, captured[input_key])
+            shadow, candidate_ms = _timed(score, candidate, captured[input_key])
+        except Exception:
+            logger.exception(f"Shadow {modality} scoring failed")
+            continue
+        agree = served["label"] == shadow["label"]
+        SHADOW_DECISIONS.inc(modality=modality, agree=str(agree).lower())
+        delta_p = abs((served["probability"] or 0.0) - (shadow["probability"] or 0.0))
+        with _stats_lock:
+            s = _stats.setdefault((modality, current.version, candidate.version),
+                                  {"n": 0, "agree": 0, "delta_p": 0.0, "current_ms": [], "candidate_ms": []})
+            s["n"] += 1
+            s["agree"] += int(agree)
+            s["delta_p"] += delta_p
+            s["current_ms"].append(current_ms)
+            s["candidate_ms"].append(candidate_ms)
+
+
+def _run(current, candidate, captured):
+    global _pending
+    try:
+        _compare(current, candidate, captured)
+        maybe_flush()
+    finally:
+        with _executor_lock:
+            _pending -= 1
+
+
+def submit(current, candidate, captured):
+    """
+    Queue a comparison; dropped (and counted) when SHADOW_MAX_PENDING jobs
+    are already waiting, so a slow candidate can never build a backlog.
+    """
+    global _pending
+    with _executor_lock:
+        if _pending >= getattr(settings, "SHADOW_MAX_PENDING", 32):
+            SHADOW_DROPPED.inc()
+            return False
+        _pending += 1
+    _get_executor().submit(_run, current, candidate, captured)
+    return True
+
+
+def after_response(response, models, is_canary, captured):
+    """
+    Sample this request for shadowing; the job is queued when the response
+    is closed, i.e. after its body has gone out to the client.
+    """
+    if is_canary or not captured or random.random() >= _sample_rate():
+        return
+    candidate = candidate_models()
+    if candidate is None or candidate.version == models.version:
+        return
+    job = (models, candidate, dict(captured))
+    closers = getattr(response, "_resource_closers", None)
+    if closers is not None:
+        closers.append(lambda: submit(*job))
+    else:
+        submit(*job)
+
+
+# ===============================
+# BULK LOGGING
+# ===============================
+def maybe_flush(force=False):
+    global _last_flush
+    interval = getattr(settings, "SHADOW_FLUSH_INTERVAL", 60)
+    with _stats_lock:
+        if not _stats or (not force and time.monotonic() - _last_flush < interval):
+            return []
+        snapshot = dict(_stats)
+        _stats.clear()
+        _last_flush = time.monotonic()
+
+    summaries = []
+    for (modality, current, candidate), s in snapshot.items():
+        cur, cand = np.array(s["current_ms"]), np.array(s["candidate_ms"])
+        summaries.append({
+            "event": "shadow_summary",
+            "modality": modality,
+            "current": current,
+            "candidate": candidate,
+            "n": s["n"],
+            "agreement": round(s["agree"] / s["n"], 4),
+            "mean_abs_delta_p": round(s["delta_p"] / s["n"], 4),
+            "current_p50_ms": round(float(np.median(cur)), 3),
+            "candidate_p50_ms": round(float(np.median(cand)), 3),
+            "delta_p50_ms": round(float(np.median(cand - cur)), 3),
+            "candidate_p95_ms": round(float(np.percentile(cand, 95)), 3),
+        })
+    for summary in summaries:
+        logger.info(json.dumps(summary))
+    return summaries
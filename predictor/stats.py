@@ -0,0 +1,128 @@
+import base64
+import logging
+from datetime import datetime, time, timedelta
+
+from django.db.models import Avg, Count, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import ParkinsonPrediction, DailyPredictionRollup
+
+logger = logging.getLogger(__name__)
+
+POSITIVE = "Positive"
+NEGATIVE = "Negative"
+
+
+# ============================================================
+# KEYSET CURSORS
+# ============================================================
+def encode_cursor(last_id):
+    return base64.urlsafe_b64encode(f"id:{last_id}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """
+    Returns the id encoded in an opaque cursor, or raises ValueError.
+    """
+    padded = cursor + "=" * (-len(cursor) % 4)
+    raw = base64.urlsafe_b64decode(padded.encode()).decode()
+    prefix, _, value = raw.partition(":")
+    if prefix != "id":
+        raise ValueError("Malformed cursor")
+    return int(value)
+
+
+def history_page(queryset, cursor=None, limit=20):
+    """
+    Newest-first keyset page over ``queryset``.
+
+    Ids are monotonic with ``uploaded_at`` (auto_now_add), so ``id < last_id``
+    walks the (user, -id) index instead of counting skipped rows like OFFSET.
+    Returns (rows, next_cursor).
+    """
+    if cursor:
+        queryset = queryset.filter(id__lt=decode_cursor(cursor))
+    rows = list(queryset.order_by("-id")[: limit + 1])
+    next_cursor = encode_cursor(rows[limit - 1].id) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+
+# ============================================================
+# DAILY ROLLUPS
+# ============================================================
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def aggregate_days(start_day, end_day=None):
+    """
+    Database-side GROUP BY day/type over [start_day, end_day).
+    """
+    qs = ParkinsonPrediction.objects.filter(uploaded_at__gte=_day_start(start_day))
+    if end_day is not None:
+        qs = qs.filter(uploaded_at__lt=_day_start(end_day))
+    return (
+        qs.annotate(day=TruncDate("uploaded_at"))
+        .values("day", "prediction_type")
+        .annotate(
+            total=Count("id"),
+            positives=Count("id", filter=Q(result=POSITIVE)),
+            avg_probability=Avg("probability"),
+        )
+        .order_by("day", "prediction_type")
+    )
+
+
+def refresh_daily_rollups(days=2, until=None):
+    """
+    Recompute the materialized rollups for the last ``days`` complete days up to
+    ``until`` (exclusive, defaults to today). Older days are immutable once rolled
+    up, so a periodic refresh only touches a small window.
+    """
+    until = until or timezone.localdate()
+    start = until - timedelta(days=days)
+    rows = [
+        DailyPredictionRollup(
+            day=r["day"],
+            prediction_type=r["prediction_type"],
+            total=r["total"],
+            positives=r["positives"],
+            avg_probability=r["avg_probability"],
+        )
+        for r in aggregate_days(start, until)
+    ]
+    if rows:
+        DailyPredictionRollup.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=["day", "prediction_type"],
+            update_fields=["total", "positives", "avg_probability", "refreshed_at"],
+            batch_size=500,
+        )
+    logger.info(f"Refreshed {len(rows)} daily rollups from {start} to {until}")
+    return len(rows)
+
+
+def daily_stats(days=30):
+    """
+    Positive-rate series for the last ``days`` days: materialized rollups for
+    closed days plus a live aggregate for today only.
+    """
+    today = timezone.localdate()
+    start = today - timedelta(days=days - 1)
+    series = [
+        {
+            "day": r.day,
+            "prediction_type": r.prediction_type,
+            "total": r.total,
+            "positives": r.positives,
+            "avg_probability": r.avg_probability,
+        }
+        for r in DailyPredictionRollup.objects.filter(day__gte=start, day__lt=today).order_by("day", "prediction_type")
+    ]
+    series += list(aggregate_days(today))
+    for row in series:
+        row["day"] = row["day"].isoformat()
+        row["positive_rate"] = row["positives"] / row["total"] if row["total"] else 0.0
+    return series
@@ -1,3 +1,1242 @@
-from django.test import TestCase
+import csv
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import zipfile
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest import mock
+
+import numpy as np
+from PIL import Image
+from django.core.cache import cache
+from django.contrib.auth import get_user_model
+from django.http import Http404
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.response import Response
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from . import admission, batch_scoring, bulk_reports, data_pipeline, dataset_manifest, embeddings, feature_store, features, gradcam, image_shards, metrics, model_eval, model_registry, model_search, report_engine, report_queue, report_store, result_cache, shadow, stats, utils
+from .models import DailyPredictionRollup, ParkinsonPrediction
+from .views import _log_prediction, _record_prediction
+
+
+def _user(n, **extra):
+    return get_user_model().objects.create(email=f"user{n}@example.com", username=f"user{n}", phone=str(n), **extra)
+
+
+class PredictionHistoryTests(TestCase):
+    def setUp(self):
+        self.patient = _user(1)
+        self.staff = _user(2, is_staff=True)
+        for label in (0, 1, 0):
+            _record_prediction(self.patient, {"final_label": label, "final_confidence": 0.9})
+        self.client = APIClient()
+
+    def get(self, user, **params):
+        self.client.force_authenticate(user)
+        return self.client.get("/api/predictor/history/", params)
+
+    def test_cursor_pagination(self):
+        first = self.get(self.patient, limit=2)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual([r["result"] for r in first.data["results"]], [stats.NEGATIVE, stats.POSITIVE])
+        rest = self.get(self.patient, limit=2, cursor=first.data["next_cursor"])
+        self.assertEqual([r["result"] for r in rest.data["results"]], [stats.NEGATIVE])
+        self.assertIsNone(rest.data["next_cursor"])
+
+    def test_staff_may_view_a_patient(self):
+        self.assertEqual(len(self.get(self.staff).data["results"]), 0)
+        self.assertEqual(len(self.get(self.staff, user_id=self.patient.id).data["results"]), 3)
+        self.assertEqual(len(self.get(self.patient, user_id=self.staff.id).data["results"]), 3)   # ignored
+
+    def test_bad_parameters(self):
+        self.assertEqual(self.get(self.patient, limit="x").status_code, 400)
+        self.assertEqual(self.get(self.patient, limit=0).status_code, 400)
+        self.assertEqual(self.get(self.patient, cursor="garbage").status_code, 400)
+        self.assertEqual(self.get(self.staff, user_id="abc").status_code, 400)
+
+
+class DailyStatsTests(TestCase):
+    def setUp(self):
+        self.user = _user(1)
+        self.client = APIClient()
+
+    def record(self, label, prediction_type, days_ago=0):
+        resp = {"final_label": label, "final_confidence": 0.8, f"{prediction_type}_prediction": {"label": label}}
+        record_id = _record_prediction(self.user, resp)
+        if days_ago:
+            ParkinsonPrediction.objects.filter(id=record_id).update(
+                uploaded_at=timezone.now() - timedelta(days=days_ago))
+
+    def test_rollups_and_live_day(self):
+        self.record(1, "image", days_ago=1)
+        self.record(0, "image", days_ago=1)
+        self.record(1, "fused")
+        self.assertEqual(stats.refresh_daily_rollups(days=2), 1)
+        rollup = DailyPredictionRollup.objects.get()
+        self.assertEqual((rollup.prediction_type, rollup.total, rollup.positives), ("image", 2, 1))
+
+        series = stats.daily_stats(days=7)
+        self.assertEqual([(r["prediction_type"], r["positive_rate"]) for r in series], [("image", 0.5), ("fused", 1.0)])
+
+    def test_endpoint_is_staff_only(self):
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.get("/api/predictor/stats/daily/").status_code, 403)
+        self.client.force_authenticate(_user(2, is_staff=True))
+        response = self.client.get("/api/predictor/stats/daily/", {"days": "x"})
+        self.assertEqual(response.status_code, 400)
+
+
+class ResultCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.old = utils.ModelSet(None, tempfile.gettempdir(), "a" * 64)
+        self.new = utils.ModelSet(None, tempfile.gettempdir(), "b" * 64)
+
+    def key(self, model_set, **inputs):
+        with mock.patch.object(utils, "current_models", return_value=model_set):
+            return result_cache.make_key(**inputs)
+
+    def test_key_depends_on_inputs(self):
+        self.assertEqual(self.key(self.old, audio_sha="1"), self.key(self.old, audio_sha="1"))
+        self.assertNotEqual(self.key(self.old, audio_sha="1"), self.key(self.old, audio_sha="2"))
+        self.assertNotEqual(self.key(self.old, audio_sha="1", image_sha="2"),
+                            self.key(self.old, audio_sha="1", image_sha="2", fused=True))
+
+    def test_model_swap_invalidates_stored_results(self):
+        result_cache.store(self.key(self.old, audio_sha="1"), {"final_label": 1})
+        self.assertEqual(result_cache.lookup(self.key(self.old, audio_sha="1")), ({"final_label": 1}, "hot"))
+        self.assertEqual(result_cache.lookup(self.key(self.new, audio_sha="1")), (None, None))
+
+    def test_cold_tier_promotes_to_hot(self):
+        key = self.key(self.old, image_sha="1")
+        result_cache.store(key, {"final_label": 0})
+        cache.clear()
+        self.assertEqual(result_cache.lookup(key), ({"final_label": 0}, "cold"))
+        self.assertEqual(result_cache.lookup(key)[1], "hot")
+
+
+class ReportStoreTests(SimpleTestCase):
+    def setUp(self):
+        self.store = tempfile.mkdtemp()
+        self.media = tempfile.mkdtemp()
+        for directory in (self.store, self.media):
+            self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        overrides = override_settings(REPORT_STORE_DIR=self.store, MEDIA_ROOT=self.media, REPORT_TTL_SECONDS=60)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+    def test_save_find_and_expiry(self):
+        report_id = "a" * 32
+        path = report_store.save(report_id, b"%PDF-1.4")
+        self.assertEqual(report_store.find(report_id), path)
+        os.utime(path, (time.time() - 120, time.time() - 120))
+        self.assertIsNone(report_store.find(report_id))
+        self.assertFalse(os.path.exists(path))
+
+    def test_filenames_are_validated(self):
+        self.assertEqual(report_store.parse_report_filename(report_store.report_filename("b" * 32)), "b" * 32)
+        for name in ("../settings.py", "parkinson_report_xyz.pdf", None):
+            self.assertIsNone(report_store.parse_report_filename(name))
+
+    def test_janitor_sweeps_store_and_media(self):
+        stale = [os.path.join(d, report_store.report_filename(c * 32)) for d, c in ((self.store, "c"), (self.media, "d"))]
+        fresh = os.path.join(self.store, report_store.report_filename("e" * 32))
+        for path in stale + [fresh]:
+            with open(path, "wb") as f:
+                f.write(b"%PDF")
+        for path in stale:
+            os.utime(path, (time.time() - 120, time.time() - 120))
+        self.assertEqual(report_store.purge_expired(), 2)
+        self.assertTrue(os.path.exists(fresh))
+
+    def test_heatmaps_share_the_report_ttl(self):
+        self.assertIsNone(report_store.load_heatmap("a" * 64, "f" * 64))
+        fresh = report_store.save_heatmap("a" * 64, "f" * 64, b"png")
+        self.assertEqual(report_store.load_heatmap("a" * 64, "f" * 64), b"png")
+        self.assertIsNone(report_store.load_heatmap("a" * 64, "e" * 64))   # other model set
+        self.assertTrue(fresh.startswith(self.store))
+
+        stale = report_store.save_heatmap("b" * 64, "e" * 64, b"png")
+        os.utime(stale, (time.time() - 120, time.time() - 120))
+        self.assertEqual(report_store.purge_expired(), 1)
+        self.assertFalse(os.path.exists(os.path.dirname(stale)))   # replaced model set's directory
+        self.assertTrue(os.path.exists(fresh))
+        os.utime(fresh, (time.time() - 120, time.time() - 120))
+        self.assertIsNone(report_store.load_heatmap("a" * 64, "f" * 64))
+
+
+class ReportDeliveryTests(SimpleTestCase):
+    BODY = bytes(range(100))
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, "report.pdf")
+        with open(self.path, "wb") as f:
+            f.write(self.BODY)
+
+    def get(self, **headers):
+        request = RequestFactory().get("/", headers=headers)
+        response = report_store.file_response(request, self.path, "report.pdf")
+        body = b"".join(response.streaming_content) if response.streaming else response.content
+        response.close()
+        return response, body
+
+    def test_full_download(self):
+        response, body = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body, self.BODY)
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+
+    def test_ranges(self):
+        for header, start, end in (("bytes=10-19", 10, 19), ("bytes=90-", 90, 99),
+                                   ("bytes=-5", 95, 99), ("bytes=95-500", 95, 99), ("bytes=-500", 0, 99)):
+            with self.subTest(header=header):
+                response, body = self.get(Range=header)
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(body, self.BODY[start:end + 1])
+                self.assertEqual(response["Content-Range"], f"bytes {start}-{end}/100")
+
+    def test_unsatisfiable_range(self):
+        for header in ("bytes=100-", "bytes=20-10", "bytes=-0"):
+            with self.subTest(header=header):
+                response, _ = self.get(Range=header)
+                self.assertEqual(response.status_code, 416)
+                self.assertEqual(response["Content-Range"], "bytes */100")
+
+    def test_multiple_or_malformed_ranges_fall_back_to_the_full_file(self):
+        for header in ("bytes=0-1,5-6", "bytes=a-b", "items=0-1"):
+            with self.subTest(header=header):
+                response, body = self.get(Range=header)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(body, self.BODY)
+
+    def test_etag_revalidation(self):
+        etag = self.get()[0]["ETag"]
+        response, _ = self.get(If_None_Match=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+        self.assertEqual(self.get(If_None_Match='"other"')[0].status_code, 200)
+
+    def test_stale_if_range_sends_the_whole_file(self):
+        etag = self.get()[0]["ETag"]
+        self.assertEqual(self.get(Range="bytes=0-9", If_Range=etag)[0].status_code, 206)
+        self.assertEqual(self.get(Range="bytes=0-9", If_Range='"stale"')[0].status_code, 200)
+
+
+    def test_report_deleted_while_serving(self):
+        real_fstat = os.fstat
+
+        def janitor_runs(fd):
+            os.remove(self.path)   # between open and stat
+            return real_fstat(fd)
+
+        with mock.patch.object(report_store.os, "fstat", side_effect=janitor_runs):
+            response, body = self.get(Range="bytes=90-")
+        self.assertEqual((response.status_code, body), (206, self.BODY[90:]))
+        self.assertEqual(response["Content-Range"], "bytes 90-99/100")
+        with self.assertRaises(Http404):
+            self.get()
+
+
+class ReportQueueTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.store = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.store, ignore_errors=True)
+        overrides = override_settings(REPORT_STORE_DIR=self.store)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.release = threading.Event()
+        self.renders = []
+
+    def render(self, **kwargs):
+        self.renders.append(kwargs["prediction"])
+        self.release.wait(5)
+        if kwargs["prediction"].get("fail"):
+            raise ValueError("broken template")
+        return b"%PDF-1.4"
+
+    def test_identical_requests_share_one_render(self):
+        report_id = report_queue.report_id_for("prediction-key", 7)
+        self.assertEqual(report_id, report_queue.report_id_for("prediction-key", 7))
+        with mock.patch.object(utils, "generate_pdf_report", side_effect=self.render):
+            self.assertEqual(report_queue.submit(report_id, {"final_label": 1}), report_queue.PENDING)
+            self.assertEqual(report_queue.submit(report_id, {"final_label": 1}), report_queue.PENDING)
+            self.assertEqual(report_queue.status(report_id), report_queue.PENDING)
+            self.release.set()
+            self.assertEqual(report_queue.wait(report_id, 5), report_queue.READY)
+            self.assertEqual(report_queue.submit(report_id, {"final_label": 1}), report_queue.READY)
+        self.assertEqual(len(self.renders), 1)
+        self.assertEqual(report_queue.pending_count(), 0)
+
+    def test_failed_render(self):
+        report_id = report_queue.report_id_for("broken", 7)
+        self.release.set()
+        with mock.patch.object(utils, "generate_pdf_report", side_effect=self.render):
+            with self.assertLogs("predictor.report_queue", "ERROR"):
+                report_queue.submit(report_id, {"fail": True})
+                self.assertEqual(report_queue.wait(report_id, 5), report_queue.FAILED)
+        self.assertEqual(report_queue.status(report_id), report_queue.FAILED)
+        self.assertEqual(report_queue.status("f" * 32), report_queue.UNKNOWN)
+
+    @override_settings(REPORT_PENDING_TIMEOUT=60)
+    def test_render_pending_in_another_worker_is_not_repeated(self):
+        report_id = report_queue.report_id_for("other-worker", 7)
+        report_store.write_status(report_id, report_queue.PENDING)
+        self.release.set()
+        with mock.patch.object(utils, "generate_pdf_report", side_effect=self.render):
+            self.assertEqual(report_queue.submit(report_id, {"final_label": 1}), report_queue.PENDING)
+            self.assertEqual(report_queue.pending_count(), 0)
+            self.assertEqual(self.renders, [])
+
+            path = os.path.join(self.store, f"parkinson_report_{report_id}.status")
+            os.utime(path, (time.time() - 120, time.time() - 120))   # that worker died
+            report_queue.submit(report_id, {"final_label": 1})
+            self.assertEqual(report_queue.wait(report_id, 5), report_queue.READY)
+        self.assertEqual(len(self.renders), 1)
+
+    @override_settings(REPORT_PENDING_TIMEOUT=60)
+    def test_status_is_shared_through_the_store(self):
+        report_id = "e" * 32   # queued by another worker
+        report_store.write_status(report_id, report_queue.PENDING)
+        self.assertEqual(report_queue.status(report_id), report_queue.PENDING)
+        path = os.path.join(self.store, f"parkinson_report_{report_id}.status")
+        os.utime(path, (time.time() - 120, time.time() - 120))
+        self.assertEqual(report_queue.status(report_id), report_queue.FAILED)   # that worker died
+
+
+def _png(width, height, mode="RGB"):
+    buf = io.BytesIO()
+    Image.new(mode, (width, height), "red").save(buf, format="PNG")
+    return buf.getvalue()
+
+
+class ReportEngineTests(SimpleTestCase):
+    def test_render_report(self):
+        user_info = {"name": "Test Patient", "email": "p@example.com", "phone": "1", "test_date": "2025-01-01"}
+        pdf = report_engine.render_report({"final_label": 1, "final_confidence": 0.87}, _png(600, 300),
+                                          _png(224, 224, "RGBA"), user_info)
+        self.assertTrue(pdf.startswith(b"%PDF"))
+        self.assertIn(b"/FormXob.reportStatic", pdf)
+        self.assertEqual(pdf.count(b"/Subtype /Image"), 2)
+        self.assertTrue(report_engine.render_report({"final_label": 0}).startswith(b"%PDF"))
+
+    def test_images_are_downscaled_once(self):
+        jpeg = report_engine.cached_image(_png(2000, 1000, "RGBA"), 250, 150)
+        self.assertIs(report_engine.cached_image(_png(2000, 1000, "RGBA"), 250, 150), jpeg)
+        with Image.open(io.BytesIO(jpeg)) as img:
+            self.assertEqual((img.format, img.size), ("JPEG", (500, 250)))
+
+    def test_image_cache_is_bounded(self):
+        with mock.patch.object(report_engine, "IMAGE_CACHE_ENTRIES", 2):
+            for size in (10, 11, 12):
+                report_engine.cached_image(_png(size, size), 100, 100)
+            self.assertLessEqual(len(report_engine._images), 2)
+
+
+class _InlinePool:
+    """
+    Runs each job on submit, counting jobs handed over.
+    """
+    def __init__(self):
+        self.submitted = 0
+
+    def submit(self, fn, *args):
+        self.submitted += 1
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+
+class BulkReportTests(TestCase):
+    def jobs(self, count):
+        for n in range(count):
+            self.pulled += 1
+            yield {"filename": f"report_{n}.pdf", "prediction": {"final_label": n % 2, "final_confidence": 0.7},
+                   "user_info": {"name": f"Patient {n}"}}
+
+    def setUp(self):
+        self.pulled = 0
+
+    def test_archive_is_complete_and_valid(self):
+        data = b"".join(bulk_reports.iter_zip(self.jobs(5), window=2, pool=_InlinePool()))
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            self.assertIsNone(archive.testzip())
+            self.assertEqual(sorted(archive.namelist()), [f"report_{n}.pdf" for n in range(5)])
+            self.assertTrue(all(archive.read(name).startswith(b"%PDF") for name in archive.namelist()))
+
+    def test_at_most_window_documents_are_outstanding(self):
+        pool = _InlinePool()
+        written = 0
+        for _ in bulk_reports.iter_zip(self.jobs(10), window=3, pool=pool):
+            self.assertLessEqual(pool.submitted - written, 3)
+            self.assertLessEqual(self.pulled - written, 3)
+            written += 1
+        self.assertEqual(pool.submitted, 10)
+
+    def test_endpoint_only_includes_own_predictions(self):
+        patient, other = _user(1), _user(2)
+        own = _record_prediction(patient, {"final_label": 1, "final_confidence": 0.9})
+        foreign = _record_prediction(other, {"final_label": 0, "final_confidence": 0.6})
+        client = APIClient()
+        client.force_authenticate(patient)
+
+        response = client.post("/api/predictor/reports/bulk/", {"prediction_ids": [own, foreign]}, format="json")
+        self.assertEqual((response.status_code, response.data["missing"]), (404, [foreign]))
+        response = client.post("/api/predictor/reports/bulk/", {"prediction_ids": ["x"]}, format="json")
+        self.assertEqual(response.status_code, 400)
+
+        with ThreadPoolExecutor(max_workers=2) as pool, mock.patch.object(bulk_reports, "_get_pool", return_value=pool):
+            response = client.post("/api/predictor/reports/bulk/", {"prediction_ids": [own]}, format="json")
+            data = b"".join(response.streaming_content)
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            self.assertEqual(archive.namelist(), [f"parkinson_report_{own}.pdf"])
+
+
+def _thread_pool(max_workers=None, mp_context=None):
+    return ThreadPoolExecutor(max_workers=max_workers)
+
+
+def _fake_predict(batch):
+    return [{"label": int(arr.mean() > 0.5), "probability": float(arr.mean())} for arr in batch]
+
+
+@mock.patch.object(batch_scoring, "ProcessPoolExecutor", _thread_pool)
+class BatchScoringTests(SimpleTestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.data = os.path.join(self.root, "data")
+        for label, color in (("healthy", "black"), ("parkinson", "white")):
+            os.makedirs(os.path.join(self.data, label))
+            for n in range(3):
+                Image.new("RGB", (32, 32), color).save(os.path.join(self.data, label, f"{n}.png"))
+        with open(os.path.join(self.data, "notes.txt"), "w") as f:
+            f.write("not an image")
+        self.out = os.path.join(self.root, "results.csv")
+
+    def score(self, **kwargs):
+        return batch_scoring.score([self.data], self.out, _fake_predict, _fake_predict, batch_size=4, workers=2,
+                                   **kwargs)
+
+    def rows(self):
+        with open(self.out, newline="") as f:
+            return list(csv.DictReader(f))
+
+    def test_scores_every_image_once_and_resumes(self):
+        self.assertEqual(self.score(), (6, 0))
+        rows = self.rows()
+        self.assertEqual(len(rows), 6)
+        self.assertEqual({(r["label_hint"], r["label"]) for r in rows}, {("healthy", "0"), ("parkinson", "1")})
+
+        self.assertEqual(self.score(), (0, 6))
+        path = os.path.join(self.data, "healthy", "0.png")
+        Image.new("RGB", (32, 32), "white").save(path)
+        os.utime(path, ns=(time.time_ns() + 10**9, time.time_ns() + 10**9))
+        self.assertEqual(self.score(), (1, 5))
+        self.assertEqual(len(self.rows()), 7)
+
+    def test_unreadable_files_are_reported(self):
+        with open(os.path.join(self.data, "healthy", "broken.png"), "wb") as f:
+            f.write(b"not a png")
+        self.score()
+        broken = [r for r in self.rows() if r["path"].endswith("broken.png")]
+        self.assertEqual(len(broken), 1)
+        self.assertTrue(broken[0]["error"])
+        self.assertEqual(broken[0]["label"], "")
+
+    def test_rows_whose_inference_failed_are_retried(self):
+        def broken(batch):
+            raise RuntimeError("model unavailable")
+
+        with self.assertLogs("predictor.batch_scoring", "WARNING"):
+            batch_scoring.score([self.data], self.out, _fake_predict, broken, batch_size=4, workers=2)
+        self.assertTrue(all(r["error"] for r in self.rows()))
+        self.assertEqual(self.score(), (6, 0))
+
+    def test_failed_inference_is_recorded_per_row(self):
+        def flaky(batch):
+            if (batch == 7).any():
+                raise RuntimeError("corrupt input")
+            return _fake_predict(batch)
+
+        extracted = [("a/x.png", "image", np.zeros((4, 4)), None), ("a/y.png", "image", None, "unreadable"),
+                     ("a/z.png", "image", np.full((4, 4), 7.0), None)]
+        with self.assertLogs("predictor.batch_scoring", "WARNING"):
+            rows, failed = batch_scoring._score_batch(extracted, _fake_predict, flaky)
+        self.assertEqual([r["error"] for r in rows], [None, "unreadable", "inference failed: corrupt input"])
+        self.assertIsNotNone(rows[0]["label"])
+        self.assertEqual(failed, {2})
+
+
+class FeatureStoreTests(SimpleTestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.cache_dir = os.path.join(self.root, "cache")
+        self.calls = []
+        extractors = dict(feature_store.EXTRACTORS, bytes4=(self.extract, (".bin",)))
+        for patcher in (mock.patch.object(feature_store, "EXTRACTORS", extractors),
+                        mock.patch.object(feature_store, "ProcessPoolExecutor", _thread_pool)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def extract(self, path):
+        self.calls.append(os.path.basename(path))
+        with open(path, "rb") as f:
+            data = f.read()
+        if data == b"bad":
+            raise ValueError("corrupt recording")
+        return np.frombuffer(data[:4].ljust(4, b"\0"), dtype=np.uint8).astype(np.float32)
+
+    def write(self, label, name, data):
+        os.makedirs(os.path.join(self.root, "data", label), exist_ok=True)
+        with open(os.path.join(self.root, "data", label, name), "wb") as f:
+            f.write(data)
+
+    def materialize(self, **kwargs):
+        items = feature_store.labelled_files(os.path.join(self.root, "data"), ["healthy", "parkinson"], (".bin",))
+        return feature_store.materialize(items, "bytes4", "toy", cache_dir=self.cache_dir, **kwargs)
+
+    def test_shard_round_trip(self):
+        for n in range(5):
+            self.write("healthy" if n < 3 else "parkinson", f"{n}.bin", bytes([n, n, n, n]))
+        X, y = feature_store.load_features(self.materialize(shard_rows=2))
+        np.testing.assert_array_equal(X[:, 0], [0, 1, 2, 3, 4])
+        np.testing.assert_array_equal(y, [0, 0, 0, 1, 1])
+        self.assertEqual(X.dtype, np.float32)
+
+    def test_rows_are_taken_by_source_hash(self):
+        for n in range(3):
+            self.write("healthy", f"{n}.bin", bytes([n, n, n, n]))
+        shard_dir = self.materialize(shard_rows=2)
+        shas = [hashlib.sha256(bytes([n, n, n, n])).hexdigest() for n in range(4)]
+        X = feature_store.take_by_sha(shard_dir, [shas[2], shas[0]])
+        np.testing.assert_array_equal(X[:, 0], [2, 0])
+        with self.assertRaises(KeyError):
+            feature_store.take_by_sha(shard_dir, [shas[1], shas[3]])
+
+    def test_only_new_content_is_extracted(self):
+        self.write("healthy", "a.bin", b"aaaa")
+        self.write("parkinson", "b.bin", b"bbbb")
+        self.materialize()
+        self.assertEqual(sorted(self.calls), ["a.bin", "b.bin"])
+
+        self.calls.clear()
+        self.materialize()
+        os.rename(os.path.join(self.root, "data", "healthy", "a.bin"), os.path.join(self.root, "data", "healthy", "c.bin"))
+        self.write("healthy", "d.bin", b"aaaa")   # same content as a.bin
+        self.materialize()
+        self.assertEqual(self.calls, [])
+
+        self.write("parkinson", "e.bin", b"eeee")
+        X, y = feature_store.load_features(self.materialize())
+        self.assertEqual(self.calls, ["e.bin"])
+        self.assertEqual(len(X), 4)
+
+    def test_failed_files_are_left_out(self):
+        self.write("healthy", "a.bin", b"aaaa")
+        self.write("healthy", "b.bin", b"bad")
+        with self.assertLogs("predictor.feature_store", "WARNING"):
+            X, y = feature_store.load_features(self.materialize())
+        self.assertEqual(len(X), 1)
+
+
+def _image_tree(root, per_class=5, size=(40, 30)):
+    """
+    root/healthy/*.png (dark) and root/parkinson/*.png (light).
+    """
+    for label, value in (("healthy", 40), ("parkinson", 200)):
+        os.makedirs(os.path.join(root, label))
+        for n in range(per_class):
+            Image.new("RGB", size, (value + n, value, value)).save(os.path.join(root, label, f"{label}_{n}.png"))
+
+
+class DataPipelineTests(SimpleTestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        _image_tree(self.root)
+
+    def test_evaluation_dataset_is_ordered_and_normalized(self):
+        paths, labels, classes = data_pipeline.list_labelled_images(self.root)
+        self.assertEqual((classes, labels), (["healthy", "parkinson"], [0] * 5 + [1] * 5))
+        images, y = next(iter(data_pipeline.directory_dataset(self.root, batch_size=10, image_size=(16, 16))))
+        self.assertEqual(tuple(images.shape), (10, 16, 16, 3))
+        np.testing.assert_array_equal(y.numpy(), labels)
+        np.testing.assert_allclose(images.numpy()[0, 0, 0], np.array([40, 40, 40]) / 255.0, atol=1e-6)
+
+    def test_training_batches_are_augmented_in_range(self):
+        paths, labels, _ = data_pipeline.list_labelled_images(self.root)
+        train_ds = data_pipeline.build_image_dataset(paths, labels, batch_size=4, image_size=(16, 16), training=True)
+        train = [(x.numpy(), y.numpy()) for x, y in train_ds]
+        self.assertEqual(sorted(np.concatenate([y for _, y in train]).tolist()), sorted(labels))
+        for images, _ in train:
+            self.assertEqual(images.dtype, np.float32)
+            self.assertTrue(0.0 <= images.min() and images.max() <= 1.0)
+
+    def test_augmentation_is_a_function_of_the_batch_seed(self):
+        images = np.random.default_rng(0).integers(0, 256, (8, 16, 16, 3)).astype(np.float32)
+        labels = np.zeros(8, dtype=np.float32)
+
+        def augment(seed, zoom_range=0.2):
+            return data_pipeline._augment_batch(images, labels, zoom_range, np.array(seed, dtype=np.int64))[0].numpy()
+
+        np.testing.assert_array_equal(augment([1, 2]), augment([1, 2]))
+        self.assertFalse(np.array_equal(augment([1, 2]), augment([3, 4])))
+        for original, flipped in zip(images, augment([5, 6], zoom_range=0)):
+            self.assertTrue(np.array_equal(flipped, original) or np.array_equal(flipped, original[:, ::-1]))
+
+
+class DatasetManifestTests(SimpleTestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.data = os.path.join(self.root, "dataset")
+        os.makedirs(self.data)
+        _image_tree(self.data, per_class=10)
+        self.manifest_path = os.path.join(self.root, "manifest.json")
+        patcher = mock.patch.object(dataset_manifest, "STAT_CACHE_DIR", os.path.join(self.root, "stat"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def splits(self, manifest):
+        return {e["sha256"]: e["split"] for e in manifest["entries"]}
+
+    def test_split_is_stratified_and_stable(self):
+        manifest, changes = dataset_manifest.update(self.data, self.manifest_path, test_size=0.2)
+        self.assertEqual(changes, {"added": 20, "removed": 0, "kept": 0})
+        test_paths, test_labels = dataset_manifest.split_files(manifest, dataset_manifest.TEST)
+        self.assertEqual(sorted(test_labels), [0, 0, 1, 1])
+        self.assertTrue(all(p.startswith(self.data) for p in test_paths))
+
+        moved = os.path.join(self.data, "healthy", "renamed.png")
+        os.rename(os.path.join(self.data, "healthy", "healthy_0.png"), moved)
+        again, changes = dataset_manifest.update(self.data, self.manifest_path)
+        self.assertEqual(changes, {"added": 0, "removed": 0, "kept": 20})
+        self.assertEqual(self.splits(again), self.splits(manifest))
+
+    def test_new_images_keep_the_test_fraction(self):
+        manifest, _ = dataset_manifest.update(self.data, self.manifest_path, test_size=0.2)
+        for n in range(10, 20):
+            Image.new("RGB", (40, 30), (n, 1, 2)).save(os.path.join(self.data, "healthy", f"healthy_{n}.png"))
+        updated, changes = dataset_manifest.update(self.data, self.manifest_path)
+        self.assertEqual(changes["added"], 10)
+        old = self.splits(manifest)
+        self.assertTrue(all(updated_split == old[sha] for sha, updated_split in self.splits(updated).items()
+                            if sha in old))
+        _, labels = dataset_manifest.split_files(updated, dataset_manifest.TEST)
+        self.assertEqual(labels.count(0), 4)
+
+    def test_folds_are_reproducible_and_disjoint(self):
+        manifest, _ = dataset_manifest.update(self.data, self.manifest_path)
+        folds = dataset_manifest.folds(manifest, k=4)
+        self.assertEqual(folds, dataset_manifest.folds(manifest, k=4))
+        val_paths = [p for _, (paths, _) in folds for p in paths]
+        train_paths, _ = dataset_manifest.split_files(manifest, dataset_manifest.TRAIN)
+        self.assertEqual(sorted(val_paths), sorted(train_paths))
+
+    def test_verify_reports_changed_files(self):
+        manifest, _ = dataset_manifest.update(self.data, self.manifest_path)
+        Image.new("RGB", (40, 30), "blue").save(os.path.join(self.data, "parkinson", "parkinson_3.png"))
+        os.remove(os.path.join(self.data, "healthy", "healthy_1.png"))
+        self.assertEqual(dataset_manifest.verify(manifest), ["healthy/healthy_1.png", "parkinson/parkinson_3.png"])
+
+    def test_manifest_split_datasets(self):
+        manifest, _ = dataset_manifest.update(self.data, self.manifest_path)
+        train_ds, test_ds = data_pipeline.manifest_split(manifest, batch_size=8, image_size=(16, 16))
+        self.assertEqual(sum(len(y) for _, y in test_ds), 4)
+        self.assertEqual(sum(len(y) for _, y in train_ds), 16)
+
+
+class ImageShardTests(SimpleTestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.data = os.path.join(self.root, "dataset")
+        os.makedirs(self.data)
+        _image_tree(self.data, per_class=4)
+        self.out = os.path.join(self.root, "shards")
+
+    def items(self):
+        paths, labels, _ = data_pipeline.list_labelled_images(self.data)
+        return [{"path": p, "label": l} for p, l in zip(paths, labels)]
+
+    def test_pack_take_round_trip(self):
+        items = self.items()
+        packed = image_shards.PackedImageDataset(image_shards.pack(items, self.out, (12, 12), shard_rows=3))
+        self.assertEqual(len(packed), 8)
+        order = [7, 0, 4, 3, 5]
+        images, labels = packed.take(order)
+        for row, i in enumerate(order):
+            np.testing.assert_array_equal(images[row], features.load_image_array(items[i]["path"], (12, 12)))
+        np.testing.assert_array_equal(labels, [items[i]["label"] for i in order])
+        batches = list(packed.iter_batches(batch_size=3, shuffle=True, seed=1))
+        self.assertEqual(sorted(np.concatenate([y for _, y in batches]).tolist()), [0] * 4 + [1] * 4)
+
+    def test_repack_decodes_only_changed_files(self):
+        items = self.items()
+        image_shards.pack(items, self.out, (12, 12), shard_rows=3)
+        changed = items[2]["path"]
+        Image.new("RGB", (40, 30), "white").save(changed)
+        os.utime(changed, ns=(time.time_ns() + 10**9, time.time_ns() + 10**9))
+        with mock.patch.object(image_shards, "_decode", wraps=image_shards._decode) as decode:
+            packed = image_shards.PackedImageDataset(image_shards.pack(items, self.out, (12, 12), shard_rows=3))
+        self.assertEqual([job[1] for (job,), _ in decode.call_args_list], [changed])
+        self.assertEqual(packed.row(2).min(), 255)
+        np.testing.assert_array_equal(packed.row(5), features.load_image_array(items[5]["path"], (12, 12)))
+
+    def test_undecodable_files_are_dropped(self):
+        broken = os.path.join(self.data, "healthy", "broken.png")
+        with open(broken, "wb") as f:
+            f.write(b"not a png")
+        with self.assertLogs("predictor.image_shards", "WARNING"):
+            packed = image_shards.PackedImageDataset(image_shards.pack_directory(self.data, self.out, (12, 12)))
+        self.assertEqual(len(packed), 8)
+        self.assertNotIn(broken, [e["path"] for e in packed.entries])
+
+    def test_packed_dataset_and_scoring(self):
+        packed = image_shards.PackedImageDataset(image_shards.pack(self.items(), self.out, (12, 12)))
+        x, y = next(iter(data_pipeline.packed_dataset(packed, batch_size=8)))
+        self.assertEqual(tuple(x.shape), (8, 12, 12, 3))
+        self.assertLessEqual(float(x.numpy().max()), 1.0)
+
+        out = os.path.join(self.root, "scores.csv")
+        self.assertEqual(batch_scoring.score_packed(self.out, out, _fake_predict, batch_size=3), (8, 0))
+        self.assertEqual(batch_scoring.score_packed(self.out, out, _fake_predict, batch_size=3), (0, 8))
+
+
+    def test_validation_rows_come_from_the_train_split(self):
+        items = self.items()
+        for n, item in enumerate(items):
+            item["split"] = dataset_manifest.TEST if n % 4 == 3 else dataset_manifest.TRAIN
+            item["sha256"] = dataset_manifest.sha256_file(item["path"])
+        packed = image_shards.PackedImageDataset(image_shards.pack(items, self.out, (12, 12)))
+        train_ds, val_ds = data_pipeline.packed_train_validation(packed, batch_size=8, validation_fraction=0.34)
+        train = np.concatenate([y.numpy() for _, y in train_ds])
+        val = np.concatenate([y.numpy() for _, y in val_ds])
+        self.assertEqual(sorted(val.tolist()), [0, 1])
+        self.assertEqual(sorted(train.tolist()), [0, 0, 1, 1])   # TEST rows are in neither
+
+def _digests_ending_in_nul(count):
+    """
+    SHA-256 hex digests whose last byte is 0x00 (dropped by numpy "S" fields).
+    """
+    found, i = [], 0
+    while len(found) < count:
+        sha = hashlib.sha256(str(i).encode()).hexdigest()
+        if sha.endswith("00"):
+            found.append(sha)
+        i += 1
+    return found
+
+
+class EmbeddingStoreTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+
+    def test_round_trip_survives_reopening(self):
+        shas = _digests_ending_in_nul(2) + [hashlib.sha256(b"plain").hexdigest()]
+        vectors = np.arange(12, dtype=np.float32).reshape(3, 4)
+        self.assertEqual(embeddings.EmbeddingStore(self.directory, dim=4).put_many(shas, vectors), 3)
+
+        store = embeddings.EmbeddingStore(self.directory, dim=4)
+        found_vectors, found = store.get_many(shas)
+        self.assertTrue(found.all())
+        np.testing.assert_array_equal(found_vectors, vectors.astype(np.float16))
+        self.assertEqual(len(store), 3)
+        self.assertIn(shas[1], store)
+
+    def test_known_digests_are_not_appended_again(self):
+        (sha,) = _digests_ending_in_nul(1)
+        store = embeddings.EmbeddingStore(self.directory, dim=4)
+        store.put_many([sha], np.ones((1, 4)))
+        self.assertEqual(store.put_many([sha], np.zeros((1, 4))), 0)
+        self.assertEqual(len(embeddings.EmbeddingStore(self.directory, dim=4)), 1)
+
+    def test_missing_rows_are_reported(self):
+        store = embeddings.EmbeddingStore(self.directory, dim=4)
+        store.put_many(["ab" * 32], np.ones((1, 4)))
+        vectors, found = store.get_many(["cd" * 32, "ab" * 32])
+        self.assertEqual(found.tolist(), [False, True])
+        self.assertFalse(vectors[0].any())
+
+    def test_only_unseen_images_are_embedded(self):
+        store = embeddings.EmbeddingStore(self.directory, dim=embeddings.EMBEDDING_DIM)
+        store.put_many(["ab" * 32], np.full((1, embeddings.EMBEDDING_DIM), 2.0))
+        fake = mock.Mock(side_effect=lambda batch, batch_size: np.ones((len(batch), embeddings.EMBEDDING_DIM)))
+        with mock.patch.object(embeddings, "embed_arrays", fake):
+            vectors = embeddings.embed_by_sha(["ab" * 32, "cd" * 32], lambda i: np.zeros((2, 2, 3), np.uint8),
+                                              store=store)
+        self.assertEqual(fake.call_count, 1)
+        self.assertEqual(len(fake.call_args[0][0]), 1)
+        self.assertEqual(vectors[:, 0].tolist(), [2.0, 1.0])
+        self.assertIn("cd" * 32, store)
+
+
+def _row(name, accuracy, latency_ms):
+    return {"name": name, "accuracy": accuracy, "latency_ms": latency_ms}
+
+
+def _fold_results(accuracies, latency_ms):
+    return {"fold_accuracy": accuracies, "fold_latency_ms": [latency_ms] * len(accuracies)}
+
+
+class ModelSearchTests(SimpleTestCase):
+    def test_pareto_front(self):
+        rows = [_row("fast", 0.80, 1.0), _row("slow_best", 0.95, 9.0), _row("dominated", 0.79, 2.0),
+                _row("middle", 0.90, 3.0), _row("tied_slower", 0.90, 4.0)]
+        self.assertEqual([r["name"] for r in model_search.pareto_front(rows)], ["fast", "middle", "slow_best"])
+
+    def test_pick_respects_the_latency_budget(self):
+        report = {"pareto_front": [_row("fast", 0.80, 1.0), _row("middle", 0.90, 3.0), _row("slow", 0.95, 9.0)]}
+        self.assertEqual(model_search.pick(report)["name"], "slow")
+        self.assertEqual(model_search.pick(report, budget_ms=5)["name"], "middle")
+        self.assertIsNone(model_search.pick(report, budget_ms=0.5))
+
+    def test_only_clearly_beaten_slower_candidates_are_dropped(self):
+        results = {
+            "leader": _fold_results([0.95, 0.96], 2.0),
+            "beaten": _fold_results([0.60, 0.61], 3.0),       # worse and slower
+            "cheap": _fold_results([0.60, 0.61], 1.0),        # worse but faster: kept
+            "close": _fold_results([0.93, 0.95], 5.0),        # within the noise: kept
+            "young": _fold_results([0.10], 9.0),              # too few folds to judge
+        }
+        dropped = model_search._drop_dominated(results, list(results), min_folds=2, margin=0.02)
+        self.assertEqual(dropped, {"beaten"})
+        self.assertEqual(results["beaten"]["dominated_by"], "leader")
+
+    def test_search_reports_every_candidate(self):
+        rng = np.random.default_rng(0)
+        X = rng.normal(size=(60, 4))
+        y = (X[:, 0] > 0).astype(int)
+        candidates = [("svc(C=1.0)", "svc", {"C": 1.0}), ("rf(n_estimators=10)", "rf", {"n_estimators": 10})]
+        with mock.patch.object(model_search, "LATENCY_CALLS", 3):
+            report = model_search.search(X, y, candidates, k=3, n_jobs=1, cache_dir=None)
+        self.assertEqual(sorted(r["name"] for r in report["candidates"]), sorted(n for n, _, _ in candidates))
+        self.assertTrue(all(len(r["fold_accuracy"]) == 3 for r in report["candidates"]))
+        self.assertTrue(report["pareto_front"])
+        self.assertGreater(report["candidates"][0]["accuracy"], 0.8)
+        # front members are re-timed serially, the parallel timing kept aside
+        front = {r["name"] for r in report["pareto_front"]}
+        self.assertTrue(all("latency_ms_parallel" in r for r in report["candidates"] if r["name"] in front))
+
+
+class MetricsFormatTests(SimpleTestCase):
+    def test_counter_and_gauge_exposition(self):
+        registry = metrics.Registry()
+        requests = registry.register(metrics.Counter("app_requests_total", "Requests", ["outcome"]))
+        requests.inc(outcome="ok")
+        requests.inc(2, outcome='bad "quoted"\nvalue')
+        registry.register(metrics.Gauge("app_queue", "Queued", callback=lambda: 3))
+        self.assertEqual(registry.render().splitlines(), [
+            "# HELP app_requests_total Requests",
+            "# TYPE app_requests_total counter",
+            'app_requests_total{outcome="bad \\"quoted\\"\\nvalue"} 2',
+            'app_requests_total{outcome="ok"} 1',
+            "# HELP app_queue Queued",
+            "# TYPE app_queue gauge",
+            "app_queue 3",
+        ])
+        self.assertIs(registry.register(metrics.Counter("app_requests_total", "Again")), requests)
+        with self.assertRaises(ValueError):
+            requests.inc(stage="x")
+
+    def test_histogram_buckets_are_cumulative(self):
+        hist = metrics.Histogram("app_seconds", "Latency", ["stage"], buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.7, 5.0):
+            hist.observe(value, stage="cnn")
+        self.assertEqual(hist.render()[2:], [
+            'app_seconds_bucket{stage="cnn",le="0.1"} 1',
+            'app_seconds_bucket{stage="cnn",le="1.0"} 3',
+            'app_seconds_bucket{stage="cnn",le="+Inf"} 4',
+            'app_seconds_sum{stage="cnn"} 6.25',
+            'app_seconds_count{stage="cnn"} 4',
+        ])
+
+    def test_stage_timings_and_errors(self):
+        errors = metrics.STAGE_ERRORS.value(stage="test_stage")
+        with metrics.request_timings() as timings:
+            with metrics.stage("test_stage"):
+                pass
+            with self.assertRaises(RuntimeError), metrics.stage("test_stage"):
+                raise RuntimeError("boom")
+        self.assertEqual(list(timings), ["test_stage"])
+        self.assertEqual(metrics.STAGE_ERRORS.value(stage="test_stage"), errors + 1)
+        self.assertIn('predictor_stage_seconds_count{stage="test_stage"} 2', metrics.render())
+
+
+class PredictionLogTests(SimpleTestCase):
+    def logged(self):
+        response = Response({"prediction_id": 9, "final_label": 1, "final_confidence": 0.93, "cache_hit": False})
+        with self.assertLogs("predictor.views", "INFO") as logs:
+            _log_prediction(response, {"cnn": 12.5}, 0.02, model_version="v1")
+        return json.loads(logs.records[-1].getMessage())
+
+    def test_outcomes_stay_out_of_the_log_by_default(self):
+        event = self.logged()
+        self.assertEqual((event["event"], event["prediction_id"], event["stages_ms"]), ("prediction", 9, {"cnn": 12.5}))
+        self.assertNotIn("final_label", event)
+        self.assertNotIn("final_confidence", event)
+        with override_settings(LOG_PREDICTION_OUTCOMES=True):
+            self.assertEqual(self.logged()["final_label"], 1)
+
+
+class MetricsEndpointTests(TestCase):
+    def get(self, authorization=None):
+        headers = {"HTTP_AUTHORIZATION": authorization} if authorization else {}
+        return APIClient().get("/api/predictor/metrics/", **headers)
+
+    def test_staff_only_without_a_token(self):
+        self.assertEqual(self.get().status_code, 403)
+        patient = _user(1)
+        self.assertEqual(self.get(f"Bearer {AccessToken.for_user(patient)}").status_code, 403)
+        response = self.get(f"Bearer {AccessToken.for_user(_user(2, is_staff=True))}")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], metrics.CONTENT_TYPE)
+        self.assertIn(b"# TYPE predictor_stage_seconds histogram", response.content)
+
+    @override_settings(METRICS_TOKEN="scrape-secret")
+    def test_scrape_token(self):
+        self.assertEqual(self.get("Bearer scrape-secret").status_code, 200)
+        self.assertEqual(self.get("Bearer wrong").status_code, 403)
+        self.assertEqual(self.get("scrape-secret").status_code, 200)
+
+
+def _eval_result(accuracy, latency=10.0, memory=100.0):
+    return {"status": "ok", "accuracy": accuracy, "n": 40,
+            "latency_ms": {"single_p50": latency, "batch_p50": latency * 4},
+            "memory_mb": {"rss_delta": memory}}
+
+
+class PredictionLabelTests(SimpleTestCase):
+    def test_one_rule_for_serving_and_evaluation(self):
+        sigmoid = np.array([[0.2], [0.5], [0.9]], dtype=np.float32)
+        labels, probs = features.prediction_labels(sigmoid)
+        self.assertEqual(labels.tolist(), [0, 1, 1])
+        np.testing.assert_allclose(probs, [0.2, 0.5, 0.9], rtol=1e-6)
+        served = utils._image_label(sigmoid[:1])   # a negative scan is labelled 0 when served too
+        self.assertEqual(served["label"], 0)
+        self.assertAlmostEqual(served["probability"], 0.2, places=6)
+
+        softmax = np.array([[0.7, 0.3], [0.1, 0.9]])
+        labels, probs = features.prediction_labels(softmax)
+        self.assertEqual((labels.tolist(), probs.tolist()), ([0, 1], [0.7, 0.9]))
+
+        for pred in (sigmoid, softmax):
+            self.assertEqual(model_eval._labels(pred).tolist(), features.prediction_labels(pred)[0].tolist())
+
+
+class ModelEvalGateTests(SimpleTestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.deployed = os.path.join(self.tmp, "deployed")
+        self.candidate = os.path.join(self.tmp, "candidate")
+        for directory in (self.deployed, self.candidate):
+            os.makedirs(directory)
+        for name in ("parkinsons_model.pkl", "scaler.pkl", "image_model.h5"):
+            with open(os.path.join(self.deployed, name), "wb") as f:
+                f.write(b"deployed " + name.encode())
+        self.registry = os.path.join(self.tmp, "registry")
+        for name, value in (("REGISTRY_DIR", self.registry), ("LEGACY_DIR", self.deployed)):
+            patcher = mock.patch.object(model_registry, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def write_candidate(self, name, content):
+        with open(os.path.join(self.candidate, name), "wb") as f:
+            f.write(content)
+
+    def run_gate(self, deployed, candidate):
+        results = iter([deployed, candidate])
+        with mock.patch.object(model_eval, "freeze_holdout"), \
+                mock.patch.object(model_eval, "evaluate_set", side_effect=lambda paths, components: next(results)):
+            return model_eval.gate(self.candidate, self.deployed, isolated=False)
+
+    def test_compare_thresholds(self):
+        deployed = _eval_result(0.90)
+        self.assertEqual(model_eval.compare(_eval_result(0.895), deployed), [])
+        self.assertEqual(model_eval.compare(_eval_result(0.95, latency=11.9, memory=120), deployed), [])
+        problems = model_eval.compare(_eval_result(0.85, latency=13.0, memory=200), deployed)
+        self.assertEqual(len(problems), 4)
+        self.assertTrue(problems[0].startswith("accuracy 0.9000"))
+        # relative increases below the absolute noise floor are not regressions
+        self.assertEqual(model_eval.compare(_eval_result(0.9, latency=0.2), _eval_result(0.9, latency=0.1)), [])
+        self.assertEqual(len(model_eval.compare({"status": "error", "error": "boom"}, deployed)), 1)
+        self.assertEqual(model_eval.compare(_eval_result(0.5), {"status": "missing"}), [])
+
+    def test_unchanged_candidate_is_not_promoted(self):
+        self.write_candidate("scaler.pkl", b"deployed scaler.pkl")
+        report = self.run_gate({}, {})
+        self.assertFalse(report["promote"])
+        self.assertIn("no candidate artifacts differ", report["reason"])
+
+    def test_gate_passes_and_refuses_on_holdout_accuracy(self):
+        self.write_candidate("image_model.h5", b"retrained")
+        self.assertEqual(model_eval.changed_components(self.candidate, self.deployed),
+                         (["image"], ["image_model.h5"]))
+        overlay = model_eval.overlay_paths(self.candidate, self.deployed)
+        self.assertEqual(os.path.dirname(overlay["image_model.h5"]), self.candidate)
+        self.assertEqual(os.path.dirname(overlay["scaler.pkl"]), self.deployed)
+
+        report = self.run_gate({"image": _eval_result(0.90)}, {"image": _eval_result(0.92)})
+        self.assertTrue(report["promote"])
+        self.assertEqual(report["regressions"], {})
+
+        report = self.run_gate({"image": _eval_result(0.90)}, {"image": _eval_result(0.80)})
+        self.assertFalse(report["promote"])
+        self.assertIn("image", report["regressions"])
+
+    def test_only_a_passing_candidate_is_registered_and_activated(self):
+        self.write_candidate("image_model.h5", b"retrained")
+        report = self.run_gate({"image": _eval_result(0.90)}, {"image": _eval_result(0.80)})
+        with self.assertRaises(model_registry.RegistryError):
+            model_eval.promote(report)
+        self.assertEqual(model_registry.versions(), [])
+
+        report = self.run_gate({"image": _eval_result(0.90)}, {"image": _eval_result(0.92)})
+        version = model_eval.promote(report)
+        self.assertEqual(model_registry.current_version(), version)
+        manifest = model_registry.load_manifest(version)
+        self.assertEqual(sorted(manifest["artifacts"]), ["image_model.h5", "parkinsons_model.pkl", "scaler.pkl"])
+        self.assertAlmostEqual(manifest["metadata"]["evaluation"]["image"]["candidate"]["accuracy"], 0.92)
+        with open(os.path.join(model_registry.current_dir(), "image_model.h5"), "rb") as f:
+            self.assertEqual(f.read(), b"retrained")
+
+
+class ModelRegistryTests(SimpleTestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        self.registry = os.path.join(self.root, "registry")
+        legacy = os.path.join(self.root, "legacy")   # nothing to carry over from the repo root
+        os.makedirs(legacy)
+        patcher = mock.patch.object(model_registry, "LEGACY_DIR", legacy)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def artifact(self, name, content):
+        path = os.path.join(self.root, f"{content}-{name}")
+        with open(path, "w") as f:
+            f.write(content)
+        return path
+
+    def register_all(self, content, **kwargs):
+        files = {name: self.artifact(name, content) for name in model_registry.ARTIFACTS}
+        return model_registry.register(files, registry_dir=self.registry, **kwargs)
+
+    def test_register_and_activate(self):
+        version = self.register_all("v1", metadata={"note": "first"})
+        self.assertIsNone(model_registry.current_version(self.registry))
+        self.assertEqual(model_registry.versions(self.registry), [version])
+
+        model_registry.activate(version, self.registry)
+        self.assertEqual(model_registry.current_version(self.registry), version)
+        manifest = model_registry.load_manifest(version, self.registry)
+        self.assertEqual(sorted(manifest["artifacts"]), sorted(model_registry.ARTIFACTS))
+        self.assertEqual(manifest["metadata"], {"base": None, "note": "first"})
+
+    def test_partial_registration_carries_over_the_current_files(self):
+        first = model_registry.activate(self.register_all("v1"), self.registry)
+        second = model_registry.register({"scaler.pkl": self.artifact("scaler.pkl", "v2")},
+                                         registry_dir=self.registry)
+        self.assertNotEqual(first, second)
+        manifest = model_registry.load_manifest(second, self.registry)
+        self.assertEqual(manifest["metadata"]["base"], first)
+        with open(os.path.join(model_registry.version_dir(second, self.registry), "image_model.h5")) as f:
+            self.assertEqual(f.read(), "v1")
+
+    def test_rollback_returns_to_the_base_version(self):
+        first = model_registry.activate(self.register_all("v1"), self.registry)
+        second = model_registry.activate(self.register_all("v2"), self.registry)
+        self.assertEqual(model_registry.current_version(self.registry), second)
+        self.assertEqual(model_registry.rollback(self.registry), first)
+        self.assertEqual(model_registry.current_version(self.registry), first)
+        with self.assertRaises(model_registry.RegistryError):
+            model_registry.rollback(self.registry)   # first has no base
+
+    def test_verify_detects_tampering(self):
+        version = self.register_all("v1")
+        model_registry.verify(version, self.registry)
+        path = os.path.join(model_registry.version_dir(version, self.registry), "fusion_model.h5")
+        with open(path, "w") as f:
+            f.write("v9")
+        with self.assertRaises(model_registry.RegistryError):
+            model_registry.verify(version, self.registry)
+        with self.assertRaises(model_registry.RegistryError):
+            model_registry.activate(version, self.registry)
+        self.assertIsNone(model_registry.current_version(self.registry))
+
+        os.remove(path)
+        with self.assertRaises(model_registry.RegistryError):
+            model_registry.verify(version, self.registry)
+
+    def test_rewriting_a_source_file_leaves_the_version_intact(self):
+        files = {name: self.artifact(name, "v1") for name in model_registry.ARTIFACTS}
+        version = model_registry.register(files, registry_dir=self.registry)
+        with open(files["image_model.h5"], "w") as f:   # the training script's next run, in place
+            f.write("retrained")
+        model_registry.verify(version, self.registry)
+        with open(os.path.join(model_registry.version_dir(version, self.registry), "image_model.h5")) as f:
+            self.assertEqual(f.read(), "v1")
+        self.assertEqual(model_registry.versions(self.registry), [version])
+        self.assertEqual(os.listdir(os.path.join(self.registry, "versions")), [version])   # no staging left
+
+    def test_unknown_artifact_is_refused(self):
+        with self.assertRaises(model_registry.RegistryError):
+            model_registry.register({"other.pkl": self.artifact("other.pkl", "x")}, registry_dir=self.registry)
+
+
+def _scored_set(version, labels):
+    model_set = utils.ModelSet(version, tempfile.gettempdir(), version * 8)
+    for name in ("audio_model", "image_model"):
+        model_set.put(name, labels)
+    return model_set
+
+
+def _fake_score(model_set, inputs):
+    label = model_set.get("audio_model")[inputs]
+    return {"label": label, "probability": 0.9 if label else 0.2}
+
+
+class ShadowTests(SimpleTestCase):
+    def setUp(self):
+        shadow._stats.clear()
+        self.current = _scored_set("v1", {"a": 1, "b": 0})
+        self.candidate = _scored_set("v2", {"a": 1, "b": 1})
+
+    def test_canary_assignment_is_sticky(self):
+        users = [SimpleNamespace(id=n) for n in range(400)]
+        with mock.patch.object(shadow, "candidate_models", return_value=self.candidate), \
+                mock.patch.object(utils, "current_models", return_value=self.current):
+            with override_settings(CANARY_SHARE=0.25):
+                first = [shadow.choose_models(user)[1] for user in users]
+                again = [shadow.choose_models(user)[1] for user in users]
+                self.assertEqual(first, again)
+                self.assertTrue(60 < sum(first) < 140)
+                canary_user = users[first.index(True)]
+                self.assertEqual(shadow.choose_models(canary_user), (self.candidate, True))
+            with override_settings(CANARY_SHARE=0.0):
+                self.assertFalse(any(shadow.choose_models(user)[1] for user in users))
+
+    def test_shadow_comparison_is_aggregated_per_modality(self):
+        with mock.patch.object(utils, "score_audio", _fake_score), mock.patch.object(utils, "score_image", _fake_score):
+            shadow._compare(self.current, self.candidate, {"audio": {}, "audio_raw": "a"})
+            shadow._compare(self.current, self.candidate, {"audio": {}, "audio_raw": "b", "image": {}, "image_input": "b"})
+        (audio, image) = sorted(shadow.maybe_flush(force=True), key=lambda s: s["modality"])
+        self.assertEqual((audio["current"], audio["candidate"], audio["n"]), ("v1", "v2", 2))
+        self.assertEqual(audio["agreement"], 0.5)
+        self.assertAlmostEqual(audio["mean_abs_delta_p"], 0.35)
+        self.assertEqual((image["n"], image["agreement"]), (1, 0.0))
+        self.assertEqual(shadow.maybe_flush(force=True), [])
+
+    @override_settings(SHADOW_MAX_PENDING=0)
+    def test_full_queue_drops_the_job(self):
+        dropped = shadow.SHADOW_DROPPED.value()
+        self.assertFalse(shadow.submit(self.current, self.candidate, {"audio_raw": "a"}))
+        self.assertEqual(shadow.SHADOW_DROPPED.value(), dropped + 1)
+
+
+def _request(user_id, content_length=0):
+    return SimpleNamespace(META={"CONTENT_LENGTH": str(content_length)}, user=SimpleNamespace(id=user_id))
+
+
+@override_settings(PREDICT_MAX_REQUEST_BYTES=1000, PREDICT_USER_CONCURRENCY=1, PREDICT_MAX_INFLIGHT=1)
+class AdmissionTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        admission._inflight = None   # re-created from PREDICT_MAX_INFLIGHT
+        self.addCleanup(setattr, admission, "_inflight", None)
+
+    def assertRejected(self, request, status_code):
+        with self.assertRaises(admission.Rejected) as ctx:
+            with admission.admit(request):
+                pass
+        self.assertEqual(ctx.exception.status_code, status_code)
+        return ctx.exception
+
+    def test_oversized_request(self):
+        self.assertRejected(_request(1, content_length=1001), 413)
+        with admission.admit(_request(1, content_length=1000)):
+            pass
+
+    def test_second_request_from_the_same_user(self):
+        with admission.admit(_request(1)):
+            rejected = self.assertRejected(_request(1), 429)
+        self.assertEqual(rejected.response()["Retry-After"], "1")
+        with admission.admit(_request(1)):   # the slot was released
+            pass
+
+    def test_worker_at_capacity(self):
+        with admission.admit(_request(1)):
+            self.assertRejected(_request(2), 503)
+        self.assertEqual(cache.get(f"{admission.SLOT_PREFIX}2"), 0)   # user slot handed back
+        with admission.admit(_request(2)):
+            pass
+
+
+def _small_cnn(functional=False, normalize_first=False):
+    import tensorflow as tf
+    tf.keras.utils.set_random_seed(0)
+    layers = [tf.keras.layers.Conv2D(4, 3, padding="same", activation="relu"),
+              tf.keras.layers.GlobalAveragePooling2D(),
+              tf.keras.layers.Dense(1, activation="sigmoid")]
+    if normalize_first:   # nothing to fold the scale into
+        layers.insert(0, tf.keras.layers.BatchNormalization(moving_mean_initializer="ones"))
+    if not functional:
+        return tf.keras.Sequential([tf.keras.Input((16, 16, 3))] + layers)
+    inputs = x = tf.keras.Input((16, 16, 3))
+    for layer in layers:
+        x = layer(x)
+    return tf.keras.Model(inputs, x)
+
+
+class ImagePreprocessingTests(SimpleTestCase):
+    def test_image_to_array_reduces_every_format_to_rgb_uint8(self):
+        for fmt, mode in (("JPEG", "RGB"), ("PNG", "L"), ("PNG", "RGBA"), ("PNG", "P")):
+            buf = io.BytesIO()
+            Image.new(mode, (900, 600)).save(buf, format=fmt)
+            buf.seek(0)
+            with Image.open(buf) as img:
+                array = features.image_to_array(img)
+            self.assertEqual((array.shape, array.dtype), ((224, 224, 3), np.uint8), (fmt, mode))
+
+    def test_folded_scaling_matches_normalized_input(self):
+        pixels = np.random.default_rng(0).integers(0, 256, (2, 16, 16, 3)).astype(np.float32)
+        for functional in (False, True):
+            for normalize_first in (False, True):
+                with self.subTest(functional=functional, normalize_first=normalize_first):
+                    model = _small_cnn(functional, normalize_first)
+                    expected = model.predict(pixels / 255.0, verbose=0)
+                    folded = utils.fold_input_scaling(model)
+                    np.testing.assert_allclose(folded.predict(pixels, verbose=0), expected, rtol=1e-5, atol=1e-6)
+                    self.assertTrue(gradcam.supports(folded))   # conv layers still in the graph
+
+
+class GradCamTests(SimpleTestCase):
+    def test_cam_comes_with_the_prediction(self):
+        model = _small_cnn()
+        batch = np.random.default_rng(1).random((3, 16, 16, 3), dtype=np.float32)
+        self.assertTrue(gradcam.supports(model))
+        preds, cams = gradcam.predict_with_cam(model, batch)
+        np.testing.assert_allclose(preds, model.predict(batch, verbose=0), rtol=1e-5, atol=1e-6)
+        self.assertEqual(cams.shape, (3, 16, 16))
+        self.assertTrue(((cams >= 0) & (cams <= 1)).all())
+
+        png = gradcam.render_overlay(np.zeros((32, 32, 3), dtype=np.uint8), cams[0])
+        with Image.open(io.BytesIO(png)) as img:
+            self.assertEqual((img.format, img.size), ("PNG", (32, 32)))
 
-# Create your tests here.
@@ -1,10 +1,17 @@
 # predictor/urls.py
 from django.urls import path
-from .views import PredictAPIView, SpectrogramAPIView, ReportAPIView, DownloadReportView
+from .views import (
+    PredictAPIView, SpectrogramAPIView, ReportAPIView, DownloadReportView,
+    PredictionHistoryAPIView, PredictionStatsAPIView, BulkReportAPIView, MetricsView,
+)
 
 urlpatterns = [
     path('predict/', PredictAPIView.as_view(), name='predict'),
     path('spectrogram/', SpectrogramAPIView.as_view(), name='spectrogram'),
     path('report/', ReportAPIView.as_view(), name='report'),
     path('download/<str:filename>/', DownloadReportView.as_view(), name='download-report'),  # ✅ added
+    path('reports/bulk/', BulkReportAPIView.as_view(), name='bulk-reports'),
+    path('history/', PredictionHistoryAPIView.as_view(), name='prediction-history'),
+    path('stats/daily/', PredictionStatsAPIView.as_view(), name='prediction-stats'),
+    path('metrics/', MetricsView.as_view(), name='metrics'),
 ]
@@ -3,23 +3,28 @@ matplotlib.use("Agg")  # ✅ must be the first Matplotlib-related line!
 
 import os
 import io
+import json
+import time
 import uuid
+import hashlib
+import threading
+import contextvars
 import base64
 import joblib
 import numpy as np
 import librosa
 import logging
-import parselmouth
 import matplotlib.pyplot as plt
 import librosa.display
+from contextlib import contextmanager
 from sklearn.preprocessing import StandardScaler
-from parselmouth.praat import call
 from PIL import Image
-from tensorflow.keras.models import load_model as keras_load_model
-from tensorflow.keras.preprocessing import image as keras_image
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfgen import canvas
-from reportlab.lib.utils import ImageReader
+from tensorflow.keras import Input
+from tensorflow.keras.layers import Conv2D, Dense, Rescaling
+from tensorflow.keras.models import Sequential, clone_model, load_model as keras_load_model
+from keras import tree as keras_tree
+
+from . import embeddings, features, gradcam, metrics, model_registry, report_engine, report_store
 
 # ============================================================
 # LOGGER SETUP
@@ -28,171 +33,502 @@ logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-_audio_model = None
-_scaler = None
-_image_model = None
-_fusion_model = None
 
+PIXEL_SCALE = 1.0 / 255   # the image CNN was trained on pixels / 255
 
-# ============================================================
-# MODEL LOADERS
-# ============================================================
-def load_audio_model(path=None):
-    global _audio_model
-    if _audio_model is None:
-        path = path or os.path.join(BASE_DIR, "parkinsons_model.pkl")
-        if os.path.exists(path):
-            _audio_model = joblib.load(path)
-            logger.info(f"Audio model loaded from {path}")
-        else:
-            logger.warning(f"Audio model not found at {path}")
-    return _audio_model
 
+def fold_input_scaling(model, scale=PIXEL_SCALE):
+    """
+    Make ``model`` take raw 0-255 pixels. For a Sequential model starting
+    with Conv2D/Dense the scale is folded into that layer's kernel (exact:
+    conv(x * s, W) = conv(x, W * s), and zero padding is unaffected), so
+    inference pays nothing for it. Any other model gets a Rescaling layer
+    as the first step of its own graph (never as a wrapper around the
+    model), so its layers stay reachable for Grad-CAM.
+    """
+    first = model.layers[0] if model.layers else None
+    if isinstance(model, Sequential):
+        if isinstance(first, (Conv2D, Dense)):
+            weights = first.get_weights()
+            weights[0] = weights[0] * scale
+            first.set_weights(weights)
+            return model
+        return Sequential([Input(model.input_shape[1:]), Rescaling(scale)] + model.layers, name=model.name)
 
-def load_scaler(path=None):
-    global _scaler
-    if _scaler is None:
-        path = path or os.path.join(BASE_DIR, "scaler.pkl")
-        if os.path.exists(path):
-            _scaler = joblib.load(path)
-            logger.info(f"Scaler loaded from {path}")
-        else:
-            logger.warning(f"Scaler not found at {path}")
-    return _scaler
+    inputs = Input(model.input_shape[1:])
+    scaled = Rescaling(scale)(inputs)
 
+    def call(layer, *args, **kwargs):
+        args = keras_tree.map_structure(lambda t: scaled if t is inputs else t, args)
+        return layer(*args, **kwargs)
 
-def load_image_model(path=None):
-    global _image_model
-    if _image_model is None:
-        path = path or os.path.join(BASE_DIR, "image_model.h5")
-        if os.path.exists(path):
-            _image_model = keras_load_model(path)
-            logger.info(f"Image model loaded from {path}")
-        else:
-            logger.warning(f"Image model not found at {path}")
-    return _image_model
+    folded = clone_model(model, input_tensors=inputs, call_function=call)
+    for layer in model.layers:
+        if layer.weights:
+            folded.get_layer(layer.name).set_weights(layer.get_weights())
+    return folded
 
 
-def load_fusion_model(path=None):
-    global _fusion_model
-    if _fusion_model is None:
-        path = path or os.path.join(BASE_DIR, "fusion_model.h5")
-        if os.path.exists(path):
-            _fusion_model = keras_load_model(path)
-            logger.info(f"Fusion model loaded from {path}")
-        else:
-            logger.warning(f"Fusion model not found at {path}")
-    return _fusion_model
+def _load_image_model(path):
+    return fold_input_scaling(keras_load_model(path))
 
-# ===============================
-# FEATURE EXTRACTION
-# ===============================
-def compute_pitch_stats(sound):
-    try:
-        pitch = call(sound, "To Pitch", 0.0, 75, 600)
-        values = pitch.selected_array["frequency"]
-        values = values[values != 0]
-        if len(values) == 0:
-            return np.nan, np.nan, np.nan
-        return float(np.mean(values)), float(np.max(values)), float(np.min(values))
-    except Exception:
-        return np.nan, np.nan, np.nan
+
+# model name -> (registry artifact, loader)
+MODEL_ARTIFACTS = {
+    "audio_model": ("parkinsons_model.pkl", joblib.load),
+    "scaler": ("scaler.pkl", joblib.load),
+    "image_model": ("image_model.h5", _load_image_model),
+    "fusion_model": ("fusion_model.h5", keras_load_model),
+}
 
 
-def extract_parselmouth_measures(sound):
+# ============================================================
+# MODEL SETS (hot-swappable)
+# ============================================================
+class ModelSet:
+    """
+    The models of one registry version (or the legacy root files), loaded
+    lazily per model. A set is never modified after it becomes active except
+    to fill in lazily loaded models, so requests holding it are unaffected
+    by a swap.
+    """
+
+    def __init__(self, version, directory, fingerprint):
+        self.version = version
+        self.directory = directory
+        self.fingerprint = fingerprint
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        model = self._models.get(name)
+        metrics.model_cache(name, hit=model is not None)
+        if model is None:
+            with self._lock:
+                model = self._models.get(name)
+                if model is None:
+                    model = self._load(name)
+        return model
+
+    def _load(self, name):
+        artifact, loader = MODEL_ARTIFACTS[name]
+        path = os.path.join(self.directory, artifact)
+        if not os.path.exists(path):
+            logger.warning(f"{name} not found at {path}")
+            return None
+        model = self._models[name] = loader(path)
+        logger.info(f"{name} loaded from {path}")
+        return model
+
+    def put(self, name, model):
+        self._models[name] = model
+
+    def loaded(self):
+        return [name for name, model in self._models.items() if model is not None]
+
+    def warm_up(self):
+        """
+        One dummy prediction per loaded model, so graph tracing and lazy
+        allocations happen before the set takes traffic.
+        """
+        dummy_audio = np.zeros((1, features.AUDIO_FEATURE_DIM), dtype=np.float32)
+        for name in self.loaded():
+            model = self._models[name]
+            if name == "scaler":
+                model.transform(dummy_audio)
+            elif name == "audio_model":
+                model.predict_proba(dummy_audio) if hasattr(model, "predict_proba") else model.predict(dummy_audio)
+            else:
+                inputs = [np.zeros((1,) + tuple(t.shape[1:]), dtype=np.float32) for t in model.inputs]
+                model.predict(inputs if len(inputs) > 1 else inputs[0], verbose=0)
+
+
+_active = None
+_active_lock = threading.Lock()
+_pinned = contextvars.ContextVar("predictor_pinned_models", default=None)
+_captured = contextvars.ContextVar("predictor_captured_inputs", default=None)
+_watcher_thread = None
+_failed_versions = set()
+
+
+def open_model_set(version):
+    if version is None:
+        checksums = {name: file_fingerprint(path) for name, path in
+                     model_registry.artifact_paths(model_registry.LEGACY_DIR).items()}
+        return ModelSet(None, model_registry.LEGACY_DIR, model_registry.combined_fingerprint(checksums))
+    manifest = model_registry.verify(version)
+    return ModelSet(version, model_registry.version_dir(version), manifest["fingerprint"])
+
+
+def current_models():
+    """
+    The model set serving this request: the pinned one inside pin_models(),
+    otherwise the active one.
+    """
+    global _active
+    pinned = _pinned.get()
+    if pinned is not None:
+        return pinned
+    if _active is None:
+        with _active_lock:
+            if _active is None:
+                _active = open_model_set(model_registry.current_version())
+        ensure_model_watcher()
+    return _active
+
+
+@contextmanager
+def pin_models(model_set=None):
+    """
+    Use one model set (default: the active one) for everything inside the
+    block, even if a new version is swapped in meanwhile.
+    """
+    token = _pinned.set(model_set or current_models())
     try:
-        point_process = call(sound, "To PointProcess (periodic, cc)", 75, 600)
+        yield _pinned.get()
+    finally:
+        _pinned.reset(token)
+
+
+@contextmanager
+def capture_inputs():
+    """
+    Record the model inputs and results of the predictions made inside the
+    block ({"audio_raw", "audio", "image_input", "image"}), so they can be
+    re-scored by another model set without decoding the upload again.
+    """
+    captured = {}
+    token = _captured.set(captured)
+    try:
+        yield captured
+    finally:
+        _captured.reset(token)
+
+
+def _capture(key, value):
+    captured = _captured.get()
+    if captured is not None:
+        captured[key] = value
+
+
+def swap_to(version):
+    """
+    Load the models the active set is using from ``version``, warm them up,
+    then make it active. The active set keeps serving until the switch,
+    which is a single reference assignment.
+    """
+    global _active
+    t0 = time.perf_counter()
+    new = open_model_set(version)
+    for name in (_active.loaded() if _active is not None else []):
+        new.get(name)
+    loaded_s = time.perf_counter() - t0
+    new.warm_up()
+    old, _active = _active, new
+    metrics.MODEL_SWAPS.inc(result="ok")
+    logger.info(json.dumps({
+        "event": "model_swap",
+        "from": old.version if old is not None else None,
+        "to": version,
+        "models": new.loaded(),
+        "load_ms": round(loaded_s * 1000.0, 1),
+        "warm_ms": round((time.perf_counter() - t0 - loaded_s) * 1000.0, 1),
+    }))
+    return new
+
+
+def check_for_new_version():
+    """
+    Swap if CURRENT points somewhere else; a version that fails to load or
+    verify is logged once and skipped, and the active set keeps serving.
+    """
+    version = model_registry.current_version()
+    if _active is None or version == _active.version or version in _failed_versions:
+        return False
+    try:
+        swap_to(version)
+        return True
     except Exception:
-        point_process = None
+        _failed_versions.add(version)
+        metrics.MODEL_SWAPS.inc(result="failed")
+        logger.exception(f"Could not switch to model version {version}; keeping {_active.version}")
+        return False
 
-    jitter_local = shimmer_local = np.nan
-    hnr = nhr = np.nan
 
-    if point_process is not None:
+def _watch_loop(interval):
+    while True:
+        time.sleep(interval)
         try:
-            jitter_local = call(point_process, "Get jitter (local)", 0, 0, 0.0001, 0.02, 1.3)
-            shimmer_local = call([sound, point_process], "Get shimmer (local)", 0, 0, 0.0001, 0.02, 1.3, 1.6)
+            check_for_new_version()
         except Exception:
-            pass
+            logger.exception("Model registry poll failed")
+
+
+def ensure_model_watcher():
+    """
+    Start the per-process registry poller once.
+    """
+    global _watcher_thread
+    if _watcher_thread is not None or model_registry.POLL_INTERVAL <= 0:
+        return
+    with _active_lock:
+        if _watcher_thread is None:
+            _watcher_thread = threading.Thread(
+                target=_watch_loop, args=(model_registry.POLL_INTERVAL,), name="model-watcher", daemon=True
+            )
+            _watcher_thread.start()
+
+
+# ============================================================
+# MODEL LOADERS
+# ============================================================
+def load_audio_model():
+    return current_models().get("audio_model")
 
+
+def load_scaler():
+    return current_models().get("scaler")
+
+
+def load_image_model():
+    return current_models().get("image_model")
+
+
+def load_fusion_model():
+    return current_models().get("fusion_model")
+
+# ============================================================
+# ARTIFACT FINGERPRINTS
+# ============================================================
+_fingerprints = {}
+
+
+def file_fingerprint(path):
+    """
+    SHA-256 of a model artifact, recomputed only when size or mtime changes.
+    """
     try:
-        harmonicity = call(sound, "To Harmonicity (cc)", 0.01, 75, 0.1, 1.0)
-        hnr_val = call(harmonicity, "Get mean", 0, 0)
-        hnr = float(hnr_val)
-        nhr = float(10 ** (-hnr / 10.0))
-    except Exception:
-        pass
+        st = os.stat(path)
+    except OSError:
+        return "missing"
+    stamp = (st.st_size, st.st_mtime_ns)
+    cached = _fingerprints.get(path)
+    if cached and cached[0] == stamp:
+        return cached[1]
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    _fingerprints[path] = (stamp, digest.hexdigest())
+    return _fingerprints[path][1]
+
+
+def artifact_fingerprint():
+    """
+    Combined fingerprint of every artifact that can influence a prediction
+    (the serving model set's; equal for the same files in or out of the registry).
+    """
+    return current_models().fingerprint
+
+
+def model_version():
+    return current_models().version
 
-    return {"jitter_local": jitter_local, "shimmer_local": shimmer_local, "hnr": hnr, "nhr": nhr}
+# ===============================
+# FEATURE EXTRACTION
+# ===============================
+# Extraction itself lives in predictor.features (no TensorFlow import) so
+# worker processes can use it; re-exported here for existing callers.
+compute_pitch_stats = features.compute_pitch_stats
+extract_parselmouth_measures = features.extract_parselmouth_measures
 
 
 def extract_audio_features(file_path, sr=22050):
     try:
-        y, sr = librosa.load(file_path, sr=sr, mono=True)
-        if y.size == 0:
+        fv = features.extract_raw_audio_features(file_path, sr=sr)
+        if fv is None:
             return None
-        sound = parselmouth.Sound(y, sampling_frequency=sr)
-        fo_mean, fo_max, fo_min = compute_pitch_stats(sound)
-        measures = extract_parselmouth_measures(sound)
-        feature_vector = [
-            fo_mean,
-            fo_max,
-            fo_min,
-            measures.get("jitter_local", 0),
-            measures.get("shimmer_local", 0),
-            measures.get("hnr", 0),
-            measures.get("nhr", 0),
-        ]
-        feature_vector += [0.0] * (40 - len(feature_vector))
-        fv = np.array(feature_vector).reshape(1, -1)
+        _capture("audio_raw", fv)
         scaler = load_scaler()
         if scaler is not None:
-            fv = scaler.transform(fv)
+            with metrics.stage("scaler"):
+                fv = scaler.transform(fv)
         return fv
     except Exception as e:
         logger.exception(f"Feature extraction failed: {e}")
         return np.zeros((1, 40), dtype=np.float32)
 
+
+def scale_audio_features(raw):
+    """
+    Scale a (n, 40) batch of raw feature vectors in one call.
+    """
+    scaler = load_scaler()
+    return scaler.transform(raw) if scaler is not None else raw
+
 # ===============================
 # PREDICTORS
 # ===============================
+def _audio_result(model, fv):
+    pred = model.predict(fv)
+    label = int(np.round(pred[0]))
+    prob = None
+    if hasattr(model, "predict_proba"):
+        probs = model.predict_proba(fv)
+        prob = float(probs[0][1]) if probs.shape[1] > 1 else float(probs[0][0])
+    return {"label": label, "probability": prob}
+
+
+_image_buffers = threading.local()
+
+
+def _image_batch(pixels):
+    """
+    This thread's preallocated (1, 224, 224, 3) float32 model input, filled
+    with ``pixels`` (uint8, cast in place; no per-request float arrays).
+    """
+    buf = getattr(_image_buffers, "batch", None)
+    if buf is None:
+        buf = _image_buffers.batch = np.empty((1, *features.IMAGE_SIZE[::-1], 3), dtype=np.float32)
+    buf[0] = pixels
+    return buf
+
+
+def _image_result(model, pixels):
+    return _image_label(model.predict(_image_batch(pixels), verbose=0))
+
+
+def _image_label(pred):
+    labels, probs = features.prediction_labels(pred)
+    return {"label": int(labels[0]), "probability": float(probs[0])}
+
+
+def score_audio(model_set, raw):
+    """
+    predict_audio_from_file's result for already extracted raw features,
+    using ``model_set``'s scaler and model.
+    """
+    scaler = model_set.get("scaler")
+    return _audio_result(model_set.get("audio_model"), scaler.transform(raw) if scaler is not None else raw)
+
+
+def score_image(model_set, pixels):
+    """
+    predict_image_from_pil's result for an already resized (224, 224, 3) uint8 array.
+    """
+    return _image_result(model_set.get("image_model"), pixels)
+
 def predict_audio_from_file(file_path):
     model = load_audio_model()
     if model is None:
         return None, "Audio model not found (parkinsons_model.pkl)"
     try:
         fv = extract_audio_features(file_path)
-        pred = model.predict(fv)
-        label = int(np.round(pred[0]))
-        prob = None
-        if hasattr(model, "predict_proba"):
-            probs = model.predict_proba(fv)
-            prob = float(probs[0][1]) if probs.shape[1] > 1 else float(probs[0][0])
-        return {"label": label, "probability": prob}, None
+        with metrics.stage("audio_model"):
+            result = _audio_result(model, fv)
+        _capture("audio", result)
+        return result, None
     except Exception as e:
         logger.exception(f"Audio prediction failed: {e}")
         return None, str(e)
 
 
-def predict_image_from_pil(pil_img):
+def predict_image_from_pil(pil_img, heatmap_sha=None):
+    """
+    With ``heatmap_sha`` (the upload's sha256) the prediction also yields a
+    Grad-CAM heatmap from the same pass, kept for image_heatmap().
+    """
     try:
         model = load_image_model()
         if model is None:
             return {"label": 0, "probability": 0.0}, None  # safer default
-        img = pil_img.convert("RGB").resize((224, 224))
-        arr = keras_image.img_to_array(img)
-        arr = np.expand_dims(arr, axis=0) / 255.0
-        pred = model.predict(arr)
-        label = int(np.argmax(pred, axis=1)[0])
-        prob = float(pred[0][label])
-        return {"label": label, "probability": prob}, None
+        with metrics.stage("image_preprocess"):
+            pixels = features.image_to_array(pil_img)
+        _capture("image_input", pixels)
+        if heatmap_sha and gradcam.supports(model):
+            with metrics.stage("cnn_forward_gradcam"):
+                pred, cams = gradcam.predict_with_cam(model, _image_batch(pixels))
+            result = _image_label(pred)
+            with metrics.stage("heatmap_render"):
+                report_store.save_heatmap(heatmap_sha, artifact_fingerprint(), gradcam.render_overlay(pixels, cams[0]))
+        else:
+            with metrics.stage("cnn_forward"):
+                result = _image_result(model, pixels)
+        _capture("image", result)
+        return result, None
     except Exception as e:
         logger.exception(f"Image prediction failed: {e}")
         return None, str(e)
 
 
-def predict_fused(audio_path, image_path):
+def image_heatmap(image_path, image_sha):
+    """
+    PNG Grad-CAM overlay for an image, from the report store or, when the
+    prediction itself came from the result cache, from one extra pass.
+    None if the image model cannot produce one.
+    """
+    cached = report_store.load_heatmap(image_sha, artifact_fingerprint())
+    if cached is not None:
+        return cached
+    model = load_image_model()
+    if not gradcam.supports(model):
+        return None
+    with Image.open(image_path) as img:
+        predict_image_from_pil(img, heatmap_sha=image_sha)
+    return report_store.load_heatmap(image_sha, artifact_fingerprint())
+
+
+def predict_audio_batch(raw_features):
+    """
+    Score a (n, 40) batch of unscaled feature vectors.
+    Returns a list of {"label", "probability"} dicts.
+    """
+    model = load_audio_model()
+    if model is None:
+        raise RuntimeError("Audio model not found (parkinsons_model.pkl)")
+    fv = scale_audio_features(np.asarray(raw_features))
+    labels = np.round(model.predict(fv)).astype(int)
+    probs = None
+    if hasattr(model, "predict_proba"):
+        p = model.predict_proba(fv)
+        probs = p[:, 1] if p.shape[1] > 1 else p[:, 0]
+    return [
+        {"label": int(labels[i]), "probability": float(probs[i]) if probs is not None else None}
+        for i in range(len(labels))
+    ]
+
+
+def predict_image_batch(images):
+    """
+    Score a (n, 224, 224, 3) uint8 batch in one forward pass.
+    """
+    model = load_image_model()
+    if model is None:
+        raise RuntimeError("Image model not found (image_model.h5)")
+    pred = model.predict(np.asarray(images, dtype=np.float32), batch_size=len(images), verbose=0)
+    labels, probs = features.prediction_labels(pred)
+    return [{"label": int(label), "probability": float(prob)} for label, prob in zip(labels, probs)]
+
+
+def _fusion_takes_embeddings(model):
+    shapes = [tuple(t.shape[1:]) for t in model.inputs]
+    return shapes == [(features.AUDIO_FEATURE_DIM,), (embeddings.EMBEDDING_DIM,)]
+
+
+def predict_fused(audio_path, image_path, image_sha=None):
     try:
+        # Real fusion when the trained fusion model matches the embedding
+        # backbone (scaled voice features + MobileNetV2 GAP embedding)
+        fusion = load_fusion_model()
+        if fusion is not None and _fusion_takes_embeddings(fusion):
+            fv = extract_audio_features(audio_path)
+            if fv is not None:
+                with metrics.stage("image_embedding"):
+                    emb = embeddings.embed_image_file(image_path, sha=image_sha)
+                with metrics.stage("fusion"):
+                    prob = float(fusion.predict([fv, emb], verbose=0)[0][0])
+                return {"label": int(prob >= 0.5), "probability": prob, "method": "fusion_model"}, None
+
         audio_res, _ = predict_audio_from_file(audio_path)
         img = Image.open(image_path)
         image_res, _ = predict_image_from_pil(img)
@@ -213,18 +549,19 @@ def predict_fused(audio_path, image_path):
 # ============================================================
 def audio_spectrogram_bytes(audio_path):
     try:
-        y, sr = librosa.load(audio_path, sr=None)
-        S = librosa.feature.melspectrogram(y=y, sr=sr, n_mels=128, fmax=8000)
-        S_DB = librosa.power_to_db(S, ref=np.max)
-        fig, ax = plt.subplots(figsize=(6, 3))
-        librosa.display.specshow(S_DB, sr=sr, x_axis="time", y_axis="mel", ax=ax)
-        ax.set(title="Mel-Spectrogram")
-        ax.axis("off")
-        buf = io.BytesIO()
-        plt.savefig(buf, format="png", bbox_inches="tight", pad_inches=0)
-        plt.close(fig)
-        buf.seek(0)
-        return buf.getvalue()
+        with metrics.stage("spectrogram"):
+            y, sr = librosa.load(audio_path, sr=None)
+            S = librosa.feature.melspectrogram(y=y, sr=sr, n_mels=128, fmax=8000)
+            S_DB = librosa.power_to_db(S, ref=np.max)
+            fig, ax = plt.subplots(figsize=(6, 3))
+            librosa.display.specshow(S_DB, sr=sr, x_axis="time", y_axis="mel", ax=ax)
+            ax.set(title="Mel-Spectrogram")
+            ax.axis("off")
+            buf = io.BytesIO()
+            plt.savefig(buf, format="png", bbox_inches="tight", pad_inches=0)
+            plt.close(fig)
+            buf.seek(0)
+            return buf.getvalue()
     except Exception as e:
         raise RuntimeError(f"Error generating spectrogram: {str(e)}")
 
@@ -233,86 +570,11 @@ def audio_spectrogram_bytes(audio_path):
 # ✅ FIXED PDF REPORT GENERATOR WITH BORDERLINE SUPPORT
 # ============================================================
 def generate_pdf_report(prediction, spectrogram_bytes=None, heatmap_bytes=None, user_info=None):
-    buffer = io.BytesIO()
-    p = canvas.Canvas(buffer, pagesize=A4)
-    width, height = A4
-
-    # Title
-    p.setFont("Helvetica-Bold", 18)
-    p.drawString(50, height - 60, "🧠 Parkinson’s Disease Prediction Report")
-
-    # User info (display name, email, and phone)
-    p.setFont("Helvetica", 12)
-    y = height - 100
-    if user_info:
-        name = user_info.get("name", "Unknown")
-        email = user_info.get("email", "N/A")
-        phone = user_info.get("phone", "N/A")
-        test_date = user_info.get("test_date", "N/A")
-        
-        # Drawing user information
-        p.drawString(50, y, f"Name: {name}")
-        y -= 20
-        p.drawString(50, y, f"Email: {email}")
-        y -= 20
-        p.drawString(50, y, f"Phone: {phone}")
-        y -= 20
-        p.drawString(50, y, f"Test Date: {test_date}")
-        y -= 40  # Increased spacing after user information
-
-    # Line separating user info from prediction result
-    p.line(50, y, width - 50, y)
-    y -= 20
-
-    # Prediction result with borderline support
-    p.setFont("Helvetica-Bold", 14)
-    if prediction.get("final_label") == 1:
-        result_text = "⚠️ Parkinson's Detected"
-    elif prediction.get("borderline", False):
-        result_text = "⚠️ Borderline — Parkinson’s might be present"
-    else:
-        result_text = "✅ No Parkinson’s"
-    p.drawString(50, y, f"Prediction Result: {result_text}")
-    y -= 25
-
-    # Confidence
-    p.setFont("Helvetica", 12)
-    confidence = prediction.get("final_confidence")
-    if confidence is not None:
-        p.drawString(50, y, f"Confidence: {(confidence * 100):.2f}%")
-    else:
-        p.drawString(50, y, "Confidence: N/A")
-    y -= 40
-
-    # Spectrogram (if available)
-    if spectrogram_bytes:
-        try:
-            image = ImageReader(io.BytesIO(spectrogram_bytes))
-            p.drawString(50, y, "🎵 Audio Spectrogram:")
-            y -= 180
-            p.drawImage(image, 50, y, width=250, height=150, preserveAspectRatio=True, mask="auto")
-            y -= 30
-        except Exception as e:
-            p.setFillColorRGB(1, 0, 0)
-            p.drawString(50, y, f"[Error loading spectrogram: {str(e)}]")
-            y -= 30
-            p.setFillColorRGB(0, 0, 0)
-
-    # Heatmap (if available)
-    if heatmap_bytes:
-        try:
-            image = ImageReader(io.BytesIO(heatmap_bytes))
-            p.drawString(50, y, "🧬 MRI Heatmap:")
-            y -= 180
-            p.drawImage(image, 320, y, width=200, height=150, preserveAspectRatio=True, mask="auto")
-        except Exception as e:
-            p.setFillColorRGB(1, 0, 0)
-            p.drawString(50, y, f"[Error loading heatmap: {str(e)}]")
-            y -= 30
-            p.setFillColorRGB(0, 0, 0)
-
-    # Finalize PDF
-    p.showPage()
-    p.save()
-    buffer.seek(0)
-    return buffer.getvalue()
+    # Static layout is prebuilt once; see report_engine for details
+    with metrics.stage("pdf"):
+        return report_engine.render_report(
+            prediction,
+            spectrogram_bytes=spectrogram_bytes,
+            heatmap_bytes=heatmap_bytes,
+            user_info=user_info,
+        )
@@ -1,34 +1,188 @@
+import io
 import os
+import base64
+import hmac
+import json
+import time
+import hashlib
+import logging
 import tempfile
 import uuid
 from datetime import datetime
 from django.conf import settings
-from django.http import FileResponse, Http404, HttpResponse
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
 from rest_framework.views import APIView
-from rest_framework.permissions import IsAuthenticated  # Add this line
+from rest_framework.permissions import IsAuthenticated, IsAdminUser  # Add this line
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from rest_framework.response import Response
+from rest_framework.throttling import ScopedRateThrottle
 from rest_framework import status
+from accounts.authentication import CachedJWTAuthentication
 from PIL import Image
 
-from .serializers import PredictSerializer
-from . import utils
+from .models import ParkinsonPrediction
+from .serializers import PredictSerializer, PredictionHistorySerializer
+from . import admission, bulk_reports, metrics, report_queue, report_store, result_cache, shadow, stats, utils
+
+logger = logging.getLogger(__name__)
+
+HISTORY_PAGE_SIZE = 20
+REPORT_DOWNLOAD_WAIT = 10.0   # seconds a download waits on a report still rendering
+REPORT_MAX_WAIT = 30.0
+BULK_REPORT_MAX_IDS = 5000
+HISTORY_MAX_PAGE_SIZE = 100
+
+metrics.gauge("predictor_report_queue_pending", "Reports queued or rendering in this worker",
+              callback=report_queue.pending_count)
+
+
+def _record_prediction(user, resp):
+    """
+    Persist the final outcome so it shows up in history and daily stats.
+    """
+    if resp.get("fused_prediction"):
+        prediction_type = "fused"
+    elif resp.get("image_prediction"):
+        prediction_type = "image"
+    else:
+        prediction_type = "audio"
+    record = ParkinsonPrediction.objects.create(
+        user=user if user.is_authenticated else None,
+        prediction_type=prediction_type,
+        result=stats.POSITIVE if resp["final_label"] == 1 else stats.NEGATIVE,
+        probability=resp.get("final_confidence"),
+    )
+    return record.id
+
+
+def _save_upload(upload, suffix):
+    """
+    Spool an upload to a temp file, hashing it on the way.
+    Returns (path, sha256 hex digest).
+    """
+    digest = hashlib.sha256()
+    tmp = tempfile.NamedTemporaryFile(delete=False, suffix=suffix)
+    for chunk in upload.chunks():
+        digest.update(chunk)
+        tmp.write(chunk)
+    tmp.close()
+    return tmp.name, digest.hexdigest()
+
+
+def _run_inference(use_audio, use_image, tmp_audio_path, tmp_image_path, heatmap_sha=None, image_sha=None):
+    details = {}
+    audio_result = image_result = fused_result = None
+
+    # --- AUDIO PREDICTION ---
+    if use_audio and tmp_audio_path:
+        audio_result, audio_err = utils.predict_audio_from_file(tmp_audio_path)
+        if audio_err:
+            details["audio_error"] = audio_err
+
+    # --- IMAGE PREDICTION ---
+    if use_image and tmp_image_path:
+        try:
+            pil = Image.open(tmp_image_path)
+            image_result, image_err = utils.predict_image_from_pil(pil, heatmap_sha=heatmap_sha)
+            if image_err:
+                details["image_error"] = image_err
+        except Exception as e:
+            details["image_error"] = f"Cannot open image: {str(e)}"
+
+    # --- FUSION ---
+    if use_image and use_audio:
+        fused_result, fused_err = utils.predict_fused(tmp_audio_path, tmp_image_path, image_sha=image_sha)
+        if fused_err:
+            details["fusion_error"] = fused_err
+
+    # --- FINAL LABEL & CONFIDENCE ---
+    final_label = 0
+    final_confidence = 0.0
+    if fused_result:
+        final_label = fused_result.get("label", 0)
+        final_confidence = fused_result.get("probability", 0.0)
+    else:
+        if audio_result:
+            final_label = audio_result.get("label", 0)
+            final_confidence = audio_result.get("probability", 0.0)
+        if image_result:
+            final_label = image_result.get("label", 0)
+            final_confidence = image_result.get("probability", 0.0)
+
+    for key in details:   # "audio_error" -> audio
+        metrics.MODALITY_ERRORS.inc(modality=key.split("_")[0])
+
+    return {
+        "result": "Parkinsons" if int(final_label) == 1 else "No Parkinsons",
+        "final_label": int(final_label),
+        "final_confidence": float(final_confidence) if final_confidence is not None else None,
+        "fusion_used": bool(fused_result and fused_result.get("method") == "fusion_model"),
+        "audio_prediction": audio_result,
+        "image_prediction": image_result,
+        "fused_prediction": fused_result,
+        "details": details,
+    }
+
+
+def _log_prediction(response, timings, elapsed, model_version=None, canary=False):
+    """
+    Count the request and emit one structured log line with the stage timings.
+    """
+    status_code = response.status_code if response is not None else 500
+    outcome = "ok" if status_code < 400 else ("rejected" if status_code < 500 else "error")
+    metrics.REQUESTS.inc(outcome=outcome)
+    metrics.REQUEST_SECONDS.observe(elapsed)
+
+    data = getattr(response, "data", None) or {}
+    event = {
+        "event": "prediction",
+        "status": status_code,
+        "prediction_id": data.get("prediction_id") or (response.get("X-Prediction-Id") if response is not None else None),
+        "cache": data.get("cache_hit"),
+        "model_version": model_version,
+        "canary": canary,
+        "errors": sorted(data.get("details") or {}),
+        "total_ms": round(elapsed * 1000.0, 3),
+        "stages_ms": timings,
+    }
+    # Outcomes are patient data; they stay in the database unless explicitly enabled
+    if getattr(settings, "LOG_PREDICTION_OUTCOMES", False):
+        event["final_label"] = data.get("final_label")
+        event["final_confidence"] = data.get("final_confidence")
+    logger.info(json.dumps(event))
 
-# Ensure media folder exists
-os.makedirs(getattr(settings, "MEDIA_ROOT", "media"), exist_ok=True)
 
 class PredictAPIView(APIView):
     permission_classes = [IsAuthenticated]
     parser_classes = (MultiPartParser, FormParser, JSONParser)
+    throttle_classes = [ScopedRateThrottle]
+    throttle_scope = "predict"
 
     def post(self, request, format=None):
+        started = time.perf_counter()
+        response = None
+        # One model set for the whole request (the candidate's for canary
+        # users), even if a new version is hot-swapped in while it runs
+        models, is_canary = shadow.choose_models(request.user)
+        with metrics.request_timings() as timings, utils.pin_models(models), utils.capture_inputs() as captured:
+            try:
+                with admission.admit(request):
+                    response = self._predict(request)
+                shadow.after_response(response, models, is_canary, captured)
+                return response
+            except admission.Rejected as e:
+                response = e.response()
+                return response
+            finally:
+                _log_prediction(response, timings, time.perf_counter() - started, models.version, is_canary)
+
+    def _predict(self, request):
         user = request.user  # Fetch logged-in user from the request
 
         # Fetch user details from the logged-in user
         name = user.full_name if hasattr(user, 'full_name') else "Unknown"
         phone = user.phone if hasattr(user, 'phone') else "N/A"
         email = user.email if hasattr(user, 'email') else "N/A"
-       
 
         # Extract prediction flags
         serializer = PredictSerializer(data=request.data)
@@ -43,75 +197,39 @@ class PredictAPIView(APIView):
         audio_file = serializer.validated_data.get("audio_file", None)
         image_file = serializer.validated_data.get("image_file", None)
         generate_report = serializer.validated_data.get("generate_report", False)
+        report_delivery = serializer.validated_data.get("report_delivery", "url")
+        async_report = serializer.validated_data.get("async_report", True)
+        return_heatmap = serializer.validated_data.get("return_heatmap", False)
+        if generate_report and report_delivery == "url" and async_report:
+            admission.check_report_queue()
 
         tmp_audio_path = tmp_image_path = None
-        details = {}
-        audio_result = image_result = fused_result = None
+        audio_sha = image_sha = None
         spectrogram_bytes = heatmap_bytes = None
 
         try:
-            # --- AUDIO PREDICTION ---
             if use_audio and audio_file:
-                tmp_audio = tempfile.NamedTemporaryFile(delete=False, suffix=".wav")
-                tmp_audio.write(audio_file.read())
-                tmp_audio.close()
-                tmp_audio_path = tmp_audio.name
-                audio_result, audio_err = utils.predict_audio_from_file(tmp_audio_path)
-                if audio_err:
-                    details["audio_error"] = audio_err
-
-            # --- IMAGE PREDICTION ---
+                tmp_audio_path, audio_sha = _save_upload(audio_file, ".wav")
             if use_image and image_file:
-                tmp_image = tempfile.NamedTemporaryFile(delete=False, suffix=".png")
-                tmp_image.write(image_file.read())
-                tmp_image.close()
-                tmp_image_path = tmp_image.name
-                try:
-                    pil = Image.open(tmp_image_path)
-                    image_result, image_err = utils.predict_image_from_pil(pil)
-                    if image_err:
-                        details["image_error"] = image_err
-                except Exception as e:
-                    details["image_error"] = f"Cannot open image: {str(e)}"
-
-            # --- FUSION ---
-            if use_image and use_audio:
-                fused_result, fused_err = utils.predict_fused(tmp_audio_path, tmp_image_path)
-                if fused_err:
-                    details["fusion_error"] = fused_err
-
-            # --- FINAL LABEL & CONFIDENCE ---
-            final_confidence = 0.0
-            if fused_result:
-                final_label = fused_result.get("label", 0)
-                final_confidence = fused_result.get("probability", 0.0)
-            else:
-                if audio_result:
-                    final_label = audio_result.get("label", 0)
-                    final_confidence = audio_result.get("probability", 0.0)
-                if image_result:
-                    final_label = image_result.get("label", 0)
-                    final_confidence = image_result.get("probability", 0.0)
-
-            # --- DEBUGGING LOGS ---
-            print("=== DEBUG PREDICTION ===")
-            print("Audio result:", audio_result)
-            print("Image result:", image_result)
-            print("Fused result:", fused_result)
-            print("Final confidence:", final_confidence)
-            print("Final label:", final_label)
-            print("========================\n")
-
-            resp = {
-                "result": "Parkinsons" if int(final_label) == 1 else "No Parkinsons",
-                "final_label": int(final_label),
-                "final_confidence": float(final_confidence) if final_confidence is not None else None,
-                "fusion_used": False,  # update if fusion is used
-                "audio_prediction": audio_result,
-                "image_prediction": image_result,
-                "fused_prediction": fused_result,
-                "details": details,
-            }
+                tmp_image_path, image_sha = _save_upload(image_file, ".png")
+
+            # --- DEDUPLICATION: identical inputs + models give identical results ---
+            cache_key = result_cache.make_key(audio_sha, image_sha, fused=use_audio and use_image)
+            resp, cache_tier = result_cache.lookup(cache_key)
+            metrics.RESULT_CACHE.inc(tier=cache_tier or "miss")
+            # Grad-CAM comes out of the image prediction pass itself
+            heatmap_sha = image_sha if (return_heatmap or generate_report) else None
+            if resp is None:
+                resp = _run_inference(use_audio, use_image, tmp_audio_path, tmp_image_path, heatmap_sha,
+                                      image_sha=image_sha)
+                if not resp["details"]:   # never cache transient failures
+                    result_cache.store(cache_key, resp)
+            resp["cache_hit"] = cache_tier
+            if heatmap_sha and tmp_image_path:
+                heatmap_bytes = utils.image_heatmap(tmp_image_path, heatmap_sha)
+                if return_heatmap and heatmap_bytes:
+                    resp["heatmap_base64"] = base64.b64encode(heatmap_bytes).decode()
+            resp["prediction_id"] = _record_prediction(user, resp)
 
             # --- REPORT GENERATION ---
             if generate_report:
@@ -124,25 +242,42 @@ class PredictAPIView(APIView):
                         "test_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
                     }
 
-                    pdf_bytes = utils.generate_pdf_report(
-                        prediction=resp,
-                        spectrogram_bytes=spectrogram_bytes,
-                        heatmap_bytes=heatmap_bytes,
-                        user_info=user_info   # Pass user info here
-                    )
-
-                    filename = f"parkinson_report_{uuid.uuid4().hex}.pdf"
-                    media_root = getattr(settings, "MEDIA_ROOT", "media")
-                    os.makedirs(media_root, exist_ok=True)
-                    file_path = os.path.join(media_root, filename)
-
-                    with open(file_path, "wb") as f:
-                        f.write(pdf_bytes)
+                    if report_delivery == "url" and async_report:
+                        # Render in the background; the client polls the download URL
+                        report_id = report_queue.report_id_for(cache_key, user.id)
+                        resp["report_status"] = report_queue.submit(
+                            report_id, resp, spectrogram_bytes, heatmap_bytes, user_info
+                        )
+                    else:
+                        pdf_bytes = utils.generate_pdf_report(
+                            prediction=resp,
+                            spectrogram_bytes=spectrogram_bytes,
+                            heatmap_bytes=heatmap_bytes,
+                            user_info=user_info   # Pass user info here
+                        )
+                        report_id = uuid.uuid4().hex
+
+                        if report_delivery == "inline":
+                            # Stream the PDF straight back; nothing touches disk
+                            response = FileResponse(
+                                io.BytesIO(pdf_bytes), content_type="application/pdf",
+                                filename=report_store.report_filename(report_id),
+                            )
+                            response["X-Prediction-Id"] = str(resp["prediction_id"])
+                            response["X-Prediction-Result"] = resp["result"]
+                            response["X-Final-Confidence"] = str(resp["final_confidence"])
+                            return response
+
+                        report_store.save(report_id, pdf_bytes)
+                        resp["report_status"] = report_queue.READY
 
                     # ✅ Correct download link
+                    filename = report_store.report_filename(report_id)
                     report_url = request.build_absolute_uri(
                         f"/api/predictor/download/{filename}/"
                     )
+                    resp["report_id"] = report_id
+                    resp["report_file"] = filename
                     resp["report_url"] = report_url
                 except Exception as e:
                     resp["report_error"] = str(e)
@@ -161,11 +296,23 @@ class PredictAPIView(APIView):
 
 class SpectrogramAPIView(APIView):
     parser_classes = (MultiPartParser, FormParser)
+    throttle_classes = [ScopedRateThrottle]
+    throttle_scope = "predict"
 
     def post(self, request, format=None):
+        try:
+            with admission.admit(request):
+                return self._spectrogram(request)
+        except admission.Rejected as e:
+            return e.response()
+
+    def _spectrogram(self, request):
         audio_file = request.FILES.get("audio_file", None)
         if not audio_file:
             return Response({"error": "audio_file required"}, status=status.HTTP_400_BAD_REQUEST)
+        error = admission.check_audio(audio_file)
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
 
         tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".wav")
         tmp.write(audio_file.read())
@@ -181,153 +328,153 @@ class SpectrogramAPIView(APIView):
             except Exception:
                 pass
 
-class ReportAPIView(APIView):
-    permission_classes = [IsAuthenticated]
+class ReportAPIView(PredictAPIView):
+    """
+    Same pipeline as PredictAPIView, multipart uploads only
+    """
     parser_classes = (MultiPartParser, FormParser)
 
-    def post(self, request, format=None):
-        user = request.user  # Fetch logged-in user from the request
+class DownloadReportView(APIView):
+    """
+    Download a generated report from the short-lived report store
+    (or MEDIA_ROOT for links issued before the store existed).
+    Reports still rendering are waited on for up to ?wait= seconds.
+    """
+    def get(self, request, filename):
+        report_id = report_store.parse_report_filename(filename)
+        if report_id is None:
+            raise Http404("Report not found or expired.")
 
-        # Fetch user details
-        name = user.full_name if hasattr(user, 'full_name') else "Unknown"
-        phone = user.phone if hasattr(user, 'phone') else "N/A"
-        email = user.email if hasattr(user, 'email') else "N/A"
+        path = report_store.find(report_id)
+        if path is None:
+            try:
+                wait = min(max(float(request.query_params.get("wait", REPORT_DOWNLOAD_WAIT)), 0.0), REPORT_MAX_WAIT)
+            except ValueError:
+                wait = REPORT_DOWNLOAD_WAIT
+            current = report_queue.wait(report_id, wait)
+            if current == report_queue.PENDING:
+                response = Response({"report_id": report_id, "report_status": current}, status=status.HTTP_202_ACCEPTED)
+                response["Retry-After"] = "1"
+                return response
+            if current == report_queue.FAILED:
+                return Response(
+                    {"report_id": report_id, "report_status": current, "error": "Report rendering failed."},
+                    status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                )
+            path = report_store.find(report_id)
+            if path is None:
+                raise Http404("Report not found or expired.")
+
+        return report_store.file_response(request, path, filename)
+
+
+class PredictionHistoryAPIView(APIView):
+    """
+    Newest-first prediction history with keyset (cursor) pagination.
+    Staff may pass ?user_id= to view a patient's history.
+    """
+    permission_classes = [IsAuthenticated]
 
-        # Extract prediction flags
-        serializer = PredictSerializer(data=request.data)
-        if not serializer.is_valid():
-            return Response(
-                {"error": "Invalid input", "details": serializer.errors},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+    def get(self, request):
+        try:
+            limit = min(int(request.query_params.get("limit", HISTORY_PAGE_SIZE)), HISTORY_MAX_PAGE_SIZE)
+        except ValueError:
+            return Response({"error": "limit must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+        if limit < 1:
+            return Response({"error": "limit must be positive"}, status=status.HTTP_400_BAD_REQUEST)
+
+        user_id = request.user.id
+        if request.user.is_staff and request.query_params.get("user_id"):
+            try:
+                user_id = int(request.query_params["user_id"])
+            except ValueError:
+                return Response({"error": "user_id must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = (
+            ParkinsonPrediction.objects.filter(user_id=user_id)
+            .select_related("user")
+            .only("id", "uploaded_at", "prediction_type", "result", "probability", "user__email")
+        )
+        try:
+            rows, next_cursor = stats.history_page(queryset, request.query_params.get("cursor"), limit)
+        except ValueError:
+            return Response({"error": "Invalid cursor"}, status=status.HTTP_400_BAD_REQUEST)
 
-        use_audio = serializer.validated_data.get("use_audio", True)
-        use_image = serializer.validated_data.get("use_image", False)
-        audio_file = serializer.validated_data.get("audio_file", None)
-        image_file = serializer.validated_data.get("image_file", None)
-        generate_report = serializer.validated_data.get("generate_report", False)
+        return Response({
+            "results": PredictionHistorySerializer(rows, many=True).data,
+            "next_cursor": next_cursor,
+        })
 
-        tmp_audio_path = tmp_image_path = None
-        details = {}
-        audio_result = image_result = fused_result = None
-        spectrogram_bytes = heatmap_bytes = None
 
-        try:
-            # --- AUDIO PREDICTION ---
-            if use_audio and audio_file:
-                tmp_audio = tempfile.NamedTemporaryFile(delete=False, suffix=".wav")
-                tmp_audio.write(audio_file.read())
-                tmp_audio.close()
-                tmp_audio_path = tmp_audio.name
-                audio_result, audio_err = utils.predict_audio_from_file(tmp_audio_path)
-                if audio_err:
-                    details["audio_error"] = audio_err
-
-            # --- IMAGE PREDICTION ---
-            if use_image and image_file:
-                tmp_image = tempfile.NamedTemporaryFile(delete=False, suffix=".png")
-                tmp_image.write(image_file.read())
-                tmp_image.close()
-                tmp_image_path = tmp_image.name
-                try:
-                    pil = Image.open(tmp_image_path)
-                    image_result, image_err = utils.predict_image_from_pil(pil)
-                    if image_err:
-                        details["image_error"] = image_err
-                except Exception as e:
-                    details["image_error"] = f"Cannot open image: {str(e)}"
-
-            # --- FUSION ---
-            if use_image and use_audio:
-                fused_result, fused_err = utils.predict_fused(tmp_audio_path, tmp_image_path)
-                if fused_err:
-                    details["fusion_error"] = fused_err
-
-            # --- FINAL LABEL & CONFIDENCE ---
-            final_confidence = 0.0
-            if fused_result:
-                final_label = fused_result.get("label", 0)
-                final_confidence = fused_result.get("probability", 0.0)
-            else:
-                if audio_result:
-                    final_label = audio_result.get("label", 0)
-                    final_confidence = audio_result.get("probability", 0.0)
-                if image_result:
-                    final_label = image_result.get("label", 0)
-                    final_confidence = image_result.get("probability", 0.0)
-
-            # --- DEBUGGING LOGS ---
-            print("=== DEBUG PREDICTION ===")
-            print("Audio result:", audio_result)
-            print("Image result:", image_result)
-            print("Fused result:", fused_result)
-            print("Final confidence:", final_confidence)
-            print("Final label:", final_label)
-            print("========================\n")
-
-            resp = {
-                "result": "Parkinsons" if int(final_label) == 1 else "No Parkinsons",
-                "final_label": int(final_label),
-                "final_confidence": float(final_confidence) if final_confidence is not None else None,
-                "fusion_used": False,  # update if fusion is used
-                "audio_prediction": audio_result,
-                "image_prediction": image_result,
-                "fused_prediction": fused_result,
-                "details": details,
-            }
+class PredictionStatsAPIView(APIView):
+    """
+    Daily positive-rate dashboard served from materialized rollups.
+    """
+    permission_classes = [IsAdminUser]
 
-            # --- REPORT GENERATION ---
-            if generate_report:
-                try:
-                    # Prepare user info from the database (from logged-in user)
-                    user_info = {
-                        "name": name,  # You can add age if it is available
-                        "phone": phone,
-                        "email": email,
-                        "test_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    }
+    def get(self, request):
+        try:
+            days = min(max(int(request.query_params.get("days", 30)), 1), 366)
+        except ValueError:
+            return Response({"error": "days must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"days": days, "series": stats.daily_stats(days)})
 
-                    pdf_bytes = utils.generate_pdf_report(
-                        prediction=resp,
-                        spectrogram_bytes=spectrogram_bytes,
-                        heatmap_bytes=heatmap_bytes,
-                        user_info=user_info   # Pass user info here
-                    )
 
-                    filename = f"parkinson_report_{uuid.uuid4().hex}.pdf"
-                    media_root = getattr(settings, "MEDIA_ROOT", "media")
-                    os.makedirs(media_root, exist_ok=True)
-                    file_path = os.path.join(media_root, filename)
+class BulkReportAPIView(APIView):
+    """
+    One PDF per stored prediction, streamed back as a zip archive.
+    Staff may include any prediction; other users only their own.
+    """
+    permission_classes = [IsAuthenticated]
+    parser_classes = (JSONParser,)
 
-                    with open(file_path, "wb") as f:
-                        f.write(pdf_bytes)
+    def post(self, request):
+        ids = request.data.get("prediction_ids")
+        if not isinstance(ids, list) or not ids:
+            return Response({"error": "prediction_ids must be a non-empty list"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(ids) > BULK_REPORT_MAX_IDS:
+            return Response(
+                {"error": f"At most {BULK_REPORT_MAX_IDS} predictions per archive"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            ids = sorted({int(i) for i in ids})
+        except (TypeError, ValueError):
+            return Response({"error": "prediction_ids must be integers"}, status=status.HTTP_400_BAD_REQUEST)
 
-                    # ✅ Correct download link
-                    report_url = request.build_absolute_uri(
-                        f"/api/predictor/download/{filename}/"
-                    )
-                    resp["report_url"] = report_url
-                except Exception as e:
-                    resp["report_error"] = str(e)
+        queryset = bulk_reports.prediction_queryset(ids)
+        if not request.user.is_staff:
+            queryset = queryset.filter(user=request.user)
+        missing = sorted(set(ids) - set(queryset.values_list("id", flat=True)))
+        if missing:
+            return Response({"error": "Predictions not found", "missing": missing}, status=status.HTTP_404_NOT_FOUND)
 
-            return Response(resp, status=status.HTTP_200_OK)
+        response = StreamingHttpResponse(
+            bulk_reports.iter_zip(bulk_reports.iter_jobs(queryset)), content_type="application/zip"
+        )
+        response["Content-Disposition"] = 'attachment; filename="parkinson_reports.zip"'
+        return response
 
-        finally:
-            # Clean up temporary files
-            for p in (tmp_audio_path, tmp_image_path):
-                try:
-                    if p and os.path.exists(p):
-                        os.remove(p)
-                except Exception:
-                    pass
 
-class DownloadReportView(APIView):
+class MetricsView(APIView):
     """
-    Download previously generated report from MEDIA_ROOT
+    Prometheus text-format metrics for this worker process.
+    Staff users, or scrapers presenting settings.METRICS_TOKEN as a Bearer token.
     """
-    def get(self, request, filename):
-        media_root = getattr(settings, "MEDIA_ROOT", "media")
-        file_path = os.path.join(media_root, filename)
-        if not os.path.exists(file_path):
-            raise Http404("Report not found.")
-        return FileResponse(open(file_path, "rb"), as_attachment=True, filename=filename)
\ No newline at end of file
+    authentication_classes = []
+    permission_classes = []
+
+    def get(self, request):
+        token = getattr(settings, "METRICS_TOKEN", None)
+        supplied = request.META.get("HTTP_AUTHORIZATION", "").removeprefix("Bearer ").strip()
+        if not (token and hmac.compare_digest(supplied, token)) and not self._is_staff(request):
+            return HttpResponse("Forbidden\n", status=403, content_type="text/plain")
+        return HttpResponse(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+    @staticmethod
+    def _is_staff(request):
+        try:
+            authenticated = CachedJWTAuthentication().authenticate(request)
+        except Exception:
+            return False
+        return bool(authenticated and authenticated[0].is_staff)
@@ -0,0 +1,86 @@
+"""
+search_audio_model.py
+---------------------
+Hyperparameter search over the voice classifiers (SVC C/gamma, random forest
+depth/estimators, gradient boosting) with parallel stratified k-fold CV and
+early dropping of dominated candidates. Prints the accuracy/latency Pareto
+front and writes the full report as JSON. With --save the chosen model is
+refit on all data and written to models/candidate/; promote it with
+``python evaluate_models.py --promote`` once it passes the evaluation gate.
+
+    python search_audio_model.py --csv parkinsons.csv
+    python search_audio_model.py --shards cache/features/praat40/shards/dataset_voice --budget-ms 2
+    python search_audio_model.py --features voice_features.npy --budget-ms 1 --save
+"""
+
+import argparse
+import os
+
+import joblib
+import numpy as np
+
+from predictor import model_eval, model_search
+
+
+def load_data(args):
+    if args.shards:
+        from predictor import feature_store
+        X, y = feature_store.load_features(args.shards)
+        return np.asarray(X), np.asarray(y)
+    if args.features:
+        # Rows frozen into the evaluation holdout are never searched on
+        X, y = np.load(args.features), np.load(args.labels)
+        keep = model_eval.voice_training_mask(X)
+        return X[keep], y[keep]
+    import pandas as pd
+    data = pd.read_csv(args.csv)
+    y = data["status"].to_numpy()
+    X = data.drop(columns=[c for c in ("name", "status") if c in data.columns]).to_numpy()
+    return X, y
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--csv", default="parkinsons.csv", help="UCI-style CSV with a 'status' column")
+    source.add_argument("--shards", default=None, help="feature_store shard directory (e.g. praat40)")
+    source.add_argument("--features", default=None, help="X .npy (with --labels)")
+    parser.add_argument("--labels", default="labels.npy")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--jobs", type=int, default=-1)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--margin", type=float, default=0.02, help="Accuracy margin before dropping a candidate")
+    parser.add_argument("--budget-ms", type=float, default=None, help="Single-row serving latency budget")
+    parser.add_argument("--out", default=os.path.join(model_search.CACHE_DIR, "report.json"))
+    parser.add_argument("--save", action="store_true", help="Refit the chosen model on all data and save it")
+    args = parser.parse_args()
+
+    X, y = load_data(args)
+    report = model_search.search(X, y, k=args.folds, n_jobs=args.jobs, seed=args.seed, margin=args.margin)
+    model_search.write_report(report, args.out)
+
+    dropped = sum(r["status"] != "complete" for r in report["candidates"])
+    print(f"✅ {len(report['candidates'])} candidates, {dropped} dropped early, {report['seconds']}s → {args.out}")
+    print("\nAccuracy / latency Pareto front:")
+    for r in report["pareto_front"]:
+        print(f"  {r['accuracy']:.4f} ± {r['accuracy_std']:.4f}   {r['latency_ms']:.3f} ms   {r['name']}")
+
+    chosen = model_search.pick(report, args.budget_ms)
+    if chosen is None:
+        print(f"\n⚠️ No candidate meets the {args.budget_ms} ms budget")
+        return
+    print(f"\nChosen: {chosen['name']}")
+
+    if args.save:
+        from sklearn.preprocessing import StandardScaler
+        scaler = StandardScaler().fit(X)
+        model = model_search.build_estimator(chosen["family"], chosen["params"], args.seed)
+        model.fit(scaler.transform(X), y)
+        os.makedirs(model_eval.CANDIDATE_DIR, exist_ok=True)
+        joblib.dump(model, os.path.join(model_eval.CANDIDATE_DIR, "parkinsons_model.pkl"))
+        joblib.dump(scaler, os.path.join(model_eval.CANDIDATE_DIR, "scaler.pkl"))
+        print(f"✅ Files saved: parkinsons_model.pkl, scaler.pkl → {model_eval.CANDIDATE_DIR}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,45 +1,56 @@
 # ===============================
 # Parkinson's Voice Model Training Script
 # ===============================
-# Output: parkinsons_model.pkl, scaler.pkl
+# Input: voice_features.npy (N, 40), the same features the API extracts
+#        from a recording, and labels.npy (N,)
+# Output: models/candidate/parkinsons_model.pkl, scaler.pkl
+# (promote with: python evaluate_models.py --promote)
 # ===============================
 
-import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
 from sklearn.svm import SVC
 from sklearn.metrics import accuracy_score, classification_report
 import joblib
+import os
 
-# 1️⃣ Load dataset (UCI Parkinson’s)
-data = pd.read_csv('parkinsons.csv')
+from predictor import features, model_eval
 
-# Drop irrelevant columns
-if 'name' in data.columns:
-    X = data.drop(columns=['name', 'status'])
-else:
-    X = data.drop(columns=['status'])
-y = data['status']
+# 1️⃣ Load voice features
+if not (os.path.exists(model_eval.VOICE_FEATURES) and os.path.exists(model_eval.FEATURE_LABELS)):
+    raise FileNotFoundError("Please generate voice_features.npy and labels.npy before training.")
+X = np.load(model_eval.VOICE_FEATURES)
+y = np.load(model_eval.FEATURE_LABELS)
+if X.shape[1] != features.AUDIO_FEATURE_DIM:
+    raise ValueError(f"voice_features.npy has {X.shape[1]} columns; the API serves {features.AUDIO_FEATURE_DIM}")
 
-# 2️⃣ Split into train/test
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+# Keep the frozen evaluation holdout out of training
+keep = model_eval.voice_training_mask(X)
+X, y = X[keep], y[keep]
+print(f"Excluded {int((~keep).sum())} holdout rows (model_holdout.json)")
+
+# 2️⃣ Split the training rows into train/validation
+X_train, X_val, y_train, y_val = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
 
 # 3️⃣ Scale features
 scaler = StandardScaler()
 X_train_scaled = scaler.fit_transform(X_train)
-X_test_scaled = scaler.transform(X_test)
+X_val_scaled = scaler.transform(X_val)
 
 # 4️⃣ Train SVM model
 model = SVC(kernel='rbf', probability=True, random_state=42)
 model.fit(X_train_scaled, y_train)
 
 # 5️⃣ Evaluate
-y_pred = model.predict(X_test_scaled)
-print("✅ Accuracy:", round(accuracy_score(y_test, y_pred) * 100, 2), "%")
-print("Classification Report:\n", classification_report(y_test, y_pred))
-
-# 6️⃣ Save model + scaler
-joblib.dump(model, 'parkinsons_model.pkl')
-joblib.dump(scaler, 'scaler.pkl')
-print("✅ Files saved: parkinsons_model.pkl, scaler.pkl")
+y_pred = model.predict(X_val_scaled)
+print("✅ Validation accuracy:", round(accuracy_score(y_val, y_pred) * 100, 2), "%")
+print("Classification Report:\n", classification_report(y_val, y_pred))
+
+# 6️⃣ Save model + scaler as a candidate; the deployed files are only
+# replaced by evaluate_models.py once the candidate passes the gate
+os.makedirs(model_eval.CANDIDATE_DIR, exist_ok=True)
+joblib.dump(model, os.path.join(model_eval.CANDIDATE_DIR, 'parkinsons_model.pkl'))
+joblib.dump(scaler, os.path.join(model_eval.CANDIDATE_DIR, 'scaler.pkl'))
+print(f"✅ Files saved to {model_eval.CANDIDATE_DIR}: parkinsons_model.pkl, scaler.pkl")
+print("   Next: python evaluate_models.py --promote")
@@ -3,67 +3,33 @@
 # Works with dataset/healthy and dataset/parkinson
 # ===============================
 
-import os
 import tensorflow as tf
 from tensorflow.keras.models import Sequential
 from tensorflow.keras.layers import Conv2D, MaxPooling2D, Flatten, Dense, Dropout, BatchNormalization
-from tensorflow.keras.preprocessing.image import ImageDataGenerator
 from tensorflow.keras.callbacks import EarlyStopping
-from sklearn.model_selection import train_test_split
-import shutil
-
-# Directories
-base_dir = 'dataset'
-train_dir = 'dataset_split/train'
-test_dir = 'dataset_split/test'
-
-# Create split directories if not exist
-if not os.path.exists('dataset_split'):
-    os.makedirs(train_dir)
-    os.makedirs(test_dir)
 
-    for label in ['healthy', 'parkinson']:
-        os.makedirs(os.path.join(train_dir, label))
-        os.makedirs(os.path.join(test_dir, label))
+import os
 
-        # Split files 80/20 automatically
-        full_path = os.path.join(base_dir, label)
-        images = os.listdir(full_path)
-        train_imgs, test_imgs = train_test_split(images, test_size=0.2, random_state=42)
+from predictor import data_pipeline, dataset_manifest, image_shards, model_eval
 
-        for img in train_imgs:
-            shutil.copy(os.path.join(full_path, img), os.path.join(train_dir, label, img))
-        for img in test_imgs:
-            shutil.copy(os.path.join(full_path, img), os.path.join(test_dir, label, img))
+# Directories
+base_dir = 'dataset'
 
-    print("✅ Dataset split into train/test successfully!")
+# Train/test split as an index over dataset/ (no copies); refreshed
+# incrementally so new images are picked up and existing ones keep their side
+manifest, changes = dataset_manifest.update(base_dir)
+print(f"✅ Dataset manifest: {changes}")
 
 # Parameters
 img_size = (224, 224)
 batch_size = 32
 
-# Data Augmentation
-train_datagen = ImageDataGenerator(
-    rescale=1.0/255,
-    shear_range=0.2,
-    zoom_range=0.2,
-    horizontal_flip=True
-)
-test_datagen = ImageDataGenerator(rescale=1.0/255)
-
-train_gen = train_datagen.flow_from_directory(
-    train_dir,
-    target_size=img_size,
-    batch_size=batch_size,
-    class_mode='binary'
-)
-
-test_gen = test_datagen.flow_from_directory(
-    test_dir,
-    target_size=img_size,
-    batch_size=batch_size,
-    class_mode='binary'
-)
+# Images packed once into memory-mapped uint8 shards (only new/changed files
+# are decoded on re-runs), then batched with vectorized flip/zoom augmentation.
+# Validation is carved out of the train split; the test split is the frozen
+# evaluation holdout and is never seen here.
+packed = image_shards.PackedImageDataset(image_shards.pack_manifest(manifest, image_size=img_size))
+train_gen, val_gen = data_pipeline.packed_train_validation(packed, batch_size=batch_size)
 
 # Build Model
 model = Sequential([
@@ -91,8 +57,9 @@ model.compile(optimizer='adam', loss='binary_crossentropy', metrics=['accuracy']
 callback = EarlyStopping(monitor='val_loss', patience=5, restore_best_weights=True)
 
 # Train
-model.fit(train_gen, validation_data=test_gen, epochs=10, callbacks=[callback])
+model.fit(train_gen, validation_data=val_gen, epochs=10, callbacks=[callback])
 
-# Save model
-model.save('image_model.h5')
-print("✅ Saved image_model.h5 successfully.")
+# Save model as a candidate (promote with: python evaluate_models.py --promote)
+os.makedirs(model_eval.CANDIDATE_DIR, exist_ok=True)
+model.save(os.path.join(model_eval.CANDIDATE_DIR, 'image_model.h5'))
+print(f"✅ Saved image_model.h5 to {model_eval.CANDIDATE_DIR}; next: python evaluate_models.py --promote")